@@ -0,0 +1,253 @@
+# Import necessary libraries
+import os
+import time
+import asyncio
+import logging
+import threading
+from db import SESSION_SETTINGS, get_connection, get_db_config
+from bulk_writer import DEFAULT_BATCH_SIZE, WriteCounts, batch_counts, conflict_key, existing_keys_query, insert_statement
+from bulk_writer import new_row_count, reject_null_rows, row_counts
+from quarantine import quarantine
+from dataset import open_dataset
+from metrics import metrics
+from title_index import TITLE_TABLES, title_index, title_queries
+from load_leads import LEADS_COLUMNS, lead_row_builder
+from load_property import PROPERTY_COLUMNS, property_row_builder
+from load_taxes import TAXES_COLUMNS, taxes_row_builder
+from load_rehab import REHAB_COLUMNS, rehab_row_builder
+from load_valuation import VALUATION_COLUMNS, valuation_row_builder
+from load_hoa import HOA_COLUMNS, hoa_row_builder
+
+# aiomysql is only needed by the async pipeline mode
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+# Load the main tables with the async pipeline; PIPELINE_ASYNC=1 makes it the default for pipeline runs
+DEFAULT_ASYNC = os.environ.get("PIPELINE_ASYNC", "0").strip().lower() in ("1", "true", "yes", "on")
+
+# Prepared chunks buffered per table; a full queue pauses chunk preparation until the writer catches up
+DEFAULT_QUEUE_SIZE = int(os.environ.get("PIPELINE_ASYNC_QUEUE", 2))
+
+# Table → (row builder, insert columns, takes update)
+ASYNC_TABLES = {
+    "leads": (lead_row_builder, LEADS_COLUMNS, True),
+    "property": (property_row_builder, PROPERTY_COLUMNS, True),
+    "taxes": (taxes_row_builder, TAXES_COLUMNS, False),
+    "rehab": (rehab_row_builder, REHAB_COLUMNS, False),
+    "valuation": (valuation_row_builder, VALUATION_COLUMNS, False),
+    "hoa": (hoa_row_builder, HOA_COLUMNS, False),
+}
+
+# Tables loaded together; each group starts once the previous one is committed
+ASYNC_STAGES = [["leads"], ["property"], ["taxes", "rehab", "valuation", "hoa"]]
+
+def _require_aiomysql():
+    if aiomysql is None:
+        raise ImportError("The async pipeline needs aiomysql; install it with 'pip install aiomysql'.")
+
+async def create_pool(config=None):
+    """
+    Opens an aiomysql pool with the pipeline's connection and bulk-load session settings.
+    """
+    _require_aiomysql()
+    config = config or get_db_config()
+    settings = [f"{name} = {int(config[name])}" for name in SESSION_SETTINGS if config.get(name) is not None]
+    return await aiomysql.create_pool(
+        host=config["host"],
+        port=config["port"],
+        user=config["user"],
+        password=config["password"],
+        db=config["database"],
+        autocommit=False,
+        minsize=1,
+        maxsize=max(1, config["pool_size"]),
+        init_command=f"SET SESSION {', '.join(settings)}" if settings else None,
+    )
+
+async def insert_rows_async(cursor, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, update=False, sources=None):
+    """
+    Async counterpart of bulk_writer.insert_rows: one multi-row upsert per batch (after a
+    key lookup with update=True), and rows of a failed batch retried one by one, with the
+    rejected ones quarantined with their sources. Returns WriteCounts.
+    """
+    statement = insert_statement(table, columns, update)
+    key = conflict_key(table, columns) if update else None
+    rows, sources, rejected = reject_null_rows(table, columns, rows, sources=sources)
+    counts = WriteCounts(rejected=rejected)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        new_rows = None
+        if key is not None:
+            query = existing_keys_query(table, columns, key, batch)
+            existing = []
+            if query is not None:
+                await cursor.execute(*query)
+                existing = await cursor.fetchall()
+            new_rows = new_row_count(batch, key, existing)
+        try:
+            if update:
+                # aiomysql only rewrites executemany into one multi-row INSERT when nothing but
+                # ON DUPLICATE KEY UPDATE follows VALUES, so the row alias needs the statement spelt out
+                await cursor.execute(insert_statement(table, columns, update, len(batch)), [value for row in batch for value in row])
+            else:
+                await cursor.executemany(statement, batch)
+            written = batch_counts(len(batch), cursor.rowcount, new_rows)
+        except Exception as e:
+            logging.warning(f"Batch insert into {table} failed at offset {start}: {e}. Retrying row by row.")
+            written = WriteCounts()
+            for n, row in enumerate(batch, start):
+                try:
+                    await cursor.execute(statement, row)
+                    written += row_counts(cursor.rowcount)
+                except Exception as row_error:
+                    written.rejected += 1
+                    quarantine.add(table, "write", columns, row, row_error, None if sources is None else sources[n])
+            logging.warning(f"Batch at offset {start} for {table}: {written.rejected} of {len(batch)} rows rejected.")
+        counts += written
+    if counts.rejected:
+        quarantine.flush()
+    return counts
+
+async def record_titles_async(cursor, table, titles):
+    """
+    Async counterpart of title_index.record: fetches the ids of the titles just written to
+    leads or property on the writer's connection and stores them in the shared title index.
+    """
+    rows = []
+    for statement, params in title_queries(table, titles):
+        await cursor.execute(statement, params)
+        rows.extend(await cursor.fetchall())
+    title_index.store(table, titles, rows)
+
+def _prepare_chunks(table, dataset, queue, loop, stop):
+    # Runs in a worker thread: builds each chunk's rows on a synchronous connection (lookups
+    # and title index) and hands them to the writer, blocking while the queue is full
+    builder = ASYNC_TABLES[table][0]
+    try:
+        conn = get_connection()
+    except ConnectionError:
+        asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+        raise
+    cursor = conn.cursor()
+    try:
+        build_rows = builder(cursor)
+        for chunk in dataset.iter_chunks():
+            if stop.is_set():
+                break
+            asyncio.run_coroutine_threadsafe(queue.put(build_rows(chunk)), loop).result()
+    finally:
+        asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+        cursor.close()
+        conn.close()
+
+async def _write_chunks(pool, table, queue, stop, batch_size, update):
+    # Writes prepared chunks in feed order on one connection, committing each chunk
+    _, columns, takes_update = ASYNC_TABLES[table]
+    counts = WriteCounts()
+    try:
+        async with pool.acquire() as conn:
+            try:
+                async with conn.cursor() as cursor:
+                    while True:
+                        prepared = await queue.get()
+                        if prepared is None:
+                            break
+                        rows, titles = prepared
+                        start = time.perf_counter()
+                        chunk_counts = await insert_rows_async(cursor, table, columns, rows, batch_size, update and takes_update,
+                                                               titles)
+                        metrics.record(table, "write", time.perf_counter() - start, chunk_counts.written,
+                                       round_trips=-(-len(rows) // batch_size))
+                        # Record the new lead and property ids so the child tables skip re-reading them
+                        if table in TITLE_TABLES:
+                            start = time.perf_counter()
+                            await record_titles_async(cursor, table, titles)
+                            metrics.record(table, "index", time.perf_counter() - start)
+                        start = time.perf_counter()
+                        await conn.commit()
+                        metrics.record(table, "commit", time.perf_counter() - start, round_trips=1)
+                        counts += chunk_counts
+            except Exception:
+                # Release the connection without the failed chunk's locks
+                await conn.rollback()
+                raise
+    except BaseException:
+        # Unblock the preparing thread so it can finish and release its connection
+        stop.set()
+        while await queue.get() is not None:
+            pass
+        raise
+    return counts
+
+async def load_table_async(pool, table, dataset, batch_size=DEFAULT_BATCH_SIZE, update=False, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Loads one main table with chunk preparation (merges, lookups, serialization) running
+    in a worker thread while the previous chunks are written, through a bounded queue.
+    Produces the same rows as the synchronous load_* function of the table.
+    Returns WriteCounts.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    start = time.perf_counter()
+    prepare = loop.run_in_executor(None, _prepare_chunks, table, dataset, queue, loop, stop)
+    write = asyncio.ensure_future(_write_chunks(pool, table, queue, stop, batch_size, update))
+    try:
+        counts, _ = await asyncio.gather(write, prepare)
+    finally:
+        metrics.record(table, "total", time.perf_counter() - start)
+    logging.info(f"Wrote rows into {table} table with the async pipeline: {counts}.")
+    return counts
+
+async def load_main_tables_async(source, batch_size=DEFAULT_BATCH_SIZE, update=False, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Loads all main tables through the async pipeline: leads, then property, then taxes,
+    rehab, valuation and hoa concurrently, each on its own pooled connection. A table that
+    fails is logged and reported like in the synchronous loaders; the rest of its group still
+    loads, later groups are skipped, and RuntimeError is raised at the end as in run_stages.
+    Returns {table: WriteCounts}.
+    """
+    _require_aiomysql()
+    config = get_db_config()
+    if config["backend"] != "mysql":
+        raise ValueError(f"The async pipeline needs the MySQL backend, not '{config['backend']}'.")
+    dataset = open_dataset(source)
+    title_index.clear()
+    pool = await create_pool(config)
+    results = {}
+    failed = []
+    skipped = []
+    try:
+        for group in ASYNC_STAGES:
+            # Every later group depends on the ones before it
+            if failed:
+                logging.warning(f"Skipping async stages {', '.join(group)} because a dependency failed.")
+                skipped.extend(group)
+                continue
+            outcomes = await asyncio.gather(
+                *(load_table_async(pool, table, dataset, batch_size, update, queue_size) for table in group),
+                return_exceptions=True
+            )
+            for table, outcome in zip(group, outcomes):
+                if isinstance(outcome, BaseException):
+                    logging.error(f"Failed to load {table} data with the async pipeline: {outcome}")
+                    print(f"Error: Could not load {table} data. Check logs for details.")
+                    failed.append(table)
+                else:
+                    results[table] = outcome
+                    print(f"{table.capitalize()} data loaded successfully.")
+    finally:
+        pool.close()
+        await pool.wait_closed()
+    if failed:
+        raise RuntimeError(f"async main tables failed: {', '.join(failed)}" + (f"; skipped: {', '.join(skipped)}" if skipped else ""))
+    logging.info("Main tables load completed with the async pipeline.")
+    return results
+
+def run_main_tables_async(source, batch_size=DEFAULT_BATCH_SIZE, update=False, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Synchronous entry point for load_main_tables_async, used by the pipeline orchestrator.
+    """
+    return asyncio.run(load_main_tables_async(source, batch_size, update, queue_size))
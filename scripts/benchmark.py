@@ -0,0 +1,136 @@
+# Import necessary libraries
+import os
+import sys
+import time
+import logging
+import tempfile
+from collections import Counter
+from db import get_connection
+from dataset import open_dataset
+from feed_generator import generate_feed
+from bulk_writer import DEFAULT_BATCH_SIZE, LOAD_MODES
+from main_lookup_tables_load import load_lookup_tables
+from load_leads import load_lead_data
+from load_property import PROPERTY_COLUMNS, load_property_data
+from load_taxes import load_taxes_data
+from load_rehab import load_rehab_data
+from load_valuation import load_valuation_data
+from load_hoa import load_hoa_data
+
+# Fact table loaders that support both load modes, in dependency order
+FACT_LOADERS = [
+    ("property", load_property_data),
+    ("rehab", load_rehab_data),
+    ("valuation", load_valuation_data),
+    ("hoa", load_hoa_data),
+]
+
+def reset_fact_tables():
+    """
+    Empties the fact tables so every load mode starts from the same state.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ("hoa", "valuation", "rehab", "taxes", "property"):
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def benchmark_load_modes(record_count, modes=LOAD_MODES, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Generates a synthetic feed, loads the lookup and leads tables once, then times
+    the fact table loaders under each load mode. Returns {mode: {table: seconds}}.
+    Runs against the database configured in db.py and truncates its fact tables.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        feed_path = os.path.join(tmp_dir, "synthetic_property_data.json")
+        generate_feed(feed_path, record_count)
+        dataset = open_dataset(feed_path)
+
+        load_lookup_tables(dataset)
+        load_lead_data(dataset, batch_size)
+
+        results = {}
+        for mode in modes:
+            reset_fact_tables()
+            timings = {}
+            for table, loader in FACT_LOADERS:
+                start = time.perf_counter()
+                loader(dataset, batch_size, mode)
+                timings[table] = time.perf_counter() - start
+            results[mode] = timings
+            logging.info(f"Load mode '{mode}' timings: {timings}")
+    return results
+
+# Rows compared between the client-side and the staged loads, keyed by title rather than by generated id
+STAGED_CHECK_QUERIES = {
+    "property": f"SELECT {', '.join(PROPERTY_COLUMNS)} FROM property",
+    "taxes": "SELECT p.property_title, t.tax_value FROM taxes t JOIN property p ON p.property_id = t.property_id",
+}
+
+def fetch_rows(query):
+    """
+    Returns the rows a query returns as a Counter, so row order does not matter.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(query)
+    rows = Counter(tuple(row) for row in cursor.fetchall())
+    cursor.close()
+    conn.close()
+    return rows
+
+def check_staged_load(source, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Loads the property and taxes tables from a feed once with the client-side row builders
+    and once through the staging tables, and returns {table: rows only one of the two loads
+    stored} for the tables where they differ, so an empty result means both paths agree.
+    Runs against the database configured in db.py and truncates its fact tables.
+    """
+    dataset = open_dataset(source)
+    load_lookup_tables(dataset)
+    load_lead_data(dataset, batch_size)
+
+    loaded = []
+    for staged in (False, True):
+        reset_fact_tables()
+        load_property_data(dataset, batch_size, staged=staged)
+        load_taxes_data(dataset, batch_size, staged=staged)
+        loaded.append({table: fetch_rows(query) for table, query in STAGED_CHECK_QUERIES.items()})
+
+    client, staged = loaded
+    mismatches = {}
+    for table in STAGED_CHECK_QUERIES:
+        differing = (client[table] - staged[table]) + (staged[table] - client[table])
+        if differing:
+            mismatches[table] = sum(differing.values())
+            logging.error(f"Staged and client-side {table} loads differ in {mismatches[table]} rows "
+                          f"(e.g. {next(iter(differing))}).")
+    return mismatches
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename='benchmark.log',
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s:%(message)s'
+    )
+
+    # benchmark.py --check-staged FEED compares the staged and client-side loads of a feed instead
+    if len(sys.argv) > 2 and sys.argv[1] == "--check-staged":
+        mismatches = check_staged_load(sys.argv[2])
+        if mismatches:
+            print(f"Error: staged and client-side loads differ: {mismatches}. Check logs for details.")
+            sys.exit(1)
+        print("Staged and client-side loads match.")
+        sys.exit(0)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    results = benchmark_load_modes(count)
+
+    print(f"Fact table load times for {count} synthetic records (seconds):")
+    print(f"{'mode':<8}" + "".join(f"{table:>12}" for table, _ in FACT_LOADERS) + f"{'total':>12}")
+    for mode, timings in results.items():
+        print(f"{mode:<8}" + "".join(f"{timings[table]:>12.2f}" for table, _ in FACT_LOADERS) + f"{sum(timings.values()):>12.2f}")
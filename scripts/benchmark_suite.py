@@ -0,0 +1,250 @@
+# Import necessary libraries
+import os
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timezone
+import db
+from dataset import open_dataset
+from feed_generator import DEFAULT_CARDINALITIES, generate_feed
+from bulk_writer import DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE
+from lookup_cache import lookup_cache
+from title_index import title_index
+from lookup_harvest import harvest_lookups
+from main_lookup_tables_load import load_lookup_tables
+from load_leads import load_lead_data
+from load_property import load_property_data, property_lookup_indexes, resolve_property_ids
+from load_taxes import load_taxes_data
+from load_rehab import load_rehab_data
+from load_valuation import load_valuation_data
+from load_hoa import load_hoa_data
+from metrics import PeakRSSSampler
+
+# Feed sizes run by default
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Main table loaders in dependency order: (table, loader, takes load_mode)
+MAIN_LOADERS = [
+    ("leads", load_lead_data, False),
+    ("property", load_property_data, True),
+    ("taxes", load_taxes_data, False),
+    ("rehab", load_rehab_data, True),
+    ("valuation", load_valuation_data, True),
+    ("hoa", load_hoa_data, True),
+]
+
+# Every table, children first, for resetting a MySQL database between runs
+ALL_TABLES = [
+    "hoa", "valuation", "rehab", "taxes", "property_fingerprint", "property", "leads", "address",
+    "city_lookup", "state_lookup", "hoa_lookup", "market_lookup", "flood_lookup", "property_type_lookup",
+    "parking_type_lookup", "layout_type_lookup", "subdivision_lookup", "source_lookup",
+    "selling_reason_lookup", "final_reviewer_lookup",
+]
+LOOKUP_TABLES = ALL_TABLES[7:]
+
+def table_counts(tables):
+    """
+    Returns {table: row count} for the given tables.
+    """
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    counts = {}
+    for table in tables:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return counts
+
+def reset_database():
+    """
+    Empties every pipeline table so each feed size starts from the same state.
+    """
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ALL_TABLES:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def measure(stage, func, rows=None, loader=None):
+    """
+    Runs one stage and returns (result, metrics). rows is a count, or a callable that
+    receives the stage's return value and returns the count.
+    """
+    with PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+    row_count = rows(result) if callable(rows) else rows
+    metrics = {
+        "stage": stage,
+        "loader": loader,
+        "seconds": round(seconds, 4),
+        "rows": row_count,
+        "rows_per_sec": round(row_count / seconds, 1) if row_count and seconds > 0 else None,
+        "peak_rss_mb": round(sampler.peak / 2**20, 1),
+    }
+    logging.info(f"Benchmark stage {stage}{f' ({loader})' if loader else ''}: {metrics}")
+    return result, metrics
+
+def benchmark_feed(feed_path, batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE, chunk_size=None):
+    """
+    Runs every pipeline stage once against an empty database and returns the stage metrics:
+    extract, lookup harvest, lookup insert, ID resolution and the insert of every main table.
+    """
+    stages = []
+
+    dataset, metrics = measure("extract", lambda: open_dataset(feed_path, chunk_size),
+                               rows=lambda ds: len(ds) if hasattr(ds, "__len__") else None)
+    record_count = metrics["rows"]
+    if record_count is None:
+        # A streamed feed is parsed inside every later stage; count it outside the timed stage
+        record_count = sum(1 for _ in dataset.iter_records())
+        metrics["rows"] = record_count
+        metrics["streamed"] = True
+    stages.append(metrics)
+
+    harvest, metrics = measure("lookup_harvest", lambda: harvest_lookups(dataset), rows=record_count)
+    metrics["distinct_values"] = sum(len(values) for values in harvest.values())
+    stages.append(metrics)
+
+    before = table_counts(LOOKUP_TABLES)
+    _, metrics = measure("lookup_insert", lambda: load_lookup_tables(dataset), loader="main_lookup_tables_load")
+    after = table_counts(LOOKUP_TABLES)
+    metrics["rows"] = sum(after.values()) - sum(before.values())
+    metrics["rows_per_sec"] = round(metrics["rows"] / metrics["seconds"], 1) if metrics["seconds"] else None
+    stages.append(metrics)
+
+    for table, loader, takes_mode in MAIN_LOADERS:
+        if table == "property":
+            stages.append(benchmark_id_resolution(dataset))
+        args = (dataset, batch_size, load_mode) if takes_mode else (dataset, batch_size)
+        before = table_counts([table])[table]
+        _, metrics = measure("insert", lambda: loader(*args), loader=table)
+        metrics["rows"] = table_counts([table])[table] - before
+        metrics["rows_per_sec"] = round(metrics["rows"] / metrics["seconds"], 1) if metrics["seconds"] else None
+        stages.append(metrics)
+
+    return record_count, stages
+
+def benchmark_id_resolution(dataset):
+    """
+    Times the property loader's foreign key resolution on its own, without writing rows.
+    """
+    def resolve():
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        try:
+            lookup_indexes = property_lookup_indexes(cursor)
+            resolved = 0
+            for chunk in dataset.iter_chunks():
+                resolved += len(resolve_property_ids(chunk.table_frame("property"), lookup_indexes, cursor))
+            return resolved
+        finally:
+            cursor.close()
+            conn.close()
+
+    _, metrics = measure("id_resolution", resolve, rows=lambda resolved: resolved, loader="property")
+    return metrics
+
+def run_suite(sizes=DEFAULT_SIZES, backend="sqlite", batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE,
+              chunk_size=None, seed=42, work_dir=None, **cardinalities):
+    """
+    Generates a synthetic feed for every size and benchmarks a full load of each one.
+    backend 'sqlite' uses a fresh stand-in database per size; 'mysql' uses the configured
+    server and truncates all pipeline tables first. Returns a JSON-serializable report.
+    """
+    cardinalities = {**DEFAULT_CARDINALITIES, **cardinalities}
+    # Each run must warm the lookup cache from its own database, not from a saved copy
+    lookup_cache.path = ""
+    runs = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        for size in sizes:
+            feed_path = os.path.join(tmp_dir, f"synthetic_{size}.json")
+            start = time.perf_counter()
+            generate_feed(feed_path, size, seed, **cardinalities)
+            logging.info(f"Generated {size} records in {time.perf_counter() - start:.1f}s.")
+
+            if backend == "sqlite":
+                db.configure(backend="sqlite", sqlite_path=os.path.join(tmp_dir, f"bench_{size}.sqlite"))
+            else:
+                db.configure(backend="mysql")
+                reset_database()
+            lookup_cache.clear()
+            title_index.clear()
+
+            start = time.perf_counter()
+            record_count, stages = benchmark_feed(feed_path, batch_size, load_mode, chunk_size)
+            total_seconds = time.perf_counter() - start
+            runs.append({
+                "records": record_count,
+                "feed_bytes": os.path.getsize(feed_path),
+                "total_seconds": round(total_seconds, 4),
+                "records_per_sec": round(record_count / total_seconds, 1) if total_seconds else None,
+                "stages": stages,
+            })
+            os.remove(feed_path)
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "backend": backend,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "batch_size": batch_size,
+            "load_mode": load_mode,
+            "chunk_size": chunk_size,
+            "seed": seed,
+            "cardinalities": cardinalities,
+        },
+        "runs": runs,
+    }
+
+def print_report(report):
+    for run in report["runs"]:
+        print(f"\n{run['records']} records ({report['backend']}), {run['total_seconds']:.2f}s total")
+        print(f"{'stage':<16}{'loader':<26}{'seconds':>10}{'rows':>12}{'rows/sec':>12}{'peak MB':>10}")
+        for stage in run["stages"]:
+            print(
+                f"{stage['stage']:<16}{stage['loader'] or '':<26}{stage['seconds']:>10.2f}"
+                f"{stage['rows'] if stage['rows'] is not None else '':>12}"
+                f"{stage['rows_per_sec'] if stage['rows_per_sec'] is not None else '':>12}"
+                f"{stage['peak_rss_mb']:>10.1f}"
+            )
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename='benchmark_suite.log',
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s:%(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic feeds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite",
+                        help="'sqlite' stand-in (default) or the MySQL server configured for db.py")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--load-mode", default=DEFAULT_LOAD_MODE)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default=None, help="where feeds and stand-in databases are written")
+    parser.add_argument("--output", default="benchmark_results.json")
+    for name, default in DEFAULT_CARDINALITIES.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    args = parser.parse_args()
+
+    report = run_suite(
+        args.sizes, args.backend, args.batch_size, args.load_mode, args.chunk_size, args.seed, args.work_dir,
+        **{name: getattr(args, name) for name in DEFAULT_CARDINALITIES}
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nWrote benchmark results to {args.output}.")
@@ -0,0 +1,105 @@
+# Import necessary libraries
+import os
+import time
+import logging
+from contextlib import contextmanager
+from db import get_connection, override_session_settings
+from schema import schema_registry
+
+# Defer foreign key and unique checks while loading empty main tables; PIPELINE_BULK_SESSION=1 turns it on
+DEFAULT_BULK_SESSION = os.environ.get("PIPELINE_BULK_SESSION", "0").strip().lower() in ("1", "true", "yes", "on")
+
+# Session settings of the connections checked out inside a bulk session
+BULK_SESSION_SETTINGS = {"foreign_key_checks": 0, "unique_checks": 0}
+
+def nonempty_tables(cursor, tables):
+    """
+    Returns the tables that already hold rows.
+    """
+    found = []
+    for table in tables:
+        cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+        if cursor.fetchone() is not None:
+            found.append(table)
+    return found
+
+@contextmanager
+def bulk_session(tables, enabled=True):
+    """
+    Defers foreign key and unique checks for the loads run inside the block: every connection
+    checked out in it skips them. Only used when all tables are empty (initial or full
+    reloads), so nothing loaded earlier can be left unchecked. Yields True when the checks
+    are deferred; run validate_constraints(tables) once the loads are done.
+    """
+    if not enabled:
+        yield False
+        return
+    try:
+        conn = get_connection()
+    except ConnectionError:
+        logging.warning("Could not connect to the database to check the tables; loading without a bulk session.")
+        yield False
+        return
+    cursor = conn.cursor()
+    try:
+        found = nonempty_tables(cursor, tables)
+    finally:
+        cursor.close()
+        conn.close()
+    if found:
+        logging.warning(f"Not using a bulk session: {', '.join(found)} already hold rows.")
+        yield False
+        return
+
+    override_session_settings(BULK_SESSION_SETTINGS)
+    logging.info(f"Bulk session started: foreign key and unique checks deferred for {', '.join(tables)}.")
+    try:
+        yield True
+    finally:
+        override_session_settings({})
+        logging.info("Bulk session ended: foreign key and unique checks re-enabled.")
+
+def validate_constraints(tables):
+    """
+    Checks the constraints a bulk session deferred, with one set-based query per foreign key
+    of the tables (rows whose parent row is missing) and per unique key (values stored more
+    than once). Violations are logged and reported. Returns {constraint name: violating rows}.
+    """
+    try:
+        conn = get_connection()
+    except ConnectionError:
+        logging.error("Could not connect to the database to validate constraints.")
+        print("Error: Could not validate the bulk-loaded tables. Check logs for details.")
+        return {}
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    violations = {}
+    try:
+        for fk in schema_registry.foreign_keys(tables):
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {fk.table} c LEFT JOIN {fk.parent} p ON c.{fk.column} = p.{fk.parent_column} "
+                f"WHERE c.{fk.column} IS NOT NULL AND p.{fk.parent_column} IS NULL"
+            )
+            violations[fk.name] = cursor.fetchone()[0]
+        for table in tables:
+            for key in schema_registry.unique_keys(table):
+                columns = ", ".join(key)
+                # Unique keys allow any number of NULLs
+                not_null = " AND ".join(f"{column} IS NOT NULL" for column in key)
+                cursor.execute(
+                    f"SELECT COALESCE(SUM(copies - 1), 0) FROM (SELECT COUNT(*) AS copies FROM {table} "
+                    f"WHERE {not_null} GROUP BY {columns} HAVING COUNT(*) > 1) duplicates"
+                )
+                violations[f"{table}({columns})"] = int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+        conn.close()
+
+    violations = {name: count for name, count in violations.items() if count}
+    for name, count in violations.items():
+        logging.error(f"Constraint {name} is violated by {count} rows loaded in the bulk session.")
+    if violations:
+        print(f"Error: {sum(violations.values())} rows violate {len(violations)} constraints. Check logs for details.")
+    else:
+        logging.info(f"Validated the foreign and unique keys of {', '.join(tables)} in {time.perf_counter() - start:.2f}s.")
+    return violations
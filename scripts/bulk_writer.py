@@ -0,0 +1,355 @@
+# Import necessary libraries
+import os
+import logging
+from operator import itemgetter
+from mysql.connector import Error as MySQLError
+from infile_loader import LOCAL_INFILE_DISABLED_ERRORS, load_rows_infile, load_warnings
+from schema import NULL_TOKENS, schema_registry
+from quarantine import quarantine
+
+# Rows per INSERT statement; override with the PIPELINE_BATCH_SIZE environment variable
+DEFAULT_BATCH_SIZE = int(os.environ.get("PIPELINE_BATCH_SIZE", 1000))
+
+# Error the server reports for a NULL in a NOT NULL column (ER_BAD_NULL_ERROR)
+BAD_NULL_ERROR = 1048
+
+# Name of the row being inserted in ON DUPLICATE KEY UPDATE assignments (new.column)
+ROW_ALIAS = "new"
+
+# How the fact table loaders write rows: 'insert' (batched INSERT) or 'infile' (LOAD DATA LOCAL INFILE)
+LOAD_MODES = ("insert", "infile")
+DEFAULT_LOAD_MODE = os.environ.get("PIPELINE_LOAD_MODE", "insert")
+
+def null_mask(column):
+    """
+    Returns a boolean mask of the cells in a Series that should be written as NULL.
+    """
+    mask = column.isna()
+    if column.dtype == object:
+        # Only text columns can hold the placeholder strings
+        mask |= column.isin(NULL_TOKENS)
+    return mask.to_numpy()
+
+def normalize_columns(values, keys=()):
+    """
+    Converts each DataFrame column into an object array of native Python values with
+    NULL_TOKENS and NaN replaced by None. Works column by column, so no cell is checked
+    from Python. Columns named in keys only have NaN replaced: they hold lookup keys, and
+    a literal 'Null' can be a lookup value of its own.
+    """
+    columns = []
+    for label, column in values.items():
+        array = column.to_numpy(dtype=object, copy=True)
+        mask = column.isna().to_numpy() if label in keys else null_mask(column)
+        if mask.any():
+            array[mask] = None
+        columns.append(array)
+    return columns
+
+def frame_rows(values, table=None, columns=None, keys=()):
+    """
+    Converts a DataFrame into a list of row tuples ready for the database.
+    Empty strings, 'Null', blanks and NaN values are replaced with None for SQL compatibility,
+    except in the lookup key columns named in keys (see normalize_columns).
+    With a table, values are first coerced to the table's DDL column types (see schema.py);
+    columns names the table column of each frame column when they differ.
+    """
+    if table is not None:
+        values, _ = schema_registry.coerce(values, table, columns)
+    return list(zip(*normalize_columns(values, keys)))
+
+
+class WriteCounts:
+    """
+    What a write did with its rows: inserted, updated in place, unchanged (already stored,
+    left as is) or rejected by the server, plus the warnings the server raised for them.
+    Counts of several batches or chunks add up with +=.
+    """
+
+    FIELDS = ("inserted", "updated", "unchanged", "rejected", "warnings")
+
+    def __init__(self, inserted=0, updated=0, unchanged=0, rejected=0, warnings=0):
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+        self.rejected = rejected
+        self.warnings = warnings
+
+    @property
+    def written(self):
+        """
+        Rows the write inserted or changed.
+        """
+        return self.inserted + self.updated
+
+    def __iadd__(self, other):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"WriteCounts({', '.join(f'{field}={getattr(self, field)}' for field in self.FIELDS)})"
+
+    def __str__(self):
+        text = f"{self.inserted} inserted, {self.updated} updated, {self.unchanged} unchanged, {self.rejected} rejected"
+        return f"{text}, {self.warnings} warnings" if self.warnings else text
+
+def conflict_key(table, columns):
+    """
+    Returns the positions in columns of the first unique key of the table they fully cover
+    (see SchemaRegistry.unique_keys), or None when rows of these columns cannot collide.
+    """
+    names = [column.lower() for column in columns]
+    for key in schema_registry.unique_keys(table):
+        if all(column in names for column in key):
+            return [names.index(column) for column in key]
+    return None
+
+def conflict_clause(table, columns, update=False, qualified=False):
+    """
+    Returns the ON DUPLICATE KEY UPDATE clause of an insert into table. Existing rows are
+    left as they are with a no-op assignment of their key, which, unlike INSERT IGNORE,
+    still fails on values the server cannot store; with update=True they are overwritten
+    from the new row, which the insert must name ROW_ALIAS (VALUES (...) AS new, or a
+    derived table AS new in INSERT ... SELECT). qualified prefixes the assigned columns
+    with the table name, as INSERT ... SELECT over joined tables needs. Empty when the
+    columns hold no unique key.
+    """
+    key = conflict_key(table, columns)
+    if key is None:
+        return ""
+    prefix = f"{table}." if qualified else ""
+    if update:
+        # VALUES(column) here is deprecated since MySQL 8.0.20 and warns on every statement
+        assignments = ", ".join(f"{prefix}{column} = {ROW_ALIAS}.{column}" for column in columns)
+    else:
+        assignments = f"{prefix}{columns[key[0]]} = {prefix}{columns[key[0]]}"
+    return f" ON DUPLICATE KEY UPDATE {assignments}"
+
+def insert_statement(table, columns, update=False, row_count=1):
+    """
+    Builds the INSERT statement for a table, with placeholders for row_count rows. Rows
+    whose unique key already exists are left unchanged, or overwritten in place with
+    update=True (see conflict_clause).
+    """
+    placeholders = f"({', '.join(['%s'] * len(columns))})"
+    values = f"VALUES {', '.join([placeholders] * row_count)}"
+    if update:
+        values += f" AS {ROW_ALIAS}"
+    return f"INSERT INTO {table} ({', '.join(columns)}) {values}{conflict_clause(table, columns, update)}"
+
+def _key_value(values):
+    # Keys compare the way the server's default collation does: case-insensitively
+    return tuple(value.casefold() if isinstance(value, str) else value for value in values)
+
+def existing_keys_query(table, columns, key, rows):
+    """
+    Builds the query returning which keys (column positions from conflict_key) of rows are
+    already stored in table. Returns (statement, params), or None when no row has a full key.
+    """
+    keys = {tuple(row[i] for i in key) for row in rows}
+    keys = [values for values in keys if None not in values]
+    if not keys:
+        return None
+    key_columns = [columns[i] for i in key]
+    if len(key) == 1:
+        condition = f"{key_columns[0]} IN ({', '.join(['%s'] * len(keys))})"
+    else:
+        placeholders = f"({', '.join(['%s'] * len(key))})"
+        condition = f"({', '.join(key_columns)}) IN ({', '.join([placeholders] * len(keys))})"
+    return f"SELECT {', '.join(key_columns)} FROM {table} WHERE {condition}", [value for values in keys for value in values]
+
+def new_row_count(rows, key, existing):
+    """
+    Counts the rows that insert a new key: not among the existing keys (rows returned by
+    existing_keys_query) nor repeated earlier in rows. Rows with a NULL key part never collide.
+    """
+    seen = {_key_value(values) for values in existing}
+    count = 0
+    for row in rows:
+        values = tuple(row[i] for i in key)
+        if None in values:
+            count += 1
+            continue
+        values = _key_value(values)
+        if values not in seen:
+            seen.add(values)
+            count += 1
+    return count
+
+def batch_counts(size, affected, new_rows=None):
+    """
+    Splits the affected-row count of one multi-row upsert of size rows into WriteCounts.
+    The server counts 1 per inserted row, 2 per updated row and 0 per unchanged row
+    (without the FOUND_ROWS client flag). new_rows, the rows with a key not stored yet,
+    tells inserts from updates; without it every affected row is taken as an insert.
+    """
+    affected = max(affected, 0)
+    inserted = min(affected, size if new_rows is None else new_rows)
+    updated = min((affected - inserted) // 2, size - inserted)
+    return WriteCounts(inserted, updated, size - inserted - updated)
+
+def row_counts(affected):
+    """
+    WriteCounts of a single-row upsert from its affected-row count.
+    """
+    return WriteCounts(inserted=int(affected == 1), updated=int(affected == 2), unchanged=int(affected not in (1, 2)))
+
+def warning_count(cursor, table):
+    """
+    Returns the number of warnings the cursor's last statement raised, logging the first
+    few of them once for the whole statement.
+    """
+    count = getattr(cursor, "warning_count", 0) or 0
+    if count:
+        cursor.execute("SHOW WARNINGS LIMIT 3")
+        examples = "; ".join(str(warning[2]) for warning in cursor.fetchall())
+        logging.warning(f"{count} warnings writing {table} (e.g. {examples}).")
+    return count
+
+def reject_null_rows(table, columns, rows, stage="write", sources=None):
+    """
+    Splits off the rows holding NULL in a NOT NULL column of the table (unresolved ids,
+    mostly), which the server would reject and which would send their whole batch down
+    the row-by-row path. They are quarantined per column in one go, with their sources
+    (see insert_rows). Returns (rows to write, their sources, rejected count).
+    """
+    required = []
+    for i, name in enumerate(columns):
+        column = schema_registry.column(table, name)
+        if column is not None and not column.nullable:
+            required.append(i)
+    if not required or not rows:
+        return rows, sources, 0
+    if len(required) == 1:
+        position = required[0]
+        bad = [n for n, row in enumerate(rows) if row[position] is None]
+    else:
+        getter = itemgetter(*required)
+        bad = [n for n, row in enumerate(rows) if None in getter(row)]
+    if not bad:
+        return rows, sources, 0
+
+    by_column = {}
+    for n in bad:
+        column = next(columns[i] for i in required if rows[n][i] is None)
+        by_column.setdefault(column, []).append(n)
+    for column, positions in by_column.items():
+        quarantine.add_many(table, stage, columns, [rows[n] for n in positions],
+                            MySQLError(msg=f"Column '{column}' cannot be null", errno=BAD_NULL_ERROR),
+                            None if sources is None else [sources[n] for n in positions])
+    bad = set(bad)
+    if sources is not None:
+        sources = [source for n, source in enumerate(sources) if n not in bad]
+    return [row for n, row in enumerate(rows) if n not in bad], sources, len(bad)
+
+def insert_rows(cursor, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, update=False, stage="write", sources=None):
+    """
+    Inserts rows into a table in batches using executemany, which sends one multi-row
+    INSERT statement per batch. If a batch fails, its rows are retried one by one so
+    that only the bad rows are rejected; those, and rows with NULL in a NOT NULL column
+    (see reject_null_rows), go to the quarantine tagged with stage, which logs them in aggregate.
+    sources gives the Property_Title of each row's feed record, for rows that do not hold
+    it themselves (the child tables), so their quarantine entries name the record.
+    With update=True existing rows (matched on the table's unique key) are updated instead
+    of left unchanged; each batch then first looks up which of its keys are stored already,
+    so updates can be told apart from inserts in the affected-row count.
+    Returns WriteCounts with the inserted, updated, unchanged and rejected rows.
+    """
+    statement = insert_statement(table, columns, update)
+    key = conflict_key(table, columns) if update else None
+    rows, sources, rejected = reject_null_rows(table, columns, rows, stage, sources)
+    counts = WriteCounts(rejected=rejected)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        new_rows = None
+        if key is not None:
+            query = existing_keys_query(table, columns, key, batch)
+            existing = []
+            if query is not None:
+                cursor.execute(*query)
+                existing = cursor.fetchall()
+            new_rows = new_row_count(batch, key, existing)
+        try:
+            cursor.executemany(statement, batch)
+            written = batch_counts(len(batch), cursor.rowcount, new_rows)
+            written.warnings = warning_count(cursor, table)
+            logging.debug(f"Wrote batch of {len(batch)} rows into {table} (offset {start}): {written}.")
+        except Exception as e:
+            logging.warning(f"Batch insert into {table} failed at offset {start}: {e}. Retrying row by row.")
+            # Isolate the bad rows so the rest of the batch still lands
+            written = WriteCounts()
+            for n, row in enumerate(batch, start):
+                try:
+                    cursor.execute(statement, row)
+                    written += row_counts(cursor.rowcount)
+                    written.warnings += getattr(cursor, "warning_count", 0) or 0
+                except Exception as row_error:
+                    written.rejected += 1
+                    quarantine.add(table, stage, columns, row, row_error, None if sources is None else sources[n])
+            logging.warning(f"Batch at offset {start} for {table}: {written.rejected} of {len(batch)} rows rejected.")
+        counts += written
+    if counts.rejected:
+        quarantine.flush()
+    return counts
+
+def infile_rows(cursor, table, columns, rows):
+    """
+    Loads rows with LOAD DATA LOCAL INFILE under a savepoint. LOAD DATA LOCAL coerces or
+    skips bad values with a warning where an INSERT would fail, so when the server reports
+    any warning besides skipped duplicate keys the load is rolled back, and the rows are
+    left to the batched insert path, which rejects and quarantines just the bad ones.
+    Returns WriteCounts (duplicates count as unchanged, as with INSERT), or None when the
+    rows still have to be written: LOCAL INFILE is not allowed, or the load was rolled back.
+    """
+    cursor.execute("SAVEPOINT infile_load")
+    try:
+        loaded = load_rows_infile(cursor, table, columns, rows)
+        # Rows LOAD DATA did not load were skipped as duplicate keys, unless other warnings say otherwise
+        duplicates = len(rows) - loaded
+        problems, examples = load_warnings(cursor, duplicates)
+    except MySQLError as e:
+        if e.errno not in LOCAL_INFILE_DISABLED_ERRORS:
+            raise
+        logging.warning(f"LOCAL INFILE is not allowed for {table} ({e}); falling back to batched inserts.")
+        problems = None
+    if problems is None or problems:
+        cursor.execute("ROLLBACK TO SAVEPOINT infile_load")
+        cursor.execute("RELEASE SAVEPOINT infile_load")
+        if problems is not None:
+            example = f", e.g. {examples[0][2]}" if examples else ""
+            logging.warning(f"LOAD DATA coerced or skipped rows of {table} ({problems} warnings{example}); "
+                            "writing them with batched inserts instead.")
+        return None
+    cursor.execute("RELEASE SAVEPOINT infile_load")
+    return WriteCounts(inserted=loaded, unchanged=duplicates)
+
+def write_rows(cursor, table, columns, rows, load_mode=DEFAULT_LOAD_MODE, batch_size=DEFAULT_BATCH_SIZE, update=False,
+               stage="write", sources=None):
+    """
+    Writes rows using the requested load mode. The 'infile' mode falls back to
+    batched inserts when the server or client does not allow LOAD DATA LOCAL INFILE,
+    or when LOAD DATA reports coerced or skipped rows (see infile_rows), so both modes
+    reject and quarantine the same rows.
+    Updates (update=True) always use batched inserts, since LOAD DATA ... REPLACE would
+    delete and re-create rows and cascade the delete to their child tables.
+    Rows with NULL in a NOT NULL column are quarantined up front in either mode; sources
+    names the feed record of each row, as in insert_rows. Returns WriteCounts.
+    """
+    if load_mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode '{load_mode}'; expected one of {LOAD_MODES}")
+
+    if load_mode == "infile" and not update:
+        valid, sources, rejected = reject_null_rows(table, columns, rows, stage, sources)
+        counts = infile_rows(cursor, table, columns, valid)
+        if counts is None:
+            counts = insert_rows(cursor, table, columns, valid, batch_size, update, stage, sources)
+        counts.rejected += rejected
+        if rejected:
+            quarantine.flush()
+        return counts
+
+    return insert_rows(cursor, table, columns, rows, batch_size, update, stage, sources)
@@ -0,0 +1,170 @@
+# Import necessary libraries
+import os
+import logging
+from db import get_connection
+from bulk_writer import insert_statement
+
+# Resume interrupted main table loads from their last committed chunk; PIPELINE_RESUME=0 turns it off
+DEFAULT_RESUME = os.environ.get("PIPELINE_RESUME", "1").strip().lower() in ("1", "true", "yes", "on")
+
+# Tracking table holding the last committed chunk of every main table per feed file
+CHECKPOINT_TABLE = "load_checkpoint"
+
+CHECKPOINT_COLUMNS = [
+    "table_name", "source_file", "source_size", "source_mtime", "chunk_size", "last_chunk", "rows_loaded", "completed"
+]
+
+def source_stamp(dataset):
+    """
+    Returns (source_file, source_size, source_mtime, chunk_size), which identifies the chunks
+    of a dataset read from a feed file, or None for datasets that are not backed by a file.
+    """
+    source = getattr(dataset, "source", None)
+    if not isinstance(source, str) or not os.path.isfile(source):
+        return None
+    stat = os.stat(source)
+    return (os.path.abspath(source), stat.st_size, stat.st_mtime_ns, getattr(dataset, "chunk_size", None) or 0)
+
+
+class LoadCheckpoint:
+    """
+    Progress of one table's load of one feed file. Loaders commit every chunk together with
+    its checkpoint row, so a rerun after a failure skips the chunks that already landed.
+    A table never gets ahead of its parent table's checkpoint (limit): chunks whose parent
+    rows are missing are left for the rerun. A checkpoint without a stamp (resume off, or
+    no feed file) records nothing.
+    """
+
+    def __init__(self, table, stamp=None, last_chunk=-1, rows_loaded=0, completed=False, limit=None):
+        self.table = table
+        self.stamp = stamp
+        self.last_chunk = last_chunk
+        self.rows_loaded = rows_loaded
+        self.completed = completed
+        self.limit = limit
+        self.stopped = False
+
+    def chunks(self, dataset):
+        """
+        Yields (chunk index, chunk) for the chunks this load still has to commit.
+        """
+        if self.completed:
+            return
+        for chunk_index, chunk in enumerate(dataset.iter_chunks()):
+            if chunk_index <= self.last_chunk:
+                continue
+            if self.limit is not None and chunk_index > self.limit:
+                self.stopped = True
+                logging.warning(
+                    f"Stopping {self.table} after chunk {self.limit}: its parent table's load is incomplete; "
+                    "a rerun resumes both."
+                )
+                return
+            yield chunk_index, chunk
+
+    def save(self, cursor, chunk_index, rows):
+        """
+        Records a chunk as loaded; must run in the chunk's transaction, before its commit.
+        """
+        self.last_chunk = chunk_index
+        self.rows_loaded += rows
+        self._write(cursor)
+
+    def finish(self, cursor):
+        """
+        Marks the table's load of the file as complete, unless it stopped at its parent's
+        checkpoint; commit afterwards.
+        """
+        if self.stopped:
+            return
+        self.completed = True
+        self._write(cursor)
+
+    def _write(self, cursor):
+        if self.stamp is None:
+            return
+        cursor.execute(
+            insert_statement(CHECKPOINT_TABLE, CHECKPOINT_COLUMNS, update=True),
+            (self.table, *self.stamp, self.last_chunk, self.rows_loaded, int(self.completed))
+        )
+
+
+def _read_checkpoint(cursor, table, stamp):
+    # (last_chunk, rows_loaded, completed) of the table's checkpoint for this version of the file
+    cursor.execute(
+        f"SELECT source_size, source_mtime, chunk_size, last_chunk, rows_loaded, completed FROM {CHECKPOINT_TABLE} "
+        "WHERE table_name = %s AND source_file = %s",
+        (table, stamp[0])
+    )
+    row = cursor.fetchone()
+    if row is None or tuple(row[:3]) != stamp[1:]:
+        return None
+    return row[3:]
+
+def open_checkpoint(cursor, table, dataset, resume=True, parent=None):
+    """
+    Returns the table's checkpoint for a dataset, positioned after the last chunk an earlier
+    load of the same file (same size, modification time and chunk size) committed, and
+    limited to the chunks the parent table has committed when the parent's load is incomplete.
+    """
+    stamp = source_stamp(dataset) if resume else None
+    if stamp is None:
+        return LoadCheckpoint(table)
+
+    limit = None
+    if parent is not None:
+        parent_state = _read_checkpoint(cursor, parent, stamp)
+        if parent_state is None or not parent_state[2]:
+            limit = parent_state[0] if parent_state is not None else -1
+
+    state = _read_checkpoint(cursor, table, stamp)
+    if state is None:
+        return LoadCheckpoint(table, stamp, limit=limit)
+    last_chunk, rows_loaded, completed = state
+    if completed:
+        logging.info(f"Skipping {table}: its load of {stamp[0]} already completed ({rows_loaded} rows).")
+    else:
+        logging.info(f"Resuming {table} load of {stamp[0]} after chunk {last_chunk} ({rows_loaded} rows already committed).")
+    return LoadCheckpoint(table, stamp, last_chunk, rows_loaded, bool(completed), limit)
+
+def prepare_checkpoints(dataset, tables):
+    """
+    Readies the checkpoints before a main table load. Checkpoints of another version of the
+    feed file are dropped, and so are those of a load that completed every table, so an
+    unchanged file is loaded from the start again. Returns False when loads cannot resume
+    (no feed file, or the checkpoint table is missing).
+    """
+    stamp = source_stamp(dataset)
+    if stamp is None:
+        return False
+    try:
+        conn = get_connection()
+    except ConnectionError:
+        logging.warning("Could not connect to the database to read load checkpoints; loading without them.")
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT table_name, source_size, source_mtime, chunk_size, completed FROM {CHECKPOINT_TABLE} WHERE source_file = %s",
+            (stamp[0],)
+        )
+        current = {row[0]: row[4] for row in cursor.fetchall() if tuple(row[1:4]) == stamp[1:]}
+        if current and all(current.get(table) for table in tables):
+            cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE source_file = %s", (stamp[0],))
+            logging.info(f"Previous load of {stamp[0]} completed; starting from the first chunk.")
+        else:
+            cursor.execute(
+                f"DELETE FROM {CHECKPOINT_TABLE} WHERE source_file = %s "
+                "AND NOT (source_size = %s AND source_mtime = %s AND chunk_size = %s)",
+                stamp
+            )
+            if current:
+                logging.info(f"Resuming interrupted load of {stamp[0]} ({len(current)} tables have checkpoints).")
+        conn.commit()
+        return True
+    except Exception as e:
+        logging.warning(f"Could not read {CHECKPOINT_TABLE}; loading without checkpoints: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,235 @@
+# Import necessary libraries
+import os
+import json
+import shutil
+import logging
+import pandas as pd
+from collections import defaultdict
+from dataset import TABLE_COLUMNS, NESTED_SECTIONS, open_dataset
+
+# pyarrow is only needed when the columnar store is used
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Directory of the columnar store; PIPELINE_COLUMNAR_DIR='' (the default) loads straight from JSON
+DEFAULT_COLUMNAR_DIR = os.environ.get("PIPELINE_COLUMNAR_DIR", "")
+
+# Bumped whenever the file layout changes, so older stores are rebuilt
+STORE_VERSION = 2
+
+# Field metadata marking a column stored as one JSON text per value
+ENCODING_KEY = b"encoding"
+JSON_ENCODING = b"json"
+
+MANIFEST_FILE = "manifest.json"
+
+# Top-level feed columns kept in each part's records file: every column a table loader reads
+RECORD_COLUMNS = list(dict.fromkeys(column for columns in TABLE_COLUMNS.values() for column in columns))
+
+# Child rows carry the position of their record within the part, so records can be rebuilt
+RECORD_INDEX = "_record"
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The columnar store needs pyarrow; install it with 'pip install pyarrow'.")
+
+def _json_default(value):
+    # numpy scalars are not JSON types
+    return value.item() if hasattr(value, "item") else str(value)
+
+def _to_arrow(frame):
+    # Feed columns mixing types (e.g. Taxes holding numbers and '') are stored as one JSON text
+    # per value, so reading them back gives each value its original type
+    arrays = []
+    fields = []
+    for column in frame.columns:
+        values = frame[column]
+        try:
+            array = pa.array(values, from_pandas=True)
+            fields.append(pa.field(str(column), array.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = pa.array(
+                [None if value is None else json.dumps(value, default=_json_default)
+                 for value in values.astype(object).where(values.notna(), None)],
+                type=pa.string()
+            )
+            fields.append(pa.field(str(column), pa.string(), metadata={ENCODING_KEY: JSON_ENCODING}))
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+def _json_columns(table):
+    return [field.name for field in table.schema if (field.metadata or {}).get(ENCODING_KEY) == JSON_ENCODING]
+
+def _to_frame(table):
+    # DataFrame of an Arrow table with its JSON-encoded columns decoded
+    frame = table.to_pandas()
+    for column in _json_columns(table):
+        frame[column] = pd.Series(
+            [None if value is None else json.loads(value) for value in frame[column]], index=frame.index, dtype=object
+        )
+    return frame
+
+def _to_records(table):
+    # Rows of an Arrow table as dicts, with its JSON-encoded columns decoded
+    records = table.to_pylist()
+    for column in _json_columns(table):
+        for record in records:
+            if record[column] is not None:
+                record[column] = json.loads(record[column])
+    return records
+
+def _write_table(table, path):
+    # Uncompressed Arrow IPC files can be memory-mapped and read without copying
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def _read_table(path, columns=None):
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns is not None else table
+
+def _source_stamp(source):
+    # Identifies the exact feed file a store was built from
+    stat = os.stat(source)
+    return {"source": os.path.abspath(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class StoreChunk:
+    """
+    One part of the columnar store, used by the loaders like a PropertyDataset chunk.
+    Each table_frame call reads only the columns that table needs from the memory-mapped files.
+    """
+
+    def __init__(self, part_dir, source):
+        self.part_dir = part_dir
+        self.source = source
+
+    def _path(self, name):
+        return os.path.join(self.part_dir, f"{name}.arrow")
+
+    def __len__(self):
+        return _read_table(self._path("records"), ["Property_Title"]).num_rows
+
+    def table_frame(self, table):
+        """
+        Returns the columns a table loader needs as a DataFrame; nested sections come back
+        exploded, one row per detail entry, like PropertyDataset.table_frame.
+        """
+        if table in NESTED_SECTIONS:
+            _, fields = NESTED_SECTIONS[table]
+            return _to_frame(_read_table(self._path(table), ["Property_Title"] + fields))
+        return _to_frame(_read_table(self._path("records"), TABLE_COLUMNS[table]))
+
+    def titles(self):
+        """
+        Returns the stripped property titles of the records in this part.
+        """
+        titles = _to_frame(_read_table(self._path("records"), ["Property_Title"]))["Property_Title"]
+        return [title.strip() for title in titles if isinstance(title, str)]
+
+    def iter_records(self):
+        """
+        Rebuilds the part's feed records (loader columns plus the nested arrays) as dicts.
+        """
+        records = _to_records(_read_table(self._path("records")))
+        for table, (key, fields) in NESTED_SECTIONS.items():
+            details = defaultdict(list)
+            for row in _to_records(_read_table(self._path(table), [RECORD_INDEX] + fields)):
+                details[row.pop(RECORD_INDEX)].append(row)
+            for position, record in enumerate(records):
+                record[key] = details.get(position, [])
+        return iter(records)
+
+
+class ColumnarDataset:
+    """
+    Property feed normalized into Arrow files: per part, a records file with the top-level
+    columns and one file per exploded child table (rehab, valuation, hoa). Loaders read
+    it like any other dataset; building it once lets later runs and re-run stages skip
+    JSON parsing.
+    """
+
+    def __init__(self, store_dir, manifest):
+        self.store_dir = store_dir
+        self.manifest = manifest
+        self.source = manifest.get("source") or store_dir
+        self.chunk_size = manifest.get("chunk_size")
+
+    def __len__(self):
+        return self.manifest["records"]
+
+    def iter_chunks(self):
+        for part in self.manifest["parts"]:
+            yield StoreChunk(os.path.join(self.store_dir, part), self.source)
+
+    def iter_records(self):
+        for chunk in self.iter_chunks():
+            yield from chunk.iter_records()
+
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_store(source, store_dir, chunk_size=None):
+    """
+    Normalizes a feed (file path or dataset) into the columnar store at store_dir, one part
+    per chunk, and returns it as a ColumnarDataset. An existing store there is replaced.
+    """
+    _require_pyarrow()
+    dataset = open_dataset(source, chunk_size)
+    if os.path.isdir(store_dir):
+        shutil.rmtree(store_dir)
+    os.makedirs(store_dir)
+
+    parts = []
+    record_count = 0
+    for chunk in dataset.iter_chunks():
+        part = f"part-{len(parts):05d}"
+        part_dir = os.path.join(store_dir, part)
+        os.makedirs(part_dir)
+        records = chunk.columns_frame(RECORD_COLUMNS)
+        _write_table(_to_arrow(records), os.path.join(part_dir, "records.arrow"))
+        for table in NESTED_SECTIONS:
+            child_rows = chunk.table_frame(table, record_index=True)
+            _write_table(_to_arrow(child_rows), os.path.join(part_dir, f"{table}.arrow"))
+        parts.append(part)
+        record_count += len(records)
+
+    manifest = {
+        "version": STORE_VERSION,
+        "chunk_size": chunk_size,
+        "records": record_count,
+        "parts": parts,
+        **(_source_stamp(source) if isinstance(source, str) else {"source": None}),
+    }
+    # The manifest is written last, so an interrupted build is never mistaken for a complete store
+    with open(os.path.join(store_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    logging.info(f"Built columnar store in {store_dir}: {record_count} records in {len(parts)} parts.")
+    return ColumnarDataset(store_dir, manifest)
+
+def open_store(source, store_dir=DEFAULT_COLUMNAR_DIR, chunk_size=None):
+    """
+    Returns the columnar store for a feed file, reusing the one in store_dir when it was
+    built from the same file (path, size and modification time) with the same chunk size,
+    and building it otherwise. Datasets that are not files are always rebuilt.
+    """
+    _require_pyarrow()
+    manifest = _read_manifest(store_dir)
+    if (
+        manifest is not None
+        and isinstance(source, str)
+        and manifest.get("version") == STORE_VERSION
+        and manifest.get("chunk_size") == chunk_size
+        and {key: manifest.get(key) for key in ("source", "size", "mtime_ns")} == _source_stamp(source)
+    ):
+        logging.info(f"Reusing columnar store in {store_dir} for {source}; skipping JSON parsing.")
+        return ColumnarDataset(store_dir, manifest)
+    return build_store(source, store_dir, chunk_size)
@@ -0,0 +1,168 @@
+# Import necessary libraries
+import os
+import logging
+import numpy as np
+import pandas as pd
+from itertools import chain
+from extraction import extract_json, iter_json_records, iter_json_chunks
+
+# Records per chunk when streaming; 0 or unset parses the whole file into memory
+DEFAULT_CHUNK_SIZE = int(os.environ.get("PIPELINE_CHUNK_SIZE", 0)) or None
+
+# Columns each main table loader reads from the top level of a feed record
+TABLE_COLUMNS = {
+    "leads": [
+        "Property_Title", "Reviewed_Status", "Most_Recent_Status", "Source", "Occupancy",
+        "Net_Yield", "IRR", "Selling_Reason", "Seller_Retained_Broker", "Final_Reviewer"
+    ],
+    "property": [
+        "Property_Title", "Street_Address", "City", "State", "Zip", "Market", "Flood",
+        "Property_Type", "Highway", "Train", "Tax_Rate", "SQFT_Basement", "HTW", "Pool",
+        "Commercial", "Water", "Sewage", "Year_Built", "SQFT_MU", "SQFT_Total", "Parking",
+        "Bed", "Bath", "BasementYesNo", "Layout", "Rent_Restricted", "Neighborhood_Rating",
+        "Latitude", "Longitude", "Subdivision", "School_Average"
+    ],
+    "taxes": ["Property_Title", "Taxes"],
+}
+
+# Nested arrays exploded into child tables: table → (record key, detail fields).
+# A new nested section only needs an entry here; flatten_nested handles any key.
+NESTED_SECTIONS = {
+    "rehab": ("Rehab", [
+        "Underwriting_Rehab", "Rehab_Calculation", "Paint", "Flooring_Flag", "Foundation_Flag",
+        "Roof_Flag", "HVAC_Flag", "Kitchen_Flag", "Bathroom_Flag", "Appliances_Flag",
+        "Windows_Flag", "Landscaping_Flag", "Trashout_Flag"
+    ]),
+    "valuation": ("Valuation", [
+        "Previous_Rent", "List_Price", "Zestimate", "ARV", "Expected_Rent",
+        "Rent_Zestimate", "Low_FMR", "High_FMR", "Redfin_Value"
+    ]),
+    "hoa": ("HOA", ["HOA", "HOA_Flag"]),
+}
+
+def flatten_nested(records, key, fields, parent_fields=("Property_Title",)):
+    """
+    Explodes the nested array under key into one row per entry with the given fields,
+    prefixed by the parent record's parent_fields and followed by a _record column holding
+    the parent's position. Works for any nested section listed in NESTED_SECTIONS.
+    """
+    # One lookup per record for the nested list; entries are concatenated and converted to
+    # columns by pandas, without a Python-level lookup per field
+    nested = [record.get(key) or () for record in records]
+    counts = np.fromiter(map(len, nested), dtype=np.int64, count=len(nested))
+    positions = np.repeat(np.arange(len(nested)), counts)
+    frame = pd.DataFrame(list(chain.from_iterable(nested)), columns=list(fields))
+    for position, field in enumerate(parent_fields):
+        parent_values = np.empty(len(records), dtype=object)
+        parent_values[:] = [record.get(field) for record in records]
+        frame.insert(position, field, parent_values[positions])
+    frame["_record"] = positions
+    return frame
+
+
+class PropertyDataset:
+    """
+    Parsed property feed shared by every loader in a pipeline run.
+    The JSON is parsed once; loaders ask for the projection of the table they load.
+    """
+
+    def __init__(self, records, source=None, chunk_size=None):
+        self.records = records
+        self.source = source
+        self.chunk_size = chunk_size
+        self._frame = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def iter_records(self):
+        return iter(self.records)
+
+    def iter_chunks(self):
+        """
+        Yields the dataset in chunks of chunk_size records, or as a single chunk if no size is set.
+        """
+        if not self.chunk_size or len(self.records) <= self.chunk_size:
+            yield self
+            return
+        for start in range(0, len(self.records), self.chunk_size):
+            yield PropertyDataset(self.records[start:start + self.chunk_size], self.source)
+
+    def titles(self):
+        """
+        Returns the stripped property titles of the records in this dataset.
+        """
+        return [
+            record["Property_Title"].strip()
+            for record in self.records
+            if isinstance(record.get("Property_Title"), str)
+        ]
+
+    def _flat_frame(self):
+        # Build the top-level DataFrame once, without the nested arrays
+        if self._frame is None:
+            nested_keys = {key for key, _ in NESTED_SECTIONS.values()}
+            self._frame = pd.DataFrame(self.records)
+            self._frame = self._frame.drop(columns=[c for c in nested_keys if c in self._frame.columns])
+            logging.info(f"Built DataFrame with {len(self._frame)} records from {self.source}")
+        return self._frame
+
+    def table_frame(self, table, record_index=False):
+        """
+        Returns a private copy of the columns a table loader needs.
+        Nested sections (rehab, valuation, hoa) are returned exploded, one row per detail entry;
+        record_index adds a _record column with the position of each entry's parent record.
+        """
+        if table in NESTED_SECTIONS:
+            return self._child_frame(table, record_index)
+        return self._flat_frame()[TABLE_COLUMNS[table]].copy()
+
+    def columns_frame(self, columns):
+        """
+        Returns the given top-level columns as a DataFrame; columns missing from the feed are empty.
+        """
+        return self._flat_frame().reindex(columns=columns)
+
+    def _child_frame(self, table, record_index=False):
+        key, fields = NESTED_SECTIONS[table]
+        frame = flatten_nested(self.records, key, fields)
+        return frame if record_index else frame.drop(columns=["_record"])
+
+
+class StreamingDataset:
+    """
+    Property feed streamed from a JSON array or JSON Lines file.
+    Only one chunk of records is held in memory at a time; each pass re-reads the file.
+    """
+
+    def __init__(self, file_path, chunk_size):
+        self.source = file_path
+        self.chunk_size = chunk_size
+
+    def iter_records(self):
+        return iter_json_records(self.source)
+
+    def iter_chunks(self):
+        chunk_count = 0
+        for records in iter_json_chunks(self.source, self.chunk_size):
+            chunk_count += 1
+            logging.debug(f"Streaming chunk {chunk_count} ({len(records)} records) from {self.source}")
+            yield PropertyDataset(records, self.source)
+
+
+def open_dataset(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Returns a dataset for a JSON file path, or the dataset itself if one is passed in.
+    With a chunk_size the file is streamed chunk by chunk instead of parsed whole.
+    """
+    if hasattr(source, "iter_chunks"):
+        # Already a dataset (in memory, streamed or columnar)
+        return source
+    if chunk_size:
+        logging.info(f"Streaming {source} in chunks of {chunk_size} records.")
+        return StreamingDataset(source, chunk_size)
+    records = extract_json(source)
+    if records is None:
+        raise ValueError(f"No records could be extracted from {source}")
+    logging.info(f"Parsed {len(records)} records from {source} into a shared dataset.")
+    return PropertyDataset(records, source)
@@ -1,19 +1,189 @@
-# Import necessary libraries
-import mysql.connector
-import logging
-
-# Function to get a database connection
-def get_connection():
-    try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            port=3306,
-            user="db_user",
-            password="6equj5_db_user",
-            database="home_db"
-        )
-        logging.info("Database connection established successfully.")
-        return connection
-    except mysql.connector.Error as err:
-        logging.error(f"Database connection failed: {err}")
-        print("Error: Could not connect to the database. Check logs for details.")
+# Import necessary libraries
+import os
+import time
+import logging
+import threading
+import configparser
+import mysql.connector
+from mysql.connector import pooling
+import sqlite_backend
+from metrics import instrument_connection
+
+# Connection settings; each can be overridden in the config file or with a PIPELINE_DB_<NAME> environment variable
+DEFAULT_DB_CONFIG = {
+    "backend": "mysql",    # 'mysql', or 'sqlite' for the stand-in backend used by benchmarks
+    "sqlite_path": "home_db.sqlite",
+    "host": "localhost",
+    "port": 3306,
+    "user": "db_user",
+    "password": "6equj5_db_user",
+    "database": "home_db",
+    "pool_size": 8,        # connections shared by all loaders (mysql-connector allows up to 32)
+    "use_pure": False,     # use the C extension when it is installed
+    # Session settings applied to every checked-out connection; unset leaves the server default
+    "unique_checks": None,
+    "foreign_key_checks": None,
+    "sql_log_bin": None,
+}
+INT_SETTINGS = ("port", "pool_size")
+BOOL_SETTINGS = ("use_pure",)
+SESSION_SETTINGS = ("unique_checks", "foreign_key_checks", "sql_log_bin")
+
+# Optional INI file with a [mysql] section; environment variables take precedence over it
+DB_CONFIG_PATH = os.environ.get("PIPELINE_DB_CONFIG", "db.ini")
+
+# How long a loader waits for a free pooled connection before giving up
+POOL_WAIT_SECONDS = 30
+
+_pool = None
+_config = None
+_pool_lock = threading.Lock()
+
+# Session settings applied on top of the configured ones while a bulk session is open (see bulk_session.py)
+_session_overrides = {}
+
+def _parse_setting(name, value):
+    if value is None or value == "":
+        return DEFAULT_DB_CONFIG[name] if name not in SESSION_SETTINGS else None
+    if name in INT_SETTINGS:
+        return int(value)
+    if name in BOOL_SETTINGS:
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "on")
+    if name in SESSION_SETTINGS:
+        return 1 if str(value).strip().lower() in ("1", "true", "yes", "on") else 0
+    return value
+
+def load_db_config(path=DB_CONFIG_PATH):
+    """
+    Builds the connection settings from the defaults, the [mysql] section of the config
+    file (if it exists) and PIPELINE_DB_* environment variables, in that order.
+    """
+    config = dict(DEFAULT_DB_CONFIG)
+    if path and os.path.exists(path):
+        parser = configparser.ConfigParser()
+        parser.read(path)
+        if parser.has_section("mysql"):
+            for name, value in parser.items("mysql"):
+                if name in config:
+                    config[name] = _parse_setting(name, value)
+            logging.info(f"Read database settings from {path}.")
+    for name in config:
+        value = os.environ.get(f"PIPELINE_DB_{name.upper()}")
+        if value is not None:
+            config[name] = _parse_setting(name, value)
+    return config
+
+def get_db_config():
+    """
+    Returns the connection settings in use, loading them on first use.
+    """
+    global _config
+    with _pool_lock:
+        if _config is None:
+            _config = load_db_config()
+        return _config
+
+def configure(**overrides):
+    """
+    Overrides connection settings for the rest of the process (e.g. backend='sqlite')
+    and drops the current pool so the next connection uses them.
+    """
+    global _pool, _config
+    config = dict(get_db_config())
+    config.update(overrides)
+    with _pool_lock:
+        _config = config
+        _pool = None
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    config = get_db_config()
+    with _pool_lock:
+        if _pool is None:
+            pool_size = max(1, min(config["pool_size"], pooling.CNX_POOL_MAXSIZE))
+            _pool = pooling.MySQLConnectionPool(
+                pool_name="pipeline",
+                pool_size=pool_size,
+                pool_reset_session=True,  # session settings do not leak between loaders
+                host=config["host"],
+                port=config["port"],
+                user=config["user"],
+                password=config["password"],
+                database=config["database"],
+                use_pure=config["use_pure"],
+                autocommit=False,
+                allow_local_infile=True  # needed by the LOAD DATA LOCAL INFILE load mode
+            )
+            _pool.session_settings = {name: config[name] for name in SESSION_SETTINGS}
+            logging.info(
+                f"Created connection pool with {pool_size} connections to "
+                f"{config['host']}:{config['port']}/{config['database']}."
+            )
+        return _pool
+
+def apply_session_settings(connection, settings):
+    """
+    Applies bulk-load session settings (unique_checks, foreign_key_checks, sql_log_bin)
+    to a connection. Settings left as None are not touched.
+    """
+    cursor = connection.cursor()
+    try:
+        for name in SESSION_SETTINGS:
+            value = settings.get(name)
+            if value is None:
+                continue
+            try:
+                cursor.execute(f"SET SESSION {name} = {int(value)}")
+            except mysql.connector.Error as err:
+                # sql_log_bin needs elevated privileges; the load can still go ahead without it
+                logging.warning(f"Could not set {name}={value} for this session: {err}")
+    finally:
+        cursor.close()
+
+def override_session_settings(settings):
+    """
+    Applies session settings (e.g. foreign_key_checks=0) to every connection checked out from
+    now on, on top of the configured ones; an empty dict goes back to the configured settings.
+    Pooled connections are reset when returned, so the overrides end with the connection.
+    """
+    global _session_overrides
+    unknown = set(settings) - set(SESSION_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown session settings: {', '.join(sorted(unknown))}")
+    with _pool_lock:
+        _session_overrides = dict(settings)
+
+def _checkout(pool):
+    # Wait for a free connection when every pooled connection is in use by other loaders
+    deadline = time.monotonic() + POOL_WAIT_SECONDS
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+# Function to get a database connection
+def get_connection():
+    """
+    Checks a connection out of the shared pool. Closing it returns it to the pool.
+    With the 'sqlite' backend a connection to the stand-in database is opened instead.
+    Raises ConnectionError (after logging the error) if no connection can be made.
+    """
+    try:
+        config = get_db_config()
+        if config["backend"] == "sqlite":
+            return instrument_connection(sqlite_backend.connect(config["sqlite_path"]))
+        pool = get_pool()
+        connection = _checkout(pool)
+        apply_session_settings(connection, {**pool.session_settings, **_session_overrides})
+        logging.info("Database connection established successfully.")
+        # Wrapped so every query and commit is counted as a round trip in the run metrics
+        return instrument_connection(connection)
+    except mysql.connector.Error as err:
+        logging.error(f"Database connection failed: {err}")
+        raise ConnectionError(f"Could not connect to the database: {err}") from err
@@ -0,0 +1,204 @@
+# Import necessary libraries
+import os
+import json
+import hashlib
+import logging
+from db import get_connection
+from bulk_writer import insert_rows
+from dataset import PropertyDataset, open_dataset
+
+# Load only new or changed properties; PIPELINE_INCREMENTAL=1 makes it the default for pipeline runs
+DEFAULT_INCREMENTAL = os.environ.get("PIPELINE_INCREMENTAL", "0").strip().lower() in ("1", "true", "yes", "on")
+
+# Tracking table holding the content hash of every loaded feed record
+FINGERPRINT_TABLE = "property_fingerprint"
+
+# Child tables of a changed property are deleted and reloaded, since they have no natural key
+CHILD_TABLES = ["taxes", "rehab", "valuation", "hoa"]
+
+# Titles per IN (...) list when deleting children or checking loaded properties
+TITLE_BATCH_SIZE = 1000
+
+def record_fingerprint(record):
+    """
+    Returns a SHA-256 hash of a feed record, independent of key order.
+    """
+    payload = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def record_title(record):
+    title = record.get("Property_Title")
+    return title.strip() if isinstance(title, str) else None
+
+
+class DeltaDataset:
+    """
+    The new and changed records of a feed, filtered out of the source dataset on every pass:
+    records whose title is selected, plus untitled ones. Only the selected titles are held
+    in memory, so a streamed feed stays streamed; chunks hold chunk_size selected records.
+    """
+
+    def __init__(self, dataset, titles, record_count, chunk_size=None):
+        self.dataset = dataset
+        self.source = dataset.source
+        self.selected = titles
+        self.record_count = record_count
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return self.record_count
+
+    def iter_records(self):
+        for record in self.dataset.iter_records():
+            title = record_title(record)
+            if title is None or title in self.selected:
+                yield record
+
+    def iter_chunks(self):
+        """
+        Yields the selected records in chunks of chunk_size, or as a single chunk if no size is set.
+        """
+        if not self.chunk_size:
+            yield PropertyDataset(list(self.iter_records()), self.source)
+            return
+        records = []
+        for record in self.iter_records():
+            records.append(record)
+            if len(records) == self.chunk_size:
+                yield PropertyDataset(records, self.source)
+                records = []
+        if records:
+            yield PropertyDataset(records, self.source)
+
+
+class DeltaPlan:
+    """
+    The part of a feed that needs loading: new and changed records, the titles of the
+    changed ones (whose child rows are replaced) and the fingerprints to store afterwards.
+    """
+
+    def __init__(self, dataset, changed_titles, fingerprints, unchanged_count):
+        self.dataset = dataset
+        self.changed_titles = changed_titles
+        self.fingerprints = fingerprints
+        self.unchanged_count = unchanged_count
+
+    def __len__(self):
+        return len(self.dataset)
+
+
+def _title_batches(titles):
+    titles = list(titles)
+    for start in range(0, len(titles), TITLE_BATCH_SIZE):
+        batch = titles[start:start + TITLE_BATCH_SIZE]
+        yield batch, ", ".join(["%s"] * len(batch))
+
+def plan_delta(source, chunk_size=None):
+    """
+    Compares every feed record's fingerprint with the tracking table and keeps only
+    records that are new or changed. Fingerprints only count while their property row
+    still exists, so deleted or truncated properties are loaded again. A stored property
+    without a fingerprint (loaded by a full run, or by a run that failed) counts as
+    changed, so its child rows are replaced rather than added a second time.
+    The returned plan's dataset re-reads the source on every pass, keeping only the
+    selected titles and their fingerprints in memory, and is chunked by chunk_size.
+    """
+    dataset = open_dataset(source)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # Every stored property, with its fingerprint or NULL
+        cursor.execute(
+            f"SELECT p.property_title, f.content_hash FROM property p "
+            f"LEFT JOIN {FINGERPRINT_TABLE} f ON f.property_title = p.property_title"
+        )
+        known = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+    logging.info(
+        f"Fetched {len(known)} stored properties, {sum(digest is not None for digest in known.values())} "
+        f"with fingerprints in {FINGERPRINT_TABLE}."
+    )
+
+    record_count = 0
+    changed_titles = set()
+    fingerprints = {}
+    unchanged_count = 0
+    for record in dataset.iter_records():
+        title = record_title(record)
+        if title is None:
+            # Untitled records cannot be tracked; they go through the normal load (and its error handling)
+            record_count += 1
+            continue
+        digest = record_fingerprint(record)
+        if title in known:
+            if known[title] == digest:
+                unchanged_count += 1
+                continue
+            changed_titles.add(title)
+        fingerprints[title] = digest
+        record_count += 1
+
+    logging.info(
+        f"Incremental plan for {dataset.source}: {record_count - len(changed_titles)} new, "
+        f"{len(changed_titles)} changed, {unchanged_count} unchanged records."
+    )
+    delta = DeltaDataset(dataset, fingerprints.keys(), record_count, chunk_size)
+    return DeltaPlan(delta, changed_titles, fingerprints, unchanged_count)
+
+def remove_changed_children(plan):
+    """
+    Deletes the child rows (taxes, rehab, valuation, hoa) of changed properties so the
+    reload replaces them instead of adding duplicates. Leads and property rows are
+    updated in place by the loaders, keeping their ids.
+    """
+    if not plan.changed_titles:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        deleted = dict.fromkeys(CHILD_TABLES, 0)
+        for titles, placeholders in _title_batches(plan.changed_titles):
+            for table in CHILD_TABLES:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE property_id IN "
+                    f"(SELECT property_id FROM property WHERE property_title IN ({placeholders}))",
+                    titles
+                )
+                deleted[table] += cursor.rowcount
+        conn.commit()
+        logging.info(
+            f"Removed child rows of {len(plan.changed_titles)} changed properties: "
+            + ", ".join(f"{table}={count}" for table, count in deleted.items())
+        )
+    finally:
+        cursor.close()
+        conn.close()
+
+def save_fingerprints(plan, skip=()):
+    """
+    Records the fingerprints of the planned records whose property row now exists, so
+    records that failed to load are retried on the next run. Only call it once every
+    main table loaded; skip holds titles that had rows rejected, which are retried too.
+    """
+    if not plan.fingerprints:
+        return 0
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        loaded = []
+        for titles, placeholders in _title_batches(plan.fingerprints):
+            cursor.execute(f"SELECT property_title FROM property WHERE property_title IN ({placeholders})", titles)
+            loaded.extend(title for (title,) in cursor.fetchall())
+        rows = [(title, plan.fingerprints[title]) for title in loaded if title in plan.fingerprints and title not in skip]
+        counts = insert_rows(cursor, FINGERPRINT_TABLE, ["property_title", "content_hash"], rows, update=True)
+        conn.commit()
+        logging.info(
+            f"Saved fingerprints to {FINGERPRINT_TABLE}: {counts} "
+            f"({len(plan.fingerprints) - len(rows)} records not loaded or with rejected rows)."
+        )
+        return counts.written
+    finally:
+        cursor.close()
+        conn.close()
@@ -1,15 +1,118 @@
-# Import necessary libraries
-import json
-import logging
-
-# Function to extract data from a JSON file and return it as a list of dictionaries
-def extract_json(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        logging.info(f"Data extracted successfully from {file_path}.")
-        return data
-    except Exception as e:
-        logging.error(f"Failed to extract JSON from {file_path}: {e}")
-        print(f"Error: Could not extract data from {file_path}. Check logs for more details.")
-
+# Import necessary libraries
+import json
+import logging
+
+# Function to extract data from a JSON (or JSON Lines) file and return it as a list of dictionaries
+def extract_json(file_path):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            is_array = _first_char(f) == '['
+            f.seek(0)
+            # JSON Lines files are read record by record instead
+            data = json.load(f) if is_array else list(iter_json_records(file_path))
+        logging.info(f"Data extracted successfully from {file_path}.")
+        return data
+    except Exception as e:
+        logging.error(f"Failed to extract JSON from {file_path}: {e}")
+        print(f"Error: Could not extract data from {file_path}. Check logs for more details.")
+
+
+# Characters read from the file per refill when streaming
+STREAM_BUFFER_SIZE = 1 << 20
+
+# Characters a JSON number can continue with
+NUMBER_CHARS = "0123456789.eE+-"
+
+def _first_char(f):
+    # First non-whitespace character of an open file, or '' if there is none
+    while True:
+        char = f.read(1)
+        if not char or not char.isspace():
+            return char
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _iter_array_items(f, buffer_size):
+    # Decode the elements of a top-level JSON array one at a time from a sliding buffer
+    decoder = json.JSONDecoder()
+    # Leading whitespace may be longer than one read
+    buffer = f.read(buffer_size).lstrip()
+    while not buffer:
+        more = f.read(buffer_size)
+        if not more:
+            raise ValueError("Expected a top-level JSON array, found only whitespace.")
+        buffer = more.lstrip()
+    if buffer[0] != '[':
+        raise ValueError(f"Expected a top-level JSON array, found {buffer[0]!r}.")
+    pos = 1
+    while True:
+        # Skip whitespace and separators, refilling the buffer as needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer):
+                break
+            more = f.read(buffer_size)
+            if not more:
+                raise ValueError("Unexpected end of file inside the top-level JSON array.")
+            buffer, pos = more, 0
+
+        if buffer[pos] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The element is cut off by the end of the buffer; read more and retry
+            more = f.read(buffer_size)
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        if end == len(buffer) or (_is_number(item) and not buffer[end:].strip(NUMBER_CHARS)):
+            # A scalar at the very end of the buffer may continue in the next read; a number
+            # may also have been cut at its '.', exponent or sign, where the decoder stops short
+            more = f.read(buffer_size)
+            if more:
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+
+        yield item
+        pos = end
+        # Drop consumed text so the buffer stays bounded
+        if pos >= buffer_size:
+            buffer, pos = buffer[pos:], 0
+
+def iter_json_records(file_path, buffer_size=STREAM_BUFFER_SIZE):
+    """
+    Yields records one at a time from a JSON file without loading it whole.
+    Accepts either a top-level JSON array or JSON Lines (one object per line).
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first_char = _first_char(f)
+        if not first_char:
+            return
+        f.seek(0)
+
+        if first_char == '[':
+            yield from _iter_array_items(f, buffer_size)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+def iter_json_chunks(file_path, chunk_size):
+    """
+    Yields lists of at most chunk_size records streamed from a JSON or JSON Lines file.
+    """
+    chunk = []
+    for record in iter_json_records(file_path):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,139 @@
+# Import necessary libraries
+import json
+import random
+import argparse
+
+STATES = ["TX", "CA", "FL", "GA", "NC", "AZ", "OH", "TN", "IN", "MO"]
+FLAGS = ["Yes", "No"]
+MARKETS = ["Dallas", "Austin", "Phoenix", "Atlanta", "Tampa"]
+
+# Distinct values per lookup column; override to test lookup-heavy or lookup-light feeds
+DEFAULT_CARDINALITIES = {"cities": 500, "markets": 5, "subdivisions": 50}
+
+def market_name(n):
+    return MARKETS[n] if n < len(MARKETS) else f"Market {n}"
+
+def subdivision_name(n, subdivisions):
+    # One extra draw stands for the feed's literal "Null" subdivision
+    return "Null" if n == subdivisions else f"Subdivision {n}"
+
+def generate_record(index, rng, cities=500, markets=5, subdivisions=50):
+    """
+    Builds one synthetic property record in the same shape as fake_property_data.json.
+    cities, markets and subdivisions set how many distinct values those lookups get.
+    """
+    state = rng.choice(STATES)
+    city = f"City{index % cities}"
+    return {
+        "Property_Title": f"{index} Synthetic Ave, {city}, {state}",
+        "Reviewed_Status": rng.choice(["Reviewed", "Not Reviewed", ""]),
+        "Most_Recent_Status": rng.choice(["Open", "Closed", "Contacted"]),
+        "Source": rng.choice(["Internal", "Website", "Referral", "Null"]),
+        "Market": market_name(rng.randrange(markets)),
+        "Occupancy": rng.choice(["Yes", "No", ""]),
+        "Flood": rng.choice(["Zone X", "Zone AE", "Unknown"]),
+        "Street_Address": f"{index} Synthetic Ave",
+        "City": city,
+        "State": state,
+        "Zip": str(10000 + index % 89999),
+        "Property_Type": rng.choice(["Single Family", "Duplex", "Townhouse"]),
+        "Highway": rng.choice(FLAGS),
+        "Train": rng.choice(FLAGS),
+        "Tax_Rate": round(rng.uniform(0.5, 3.0), 2),
+        "SQFT_Basement": rng.randint(0, 1500),
+        "HTW": rng.choice(FLAGS),
+        "Pool": rng.choice(FLAGS),
+        "Commercial": rng.choice(FLAGS),
+        "Water": rng.choice(["Municipal", "Well"]),
+        "Sewage": rng.choice(["Municipal", "Septic"]),
+        "Year_Built": rng.randint(1900, 2022),
+        "SQFT_MU": rng.randint(0, 500),
+        "SQFT_Total": str(rng.randint(600, 5000)),
+        "Parking": rng.choice(["Garage", "Carport", "Street", ""]),
+        "Bed": rng.randint(1, 6),
+        "Bath": rng.randint(1, 4),
+        "BasementYesNo": rng.choice(FLAGS),
+        "Layout": rng.choice(["Ranch", "Colonial", "Split-Level"]),
+        "Net_Yield": round(rng.uniform(1, 15), 2),
+        "IRR": round(rng.uniform(1, 20), 2),
+        "Rent_Restricted": rng.choice(FLAGS),
+        "Neighborhood_Rating": rng.randint(1, 10),
+        "Latitude": round(rng.uniform(25, 48), 6),
+        "Longitude": round(rng.uniform(-123, -70), 6),
+        "Subdivision": subdivision_name(rng.randrange(subdivisions + 1), subdivisions),
+        "Taxes": rng.choice([rng.randint(500, 10000), ""]),
+        "Selling_Reason": rng.choice(["Relocation", "Downsizing", "Financial", "Null"]),
+        "Seller_Retained_Broker": rng.choice(["Yes", "No", "Null"]),
+        "Final_Reviewer": rng.choice(["Alex Smith", "Jordan Lee", "Sam Patel"]),
+        "School_Average": round(rng.uniform(1, 9.99), 2),
+        "Valuation": [
+            {
+                "Previous_Rent": rng.randint(500, 3000),
+                "List_Price": rng.randint(50000, 900000),
+                "Zestimate": rng.randint(50000, 900000),
+                "ARV": rng.randint(50000, 900000),
+                "Expected_Rent": rng.randint(500, 3000),
+                "Rent_Zestimate": rng.randint(500, 3000),
+                "Low_FMR": rng.randint(500, 1500),
+                "High_FMR": rng.randint(1500, 3000),
+                "Redfin_Value": rng.randint(50000, 900000),
+            }
+            for _ in range(rng.randint(1, 3))
+        ],
+        "HOA": [
+            {"HOA": rng.choice([0, 50, 100, 150, 250, 400]), "HOA_Flag": rng.choice(FLAGS)}
+            for _ in range(rng.randint(0, 2))
+        ],
+        "Rehab": [
+            {
+                "Underwriting_Rehab": rng.randint(0, 80000),
+                "Rehab_Calculation": rng.randint(0, 80000),
+                "Paint": rng.choice(FLAGS),
+                "Flooring_Flag": rng.choice(FLAGS),
+                "Foundation_Flag": rng.choice(FLAGS),
+                "Roof_Flag": rng.choice(FLAGS),
+                "HVAC_Flag": rng.choice(FLAGS),
+                "Kitchen_Flag": rng.choice(FLAGS),
+                "Bathroom_Flag": rng.choice(FLAGS),
+                "Appliances_Flag": rng.choice(FLAGS),
+                "Windows_Flag": rng.choice(FLAGS),
+                "Landscaping_Flag": rng.choice(FLAGS),
+                "Trashout_Flag": rng.choice(FLAGS),
+            }
+            for _ in range(rng.randint(1, 2))
+        ],
+    }
+
+def generate_feed(file_path, record_count, seed=42, json_lines=False, **cardinalities):
+    """
+    Writes a synthetic feed with record_count records to file_path as a JSON array
+    (or JSON Lines with json_lines=True). Records are written one at a time, so
+    million-record feeds do not need to fit in memory.
+    """
+    options = {**DEFAULT_CARDINALITIES, **cardinalities}
+    rng = random.Random(seed)
+    with open(file_path, "w", encoding="utf-8") as f:
+        if not json_lines:
+            f.write("[")
+        for i in range(record_count):
+            if i and not json_lines:
+                f.write(", ")
+            json.dump(generate_record(i, rng, **options), f)
+            if json_lines:
+                f.write("\n")
+        if not json_lines:
+            f.write("]")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic property feed.")
+    parser.add_argument("output_path", nargs="?", default="synthetic_property_data.json")
+    parser.add_argument("count", nargs="?", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jsonl", action="store_true", help="write JSON Lines instead of a JSON array")
+    for name, default in DEFAULT_CARDINALITIES.items():
+        parser.add_argument(f"--{name}", type=int, default=default, help=f"distinct {name} (default {default})")
+    args = parser.parse_args()
+
+    cardinalities = {name: getattr(args, name) for name in DEFAULT_CARDINALITIES}
+    generate_feed(args.output_path, args.count, args.seed, args.jsonl, **cardinalities)
+    print(f"Wrote {args.count} synthetic records to {args.output_path}.")
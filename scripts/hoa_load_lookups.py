@@ -1,58 +1,49 @@
-# hoa_load_lookups.py
-
-import logging
-from db import get_connection
-from extraction import extract_json
-
-def load_hoa_lookup(file_path):
-    """
-    Loads unique HOA lookup values from a JSON file and inserts them into the hoa_lookup table.
-    """
-    try:
-        # Extract data from JSON file
-        data = extract_json(file_path)
-        logging.info(f"Loaded data from {file_path} for HOA lookup extraction.")
-
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-        logging.info("Database connection established.")
-
-        unique_hoa_records = set()
-
-        # Collect unique (hoa_value, hoa_flag) pairs from the data
-        for row in data:
-            hoa_list = row.get("HOA", [])
-            for hoa_entry in hoa_list:
-                hoa_value = hoa_entry.get("HOA")
-                hoa_flag = hoa_entry.get("HOA_Flag")
-                if hoa_value is not None and hoa_flag is not None:
-                    unique_hoa_records.add((hoa_value, hoa_flag))
-        logging.info(f"Extracted {len(unique_hoa_records)} unique HOA lookup records.")
-
-        # Insert unique HOA lookup records into the database
-        for value, flag in unique_hoa_records:
-            try:
-                cursor.execute(
-                    "INSERT IGNORE INTO hoa_lookup (hoa_value, hoa_flag) VALUES (%s, %s)",
-                    (value, flag)
-                )
-                logging.debug(f"Inserted HOA lookup ({value}, {flag})")
-            except Exception as e:
-                logging.error(f"Failed to insert HOA lookup ({value}, {flag}): {e}")
-                print(f"Error inserting HOA lookup ({value}, {flag}). Check logs for details.")
-
-        logging.info(f"Inserted {len(unique_hoa_records)} unique HOA records into hoa_lookup.") 
-        conn.commit()
-        logging.info("Database commit successful for HOA lookups.")
-        cursor.close()
-        conn.close()
-        logging.info("Database connection closed after HOA lookup load.")
-    except Exception as e:
-        logging.error(f"Failed to load HOA lookups: {e}")
-        print("Error: Could not load HOA lookups. Check logs for details.")
-
+# hoa_load_lookups.py
+
+import logging
+from db import get_connection
+from dataset import open_dataset
+from lookup_cache import lookup_cache
+from bulk_writer import insert_rows
+from lookup_harvest import harvest_lookups
+from metrics import metrics, instrumented
+
+@instrumented('hoa_lookups')
+def load_hoa_lookup(source, harvest=None):
+    """
+    Loads unique HOA lookup values from a JSON file or shared PropertyDataset and inserts them into the hoa_lookup table.
+    A harvest from harvest_lookups can be passed in so the feed is only scanned once for all lookup loaders.
+    """
+    try:
+        # Collect distinct (hoa_value, hoa_flag) pairs in one pass unless the caller already did
+        dataset = open_dataset(source)
+        with metrics.stage('hoa_lookups', 'harvest'):
+            unique_hoa_records = (harvest if harvest is not None else harvest_lookups(dataset))["hoa_lookup"]
+        logging.info(f"Loaded data from {dataset.source} for HOA lookup extraction.")
+        logging.info(f"Extracted {len(unique_hoa_records)} unique HOA lookup records.")
+
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        logging.info("Database connection established.")
+
+        # Insert unique HOA lookup records into the database in bulk
+        with metrics.stage('hoa_lookups', 'write') as stage:
+            counts = insert_rows(cursor, "hoa_lookup", ["hoa_value", "hoa_flag"], list(unique_hoa_records))
+            stage.rows = counts.inserted
+        if counts.rejected:
+            print(f"Error inserting {counts.rejected} HOA lookup records. Check logs for details.")
+
+        logging.info(f"Loaded {len(unique_hoa_records)} unique HOA records into hoa_lookup: {counts}.")
+        conn.commit()
+        logging.info("Database commit successful for HOA lookups.")
+
+        # Pull the ids of the pairs just inserted into the shared lookup cache
+        lookup_cache.ids(cursor, "hoa_lookup", list(unique_hoa_records))
+        cursor.close()
+        conn.close()
+        logging.info("Database connection closed after HOA lookup load.")
+    except Exception as e:
+        logging.error(f"Failed to load HOA lookups: {e}")
+        print("Error: Could not load HOA lookups. Check logs for details.")
+        raise
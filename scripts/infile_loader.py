@@ -0,0 +1,91 @@
+# Import necessary libraries
+import os
+import logging
+import tempfile
+
+# Server/client error codes raised when LOAD DATA LOCAL INFILE is not permitted
+LOCAL_INFILE_DISABLED_ERRORS = {
+    1148,  # ER_NOT_ALLOWED_COMMAND
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+}
+
+# Warning LOAD DATA raises for a row it skipped on a duplicate key (ER_DUP_ENTRY)
+DUPLICATE_ENTRY_WARNING = 1062
+
+def format_tsv_value(val):
+    """
+    Formats one value for a LOAD DATA file. None becomes \\N (SQL NULL), so rows
+    cleaned by frame_rows keep the same NULL semantics as the INSERT path.
+    """
+    if val is None:
+        return "\\N"
+    if isinstance(val, float) and val.is_integer():
+        # Integer ids come out of left merges as floats (e.g. 12.0)
+        return str(int(val))
+    return (
+        str(val)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+def write_tsv(rows, file):
+    """
+    Writes row tuples to an open text file as tab-separated lines.
+    """
+    for row in rows:
+        file.write("\t".join(format_tsv_value(val) for val in row))
+        file.write("\n")
+
+def load_rows_infile(cursor, table, columns, rows):
+    """
+    Streams rows to a temporary TSV file and ingests it with LOAD DATA LOCAL INFILE.
+    With LOCAL the server cannot stop the transfer midway, so duplicate keys are skipped
+    and bad values coerced with a warning instead of an error (see load_warnings).
+    Returns the number of rows loaded.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=f"_{table}.tsv", delete=False, encoding="utf-8", newline=""
+    ) as tsv_file:
+        write_tsv(rows, tsv_file)
+        tsv_path = tsv_file.name
+    logging.debug(f"Wrote {len(rows)} rows for {table} to {tsv_path}")
+
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})",
+            (tsv_path,)
+        )
+        loaded_count = cursor.rowcount
+        if loaded_count < len(rows):
+            logging.debug(f"LOAD DATA skipped {len(rows) - loaded_count} rows for {table}.")
+        return loaded_count
+    finally:
+        try:
+            os.remove(tsv_path)
+        except OSError as e:
+            logging.warning(f"Could not remove temporary file {tsv_path}: {e}")
+
+def load_warnings(cursor, skipped=0):
+    """
+    Checks the warnings of the LOAD DATA the cursor just ran, which skipped `skipped` rows.
+    Each skipped duplicate key raises one warning, so the load was clean when the statement's
+    total (@@warning_count; SHOW WARNINGS lists at most max_error_count of them) equals skipped.
+    Returns (number of other warnings, [(level, code, message)] of those SHOW WARNINGS lists).
+    """
+    if getattr(cursor, "warning_count", None) == 0:
+        total = 0
+    else:
+        cursor.execute("SELECT @@warning_count")
+        total = cursor.fetchone()[0]
+    if total == skipped:
+        return 0, []
+    cursor.execute("SHOW WARNINGS")
+    warnings = [warning for warning in cursor.fetchall() if warning[1] != DUPLICATE_ENTRY_WARNING]
+    return max(total - skipped, 1), warnings
@@ -1,58 +1,49 @@
-import logging
-from db import get_connection
-from extraction import extract_json
-
-# Mapping of JSON fields to their respective lookup tables and columns
-LOOKUPS = {
-    "Source": ("source_lookup", "source_name"),
-    "Selling_Reason": ("selling_reason_lookup", "selling_reason"),
-    "Final_Reviewer": ("final_reviewer_lookup", "reviewer_name"),
-}
-
-def load_leads_lookups(file_path):
-    """
-    Loads unique lookup values for leads (source, selling reason, reviewer) from a JSON file
-    and inserts them into their respective lookup tables.
-    """
-    try:
-        # Extract data from JSON file
-        data = extract_json(file_path)
-        logging.info(f"Loaded data from {file_path} for leads lookup extraction.")
-
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-        logging.info("Database connection established.")
-
-        # Iterate over each lookup field and insert unique values
-        for field, (table, column) in LOOKUPS.items():
-            unique_values = set()
-            # Collect unique values for the current field
-            for record in data:
-                value = record.get(field.capitalize()) or record.get(field)
-                if value:
-                    unique_values.add(value.strip())
-
-            # Insert each unique value into the corresponding lookup table
-            for value in unique_values:
-                try:
-                    cursor.execute(f"INSERT IGNORE INTO {table} ({column}) VALUES (%s)", (value,))
-                    logging.debug(f"Inserted value '{value}' into {table}.{column}")
-                except Exception as e:
-                    logging.error(f"Error inserting into {table} ({value}): {e}")
-                    print(f"Error inserting into {table}: {e}")
-                    
-            logging.info(f"Loaded {len(unique_values)} unique values into {table}.")
-            conn.commit()
-
-        # Close database resources
-        cursor.close()
-        conn.close()
-        logging.info("Database connection closed after leads lookup load.")
-    except Exception as e:
-        logging.error(f"Failed to load leads lookups: {e}")
-        print("Error: Could not load leads lookups.")
+import logging
+from db import get_connection
+from dataset import open_dataset
+from lookup_cache import lookup_cache
+from bulk_writer import insert_rows
+from lookup_harvest import LEADS_LOOKUPS, harvest_lookups
+from metrics import metrics, instrumented
+
+@instrumented('leads_lookups')
+def load_leads_lookups(source, harvest=None):
+    """
+    Loads unique lookup values for leads (source, selling reason, reviewer) from a JSON file or shared PropertyDataset
+    and inserts them into their respective lookup tables. A harvest from harvest_lookups can be passed in
+    so the feed is only scanned once for all lookup loaders.
+    """
+    try:
+        # Collect distinct values in one pass unless the caller already did
+        dataset = open_dataset(source)
+        with metrics.stage('leads_lookups', 'harvest'):
+            lookup_values = harvest if harvest is not None else harvest_lookups(dataset)
+        logging.info(f"Loaded data from {dataset.source} for leads lookup extraction.")
+
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        logging.info("Database connection established.")
+
+        # Insert each lookup table's unique values in bulk
+        for table, column in LEADS_LOOKUPS.values():
+            unique_values = lookup_values[table]
+            with metrics.stage('leads_lookups', 'write') as stage:
+                counts = insert_rows(cursor, table, [column], [(value,) for value in unique_values])
+                stage.rows = counts.inserted
+            if counts.rejected:
+                print(f"Error inserting into {table}: {counts.rejected} values failed. Check logs for details.")
+            logging.info(f"Loaded {len(unique_values)} unique values into {table}: {counts}.")
+            conn.commit()
+
+            # Pull the ids of the values just inserted into the shared lookup cache
+            lookup_cache.ids(cursor, table, list(unique_values))
+
+        # Close database resources
+        cursor.close()
+        conn.close()
+        logging.info("Database connection closed after leads lookup load.")
+    except Exception as e:
+        logging.error(f"Failed to load leads lookups: {e}")
+        print("Error: Could not load leads lookups.")
+        raise
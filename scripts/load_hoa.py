@@ -1,127 +1,126 @@
-import pandas as pd
-from db import get_connection
-from extraction import extract_json
-import numpy as np
-import logging
-
-def load_hoa_data(file_path: str) -> None:
-    """
-    Loads HOA data from a JSON file, processes it, and inserts relevant records into the database.
-    """
-    try:
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-        logging.info("Database connection established.")
-
-        # Step 1: Load raw JSON into DataFrame
-        try:
-            records = extract_json(file_path)
-            df = pd.DataFrame(records)
-            logging.info(f"Loaded {len(df)} records from {file_path}")
-        except Exception as e:
-            logging.error(f"Error loading JSON data: {e}")
-            print("Error: Could not load JSON data.")
-            return
-
-        # Step 2: Fetch property table data
-        try:
-            cursor.execute("SELECT property_id, property_title FROM property")
-            property_rows = cursor.fetchall()
-            property_df = pd.DataFrame(property_rows, columns=['property_id', 'property_title'])
-            logging.info(f"Fetched {len(property_df)} property records from database.")
-        except Exception as e:
-            logging.error(f"Error fetching property data: {e}")
-            print("Error: Could not fetch property data.")
-            cursor.close()
-            conn.close()
-            return
-
-        # Step 3: Fetch hoa_lookup table data
-        try:
-            cursor.execute("SELECT hoa_lookup_id, hoa_value, hoa_flag FROM hoa_lookup")
-            hoa_rows = cursor.fetchall()
-            hoa_lookup_df = pd.DataFrame(hoa_rows, columns=['hoa_lookup_id', 'hoa_value', 'hoa_flag']) 
-            logging.info(f"Fetched {len(hoa_lookup_df)} HOA lookup records from database.")
-        except Exception as e:
-            logging.error(f"Error fetching HOA data: {e}")
-            print("Error: Could not fetch HOA data.")
-            cursor.close()
-            conn.close()
-            return
-
-        # Step 4: Prepare HOA DataFrame from JSON records
-        columns = [
-            "Property_Title",
-            "HOA",
-            "HOA_Flag"
-        ]
-
-        rows = []
-        for record in records:
-            property_title = record.get("Property_Title")
-            hoa_details = record.get("HOA", [])
-            for detail in hoa_details:
-                HOA = detail.get("HOA")
-                HOA_Flag = detail.get("HOA_Flag")
-                rows.append([property_title, HOA, HOA_Flag])
-        hoa_df = pd.DataFrame(rows, columns=columns)
-        logging.info(f"Prepared HOA DataFrame with {len(hoa_df)} rows.")
-
-        # Merge property data with HOA and HOA lookup data
-        property_df = property_df.merge(
-            hoa_df, left_on='property_title', right_on='Property_Title', how='left', suffixes=('', '_hoa')
-        )
-        logging.info("Merged property data with HOA DataFrame.")
-
-        property_df = property_df.merge(
-            hoa_lookup_df, left_on=['HOA', 'HOA_Flag'], right_on=['hoa_value', 'hoa_flag'], how='left', suffixes=('', '_hoa_lookup')
-        )
-        logging.info("Merged property data with HOA lookup DataFrame.")
-
-        # Step 5: Prepare data for INSERT into hoa table
-        insert_cols = [
-            "property_id",
-            "hoa_lookup_id"
-        ]
-
-        values = property_df[insert_cols]
-        columns_str = ', '.join(insert_cols)
-        values = values.replace('', None).replace('Null', None)
-            
-        insert_count = 0
-        for value in values.iterrows():
-            # Replace NaN, np.nan, or empty string with None for SQL compatibility
-            row = [val if not (pd.isna(val) or val is np.nan or val == ' ') else None for val in value[1]]
-            try:
-                cursor.execute(
-                    f"INSERT IGNORE INTO hoa ({columns_str}) VALUES ({', '.join(['%s'] * len(insert_cols))})", row
-                )
-                insert_count += 1
-                logging.debug(f"Inserted row: {row}")
-            except Exception as e:
-                logging.error(f"Error inserting row into hoa: {e}")
-                print(f"Error inserting into hoa: {e}")
-
-        logging.info(f"Inserted {insert_count} rows into hoa table.")
-        conn.commit()
-        logging.info("Database commit successful.")
-    except Exception as e:
-        logging.error(f"Failed to load hoa data: {e}")
-        print("Error: Could not load hoa data.")
-    finally:
-        # Ensure resources are closed properly
-        try:
-            cursor.close()
-            logging.info("Database cursor closed.")
-        except Exception as e:
-            logging.warning(f"Error closing cursor: {e}")
-        try:
-            conn.close()
-            logging.info("Database connection closed.")
-        except Exception as e:
+from db import get_connection
+from bulk_writer import DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE, WriteCounts, frame_rows, write_rows
+from dataset import open_dataset
+from lookup_cache import lookup_cache
+from title_index import title_index
+from checkpoint import open_checkpoint
+from metrics import metrics, instrumented
+import logging
+
+# Columns inserted into the hoa table
+HOA_COLUMNS = [
+    "property_id",
+    "hoa_lookup_id"
+]
+
+def hoa_row_builder(cursor):
+    """
+    Returns a function turning one dataset chunk into hoa row tuples, merged with the
+    chunk's property ids and HOA lookup ids, and the Property_Title of every row. Shared
+    by the synchronous loader and the async pipeline.
+    """
+    with metrics.stage('hoa', 'lookup'):
+        hoa_lookup_df = lookup_cache.frame(cursor, 'hoa_lookup')
+
+    def build_rows(chunk):
+        # Step 4: Get the exploded HOA DataFrame for this chunk
+        with metrics.stage('hoa', 'extract') as stage:
+            hoa_df = chunk.table_frame('hoa')
+            stage.rows = len(hoa_df)
+        logging.info(f"Prepared HOA DataFrame with {len(hoa_df)} rows.")
+
+        # Merge the chunk's properties with HOA and HOA lookup data
+        # Property ids of the chunk's titles come from the shared title index
+        with metrics.stage('hoa', 'lookup') as stage:
+            chunk_property_df = title_index.frame(cursor, 'property', chunk.titles())
+            stage.rows = len(chunk_property_df)
+        with metrics.stage('hoa', 'resolve') as stage:
+            # Properties without HOA entries have no hoa rows to write
+            chunk_property_df = chunk_property_df.merge(
+                hoa_df, left_on='property_title', right_on='Property_Title', how='inner', suffixes=('', '_hoa')
+            )
+            logging.info("Merged property data with HOA DataFrame.")
+
+            chunk_property_df = chunk_property_df.merge(
+                hoa_lookup_df, left_on=['HOA', 'HOA_Flag'], right_on=['hoa_value', 'hoa_flag'], how='left', suffixes=('', '_hoa_lookup')
+            )
+            stage.rows = len(chunk_property_df)
+        logging.info("Merged property data with HOA lookup DataFrame.")
+
+        # Step 5: Coerce to the table's DDL column types and convert to row tuples (empty, 'Null' and NaN become None)
+        with metrics.stage('hoa', 'serialize') as stage:
+            rows = frame_rows(chunk_property_df[HOA_COLUMNS], 'hoa')
+            stage.rows = len(rows)
+        return rows, chunk_property_df['property_title'].tolist()
+    return build_rows
+
+@instrumented('hoa')
+def load_hoa_data(source, batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE, resume=False) -> None:
+    """
+    Loads HOA data from a JSON file or shared PropertyDataset, processes it, and inserts relevant records into the database.
+    """
+    try:
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        logging.info("Database connection established.")
+
+        # Step 1: Open the shared dataset
+        try:
+            dataset = open_dataset(source)
+            logging.info(f"Opened dataset from {dataset.source}")
+        except Exception as e:
+            logging.error(f"Error loading JSON data: {e}")
+            print("Error: Could not load JSON data.")
+            raise
+
+        # Resume after the last chunk an interrupted load of the same file committed
+        checkpoint = open_checkpoint(cursor, 'hoa', dataset, resume, parent='property')
+
+        # Step 3: Get hoa_lookup table data from the shared lookup cache (in the row builder)
+        try:
+            build_rows = hoa_row_builder(cursor)
+            logging.info("Fetched HOA lookup records from the lookup cache.")
+        except Exception as e:
+            logging.error(f"Error fetching HOA data: {e}")
+            print("Error: Could not fetch HOA data.")
+            cursor.close()
+            conn.close()
+            raise
+
+        # Process the feed chunk by chunk; an in-memory dataset is a single chunk
+        counts = WriteCounts()
+        for chunk_index, chunk in checkpoint.chunks(dataset):
+            rows, titles = build_rows(chunk)
+
+            # Write with the selected load mode (batched INSERT or LOAD DATA LOCAL INFILE)
+            with metrics.stage('hoa', 'write') as stage:
+                chunk_counts = write_rows(cursor, 'hoa', HOA_COLUMNS, rows, load_mode, batch_size, sources=titles)
+                stage.rows = chunk_counts.written
+            counts += chunk_counts
+
+            # Commit every chunk together with its checkpoint, so a rerun resumes after it
+            with metrics.stage('hoa', 'commit'):
+                checkpoint.save(cursor, chunk_index, chunk_counts.written)
+                conn.commit()
+        logging.info(f"Wrote rows into hoa table: {counts}.")
+        with metrics.stage('hoa', 'commit'):
+            checkpoint.finish(cursor)
+            conn.commit()
+        logging.info("Database commit successful.")
+    except Exception as e:
+        logging.error(f"Failed to load hoa data: {e}")
+        print("Error: Could not load hoa data.")
+        raise
+    finally:
+        # Ensure resources are closed properly
+        try:
+            cursor.close()
+            logging.info("Database cursor closed.")
+        except Exception as e:
+            logging.warning(f"Error closing cursor: {e}")
+        try:
+            conn.close()
+            logging.info("Database connection closed.")
+        except Exception as e:
             logging.warning(f"Error closing connection: {e}")
\ No newline at end of file
@@ -1,106 +1,122 @@
-import pandas as pd
-import numpy as np
-import logging
-from db import get_connection
-from extraction import extract_json
-
-def get_lookup_df(cursor, table, id_col, value_col):
-    """
-    Helper function to fetch lookup tables from the database and return as DataFrame.
-    """
-    try:
-        cursor.execute(f"SELECT {id_col}, {value_col} FROM {table}")
-        rows = cursor.fetchall()
-        logging.info(f"Loaded {len(rows)} rows from {table}")
-        return pd.DataFrame(rows, columns=[id_col, value_col])
-    except Exception as e:
-        logging.error(f"Error loading lookup table {table}: {e}")
-        return pd.DataFrame(columns=[id_col, value_col])
-
-def load_lead_data(file_path):
-    """
-    Loads lead data from a JSON file, processes it, maps lookup values, and inserts records into the database.
-    """
-    try:
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-        logging.info("Database connection established.")
-
-        # Step 1: Load raw JSON into DataFrame
-        try:
-            records = extract_json(file_path)
-            df = pd.DataFrame(records)
-            logging.info(f"Loaded {len(df)} records from {file_path}")
-        except Exception as e:
-            logging.error(f"Error loading JSON data: {e}")
-            print("Error: Could not load JSON data.")
-            return
-
-        # Step 2: Load lookup tables for mapping
-        source_df = get_lookup_df(cursor, 'source_lookup', 'source_id', 'source_name')
-        selling_reason_df = get_lookup_df(cursor, 'selling_reason_lookup', 'selling_reason_id', 'selling_reason')
-        final_reviewer_df = get_lookup_df(cursor, 'final_reviewer_lookup', 'reviewer_id', 'reviewer_name')
-
-        # Step 3: Map lookups to main DataFrame
-        try:
-            # Clean and map Source
-            df['Source'] = df['Source'].str.strip()
-            df = df.merge(source_df, left_on='Source', right_on='source_name', how='left')
-
-            # Clean and map Selling_Reason
-            df['Selling_Reason'] = df['Selling_Reason'].str.strip()
-            df = df.merge(selling_reason_df, left_on='Selling_Reason', right_on='selling_reason', how='left')
-
-            # Clean and map Final_Reviewer
-            df['Final_Reviewer'] = df['Final_Reviewer'].str.strip()
-            df = df.merge(final_reviewer_df, left_on='Final_Reviewer', right_on='reviewer_name', how='left')
-            logging.info("Successfully mapped lookup values to DataFrame.")
-            
-        except Exception as e:
-            logging.error(f"Error mapping lookups: {e}")
-            print("Error: Could not map lookup values.")
-            cursor.close()
-            conn.close()
-            return
-
-        # Step 4: Prepare data for INSERT into leads table
-        insert_cols = [
-            'Property_Title', 'Reviewed_Status', 'Most_Recent_Status', 'source_id', 'Occupancy', 'Net_Yield', 'IRR', 
-            'selling_reason_id', 'Seller_Retained_Broker','reviewer_id'
-        ]
-        
-        values = df[insert_cols]
-        columns = ', '.join(insert_cols)
-        values = values.replace('', None).replace('Null', None)
-
-        insert_count = 0
-        for value in values.iterrows():
-            # Replace NaN, np.nan, or empty string with None for SQL compatibility
-            row = [val if not (pd.isna(val) or val is np.nan or val==' ') else None for val in value[1]]
-            try:
-                cursor.execute(
-                    f"INSERT IGNORE INTO leads ({columns}) VALUES ({', '.join(['%s'] * len(insert_cols))})", row
-                )
-                insert_count += 1
-                logging.debug(f"Inserted row: {row}")
-            except Exception as e:
-                logging.error(f"Error inserting row into leads: {e}")
-                print(f"Error inserting into leads: {e}")
-        logging.info(f"Inserted {insert_count} rows into leads table.")
-
-        # Commit transaction and close resources
-        conn.commit()
-        logging.info("Database commit successful.")
-        cursor.close()
-        conn.close()
-        logging.info("Database connection closed successfully.")
-    except Exception as e:
-        logging.error(f"Failed to load lead data: {e}")
-        print("Error: Could not load lead data. Check logs for details.")
-
-
+import logging
+from db import get_connection
+from bulk_writer import DEFAULT_BATCH_SIZE, WriteCounts, frame_rows, insert_rows
+from dataset import open_dataset
+from lookup_cache import lookup_cache
+from title_index import title_index
+from checkpoint import open_checkpoint
+from metrics import metrics, instrumented
+
+# Columns inserted into the leads table
+LEADS_COLUMNS = [
+    'Property_Title', 'Reviewed_Status', 'Most_Recent_Status', 'source_id', 'Occupancy', 'Net_Yield', 'IRR', 
+    'selling_reason_id', 'Seller_Retained_Broker','reviewer_id'
+]
+
+def lead_row_builder(cursor):
+    """
+    Returns a function turning one dataset chunk into leads row tuples, with the source,
+    selling reason and reviewer lookup ids mapped, and the Property_Title of every row.
+    Shared by the synchronous loader and the async pipeline.
+    """
+    with metrics.stage('leads', 'lookup'):
+        source_df = lookup_cache.frame(cursor, 'source_lookup')
+        selling_reason_df = lookup_cache.frame(cursor, 'selling_reason_lookup')
+        final_reviewer_df = lookup_cache.frame(cursor, 'final_reviewer_lookup')
+
+    def build_rows(chunk):
+        with metrics.stage('leads', 'extract') as stage:
+            df = chunk.table_frame('leads')
+            stage.rows = len(df)
+
+        # Step 3: Map lookups to main DataFrame
+        with metrics.stage('leads', 'resolve', rows=len(df)):
+            # Clean and map Source
+            df['Source'] = df['Source'].str.strip()
+            df = df.merge(source_df, left_on='Source', right_on='source_name', how='left')
+
+            # Clean and map Selling_Reason
+            df['Selling_Reason'] = df['Selling_Reason'].str.strip()
+            df = df.merge(selling_reason_df, left_on='Selling_Reason', right_on='selling_reason', how='left')
+
+            # Clean and map Final_Reviewer
+            df['Final_Reviewer'] = df['Final_Reviewer'].str.strip()
+            df = df.merge(final_reviewer_df, left_on='Final_Reviewer', right_on='reviewer_name', how='left')
+            logging.info("Successfully mapped lookup values to DataFrame.")
+
+        # Step 4: Coerce to the table's DDL column types and convert to row tuples (empty, 'Null' and NaN become None)
+        with metrics.stage('leads', 'serialize') as stage:
+            rows = frame_rows(df[LEADS_COLUMNS], 'leads')
+            stage.rows = len(rows)
+        return rows, [row[0] for row in rows]
+    return build_rows
+
+@instrumented('leads')
+def load_lead_data(source, batch_size=DEFAULT_BATCH_SIZE, update=False, resume=False):
+    """
+    Loads lead data from a JSON file or shared PropertyDataset, processes it, maps lookup values, and inserts records into the database.
+    With update=True leads that already exist are updated in place (used by incremental loads).
+    """
+    try:
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        logging.info("Database connection established.")
+
+        # Step 1: Open the shared dataset
+        try:
+            dataset = open_dataset(source)
+            logging.info(f"Opened dataset from {dataset.source}")
+        except Exception as e:
+            logging.error(f"Error loading JSON data: {e}")
+            print("Error: Could not load JSON data.")
+            raise
+
+        # Resume after the last chunk an interrupted load of the same file committed
+        checkpoint = open_checkpoint(cursor, 'leads', dataset, resume)
+
+        # Step 2: Get lookup tables for mapping from the shared lookup cache (in the row builder)
+        build_rows = lead_row_builder(cursor)
+
+        # Process the feed chunk by chunk; an in-memory dataset is a single chunk
+        counts = WriteCounts()
+        for chunk_index, chunk in checkpoint.chunks(dataset):
+            try:
+                rows, titles = build_rows(chunk)
+            except Exception as e:
+                logging.error(f"Error mapping lookups: {e}")
+                print("Error: Could not map lookup values.")
+                cursor.close()
+                conn.close()
+                raise
+
+            # Insert in batches; failed batches are retried row by row
+            with metrics.stage('leads', 'write') as stage:
+                chunk_counts = insert_rows(cursor, 'leads', LEADS_COLUMNS, rows, batch_size, update)
+                stage.rows = chunk_counts.written
+
+            # Record the new lead ids so the property loader skips re-reading the leads table
+            with metrics.stage('leads', 'index'):
+                title_index.record(cursor, 'leads', titles)
+            counts += chunk_counts
+
+            # Commit every chunk together with its checkpoint, so a rerun resumes after it
+            with metrics.stage('leads', 'commit'):
+                checkpoint.save(cursor, chunk_index, chunk_counts.written)
+                conn.commit()
+        logging.info(f"Wrote rows into leads table: {counts}.")
+
+        # Commit transaction and close resources
+        with metrics.stage('leads', 'commit'):
+            checkpoint.finish(cursor)
+            conn.commit()
+        logging.info("Database commit successful.")
+        cursor.close()
+        conn.close()
+        logging.info("Database connection closed successfully.")
+    except Exception as e:
+        logging.error(f"Failed to load lead data: {e}")
+        print("Error: Could not load lead data. Check logs for details.")
+        raise
+
+
@@ -1,214 +1,331 @@
-import pandas as pd
-from db import get_connection
-from extraction import extract_json
-import logging
-import numpy as np
-
-def get_lookup_df(cursor, table, id_col, value_col):
-    """
-    Helper function to fetch lookup tables from the database and return as DataFrame.
-    """
-    try:
-        cursor.execute(f"SELECT {id_col}, {value_col} FROM {table}")
-        rows = cursor.fetchall()
-        logging.info(f"Loaded {len(rows)} rows from {table}")
-        return pd.DataFrame(rows, columns=[id_col, value_col])
-    except Exception as e:
-        logging.error(f"Error loading lookup table {table}: {e}")
-        return pd.DataFrame(columns=[id_col, value_col])
-
-def load_property_data(file_path):
-    try:
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-
-        # Step 1: Load raw JSON into DataFrame
-        try:
-            records = extract_json(file_path)
-            df = pd.DataFrame(records)
-            logging.info(f"Loaded {len(df)} records from {file_path}")
-        except Exception as e:
-            logging.error(f"Error loading JSON data: {e}")
-            print("Error: Could not load JSON data.")
-            return
-
-        # Step 3: Load lookup tables
-        try:
-            market_df = get_lookup_df(cursor, 'market_lookup', 'market_id', 'market_name')
-            flood_df = get_lookup_df(cursor, 'flood_lookup', 'flood_id', 'flood_zone')
-            type_df = get_lookup_df(cursor, 'property_type_lookup', 'type_id', 'type_name')
-            parking_df = get_lookup_df(cursor, 'parking_type_lookup', 'parking_id', 'parking_desc')
-            layout_df = get_lookup_df(cursor, 'layout_type_lookup', 'layout_id', 'layout_desc')
-            subdivision_df = get_lookup_df(cursor, 'subdivision_lookup', 'subdivision_id', 'subdivision_name')
-            state_df = get_lookup_df(cursor, 'state_lookup', 'state_id', 'state_code')
-            logging.info("Lookup tables loaded successfully.")
-        except Exception as e:
-            logging.error(f"Error loading lookup tables: {e}")
-            print("Error: Could not load lookup tables.")
-            cursor.close()
-            conn.close()
-            return
-
-        try:
-            cursor.execute("SELECT lead_id, property_title FROM leads")
-            lead_rows = cursor.fetchall()
-            leads_df = pd.DataFrame(lead_rows, columns=['lead_id', 'property_title'])
-            logging.info(f"Loaded {len(leads_df)} rows from leads table")
-
-            cursor.execute("SELECT city_id, city_name, state_id FROM city_lookup")
-            city_rows = cursor.fetchall()
-            city_df = pd.DataFrame(city_rows, columns=['city_id', 'city_name', 'state_id'])
-            logging.info(f"Loaded {len(city_df)} rows from city_lookup table")
-
-            cursor.execute("SELECT address_id, street_address, city_id, zip FROM address")
-            address_rows = cursor.fetchall()
-            address_df = pd.DataFrame(address_rows, columns=['address_id', 'street_address', 'city_id', 'zip'])
-            logging.info(f"Loaded {len(address_df)} rows from address table")
-        except Exception as e:
-            logging.error(f"Error loading leads/city/address tables: {e}")
-            print("Error: Could not load leads/city/address tables.")
-            cursor.close()
-            conn.close()
-            return
-
-        # Prepare for matching
-        try:
-            df['Street_Address'] = df['Street_Address'].str.strip()
-            df['City'] = df['City'].str.strip()
-            df['State'] = df['State'].str.strip()
-            df['Zip'] = df['Zip'].astype(str).str.strip()
-
-            city_df['city_name'] = city_df['city_name'].str.strip()
-            state_df['state_code'] = state_df['state_code'].str.strip()
-
-            # Merge to get state_id
-            df = df.merge(state_df, left_on='State', right_on='state_code', how='left')
-            # Merge to get city_id
-            df = df.merge(city_df, left_on=['City', 'state_id'], right_on=['city_name', 'state_id'], how='left', suffixes=('', '_city'))
-            # Merge to get address_id
-            address_df['street_address'] = address_df['street_address'].str.strip()
-            address_df['zip'] = address_df['zip'].astype(str).str.strip()
-            df = df.merge(address_df, left_on=['Street_Address', 'city_id', 'Zip'], right_on=['street_address', 'city_id', 'zip'], how='left', suffixes=('', '_address'))
-            logging.info("Successfully merged address, city, and state data.")
-        except Exception as e:
-            logging.error(f"Error merging address/city/state data: {e}")
-            print("Error: Could not merge address/city/state data.")
-            cursor.close()
-            conn.close()
-            return
-
-        # Step 4: Map lookups
-        try:
-            df['Property_Title'] = df['Property_Title'].str.strip()
-            leads_df['property_title'] = leads_df['property_title'].str.strip()
-            df = df.merge(leads_df, left_on='Property_Title', right_on='property_title', how='left', suffixes=('', '_lead'))
-            logging.info("Successfully mapped property titles to leads.")
-
-            df['Market'] = df['Market'].str.strip()
-            market_df['market_name'] = market_df['market_name']
-            df = df.merge(market_df, left_on='Market', right_on='market_name', how='left')
-            logging.info("Successfully mapped market names to DataFrame.")
-
-            df['Flood'] = df['Flood'].str.strip()
-            flood_df['flood_zone'] = flood_df['flood_zone']
-            df = df.merge(flood_df, left_on='Flood', right_on='flood_zone', how='left')
-            logging.info("Successfully mapped flood zones to DataFrame.")
-
-            df['Property_Type'] = df['Property_Type'].str.strip()
-            type_df['type_name'] = type_df['type_name']
-            df = df.merge(type_df, left_on='Property_Type', right_on='type_name', how='left')
-            logging.info("Successfully mapped property types to DataFrame.")
-
-            df['Parking'] = df['Parking'].str.strip()
-            parking_df['parking_desc'] = parking_df['parking_desc']
-            df = df.merge(parking_df, left_on='Parking', right_on='parking_desc', how='left')
-            logging.info("Successfully mapped parking types to DataFrame.") 
-
-            df['Layout'] = df['Layout'].str.strip()
-            layout_df['layout_desc'] = layout_df['layout_desc']
-            df = df.merge(layout_df, left_on='Layout', right_on='layout_desc', how='left')
-            logging.info("Successfully mapped layout types to DataFrame.")
-
-            df['Subdivision'] = df['Subdivision'].str.strip()
-            subdivision_df['subdivision_name'] = subdivision_df['subdivision_name']
-            df = df.merge(subdivision_df, left_on='Subdivision', right_on='subdivision_name', how='left')
-            logging.info("Successfully mapped subdivisions to DataFrame.")
-        except Exception as e:
-            logging.error(f"Error mapping lookups: {e}")
-            print("Error: Could not map lookup values.")
-            cursor.close()
-            conn.close()
-            return
-
-        # Step 6: Prepare INSERT
-        try:
-            insert_cols = [
-                'Property_Title',      
-                'address_id',          
-                'lead_id',             
-                'market_id',           
-                'flood_id',            
-                'type_id',            
-                'Highway',            
-                'Train',               
-                'Tax_Rate',            
-                'SQFT_Basement',      
-                'HTW',                
-                'Pool',                
-                'Commercial',        
-                'Water',             
-                'Sewage',              
-                'Year_Built',          
-                'SQFT_MU',            
-                'SQFT_Total',         
-                'parking_id',          
-                'Bed',                 
-                'Bath',                
-                'BasementYesNo',       
-                'layout_id',           
-                'Rent_Restricted',     
-                'Neighborhood_Rating', 
-                'Latitude',            
-                'Longitude',           
-                'subdivision_id',      
-                'School_Average'       
-            ]
-            values = df[insert_cols]
-            # Prepare column names for SQL insert
-            columns = ', '.join(insert_cols)
-            # Replace empty strings and 'Null' with None for SQL compatibility
-            values = values.replace('', None).replace('Null', None)
-            
-            insert_count = 0
-            # Iterate over each row to insert into the property table
-            for value in values.iterrows():
-                # Ensure all NaN, np.nan, or blank values are set to None for SQL
-                row = [val if not (pd.isna(val) or val is np.nan or val==' ') else None for val in value[1]]
-                try:
-                    cursor.execute(
-                        f"INSERT IGNORE INTO property ({columns}) VALUES ({', '.join(['%s'] * len(insert_cols))})", row
-                    )
-                    insert_count += 1
-                    logging.debug(f"Inserted row into property: {row}")  # Log each successful insert at debug level
-                except Exception as e:
-                    logging.error(f"Error inserting row into property: {e}")
-                    print(f"Error inserting into property: {e}")
-
-            logging.info(f"Inserted {insert_count} rows into property table.")  # Log total successful inserts
-            conn.commit()
-            logging.info("Database commit successful for property inserts.")  # Log DB commit
-        except Exception as e:
-            logging.error(f"Error during property insert: {e}")
-            print("Error: Could not insert property data.")
-        finally:
-            cursor.close()
-            conn.close()
-            logging.info("Database connection closed successfully.")
-    except Exception as e:
-        logging.error(f"Failed to load property data: {e}")
-        print("Error: Could not load property data.")
-
+import pandas as pd
+from db import get_connection
+from bulk_writer import DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE, WriteCounts, frame_rows, write_rows
+from dataset import open_dataset
+from lookup_cache import LOOKUP_TABLES, lookup_cache, resolve_ids
+from title_index import title_index
+from checkpoint import open_checkpoint
+from sharding import DEFAULT_SHARD_MODE, DEFAULT_SHARD_WORKERS, ShardPool
+from staging import StagedMerge, key_match, reset_staging, stage_rows
+from metrics import metrics, instrumented
+import logging
+
+# Lookup tables the property loader resolves ids against
+PROPERTY_LOOKUP_TABLES = [
+    'state_lookup', 'city_lookup', 'address', 'market_lookup', 'flood_lookup',
+    'property_type_lookup', 'parking_type_lookup', 'layout_type_lookup', 'subdivision_lookup'
+]
+
+# Foreign key columns resolved by a single-column lookup: id column → (lookup table, feed column)
+SIMPLE_LOOKUPS = {
+    'market_id': ('market_lookup', 'Market'),
+    'flood_id': ('flood_lookup', 'Flood'),
+    'type_id': ('property_type_lookup', 'Property_Type'),
+    'parking_id': ('parking_type_lookup', 'Parking'),
+    'layout_id': ('layout_type_lookup', 'Layout'),
+    'subdivision_id': ('subdivision_lookup', 'Subdivision'),
+}
+
+def property_lookup_indexes(cursor):
+    """
+    Prebuilds the id indexes for every property lookup table from the shared lookup cache.
+    """
+    return {table: lookup_cache.index(cursor, table) for table in PROPERTY_LOOKUP_TABLES}
+
+def property_keys(df):
+    """
+    Returns the cleaned feed columns property ids are resolved from: the address chain
+    (State, City, Street_Address, Zip) and the SIMPLE_LOOKUPS columns.
+    """
+    keys = {column: df[column].str.strip() for column in ('State', 'City', 'Street_Address')}
+    # address.zip is an INT column, so zips are matched numerically
+    keys['Zip'] = pd.to_numeric(df['Zip'].astype(str).str.strip(), errors='coerce')
+    for table, column in SIMPLE_LOOKUPS.values():
+        keys[column] = df[column].str.strip()
+    return keys
+
+def resolve_lookup_ids(df, lookup_indexes):
+    """
+    Adds the address and lookup id columns (address_id, market_id, ...) to a property frame
+    in place, resolving the state → city → address chain first. Needs no database access,
+    so shard workers run it too.
+    """
+    keys = property_keys(df)
+    state_id = resolve_ids(*lookup_indexes['state_lookup'], keys['State'])
+    city_id = resolve_ids(*lookup_indexes['city_lookup'], keys['City'], state_id)
+    df['address_id'] = resolve_ids(*lookup_indexes['address'], keys['Street_Address'], city_id, keys['Zip'])
+    for id_col, (table, column) in SIMPLE_LOOKUPS.items():
+        df[id_col] = resolve_ids(*lookup_indexes[table], keys[column])
+    return df
+
+def resolve_lead_ids(df, cursor):
+    """
+    Adds lead_id to a property frame in place from the shared title index filled in by the leads loader.
+    """
+    df['Property_Title'] = df['Property_Title'].str.strip()
+    df['lead_id'] = title_index.ids(cursor, 'leads', df['Property_Title'])
+    return df
+
+def resolve_property_ids(df, lookup_indexes, cursor):
+    """
+    Adds the property table's foreign key columns (address_id, lead_id, market_id, ...) to a
+    property frame in place.
+    """
+    resolve_lookup_ids(df, lookup_indexes)
+    return resolve_lead_ids(df, cursor)
+
+# Columns inserted into the property table, in table order
+PROPERTY_COLUMNS = [
+    'Property_Title',      
+    'address_id',          
+    'lead_id',             
+    'market_id',           
+    'flood_id',            
+    'type_id',            
+    'Highway',            
+    'Train',               
+    'Tax_Rate',            
+    'SQFT_Basement',      
+    'HTW',                
+    'Pool',                
+    'Commercial',        
+    'Water',             
+    'Sewage',              
+    'Year_Built',          
+    'SQFT_MU',            
+    'SQFT_Total',         
+    'parking_id',          
+    'Bed',                 
+    'Bath',                
+    'BasementYesNo',       
+    'layout_id',           
+    'Rent_Restricted',     
+    'Neighborhood_Rating', 
+    'Latitude',            
+    'Longitude',           
+    'subdivision_id',      
+    'School_Average'       
+]
+
+# Property columns copied from the feed as they are (everything but the title and the ids)
+PROPERTY_VALUE_COLUMNS = [column for column in PROPERTY_COLUMNS[1:] if not column.endswith('_id')]
+
+# property_staging columns holding the address chain keys: feed column → staging column
+ADDRESS_STAGING_COLUMNS = {'State': 'state_code', 'City': 'city_name', 'Street_Address': 'street_address', 'Zip': 'zip'}
+
+# Columns of property_staging rows, named after the lookup key and property columns they match
+PROPERTY_STAGING_COLUMNS = (
+    ['property_title']
+    + list(ADDRESS_STAGING_COLUMNS.values())
+    + [LOOKUP_TABLES[table][1][0] for table, _ in SIMPLE_LOOKUPS.values()]
+    + [column.lower() for column in PROPERTY_VALUE_COLUMNS]
+)
+
+# property_staging columns matched against lookup values; staged as they are, like property_keys leaves them
+PROPERTY_STAGING_KEYS = list(ADDRESS_STAGING_COLUMNS.values()) + [LOOKUP_TABLES[table][1][0] for table, _ in SIMPLE_LOOKUPS.values()]
+
+# How the set-based load resolves the property ids server-side: the address chain, the lead and the simple lookups
+PROPERTY_MERGE_JOINS = [
+    f"LEFT JOIN state_lookup st ON {key_match('st.state_code', 's.state_code')}",
+    f"LEFT JOIN city_lookup ci ON {key_match('ci.city_name', 's.city_name')} AND ci.state_id = st.state_id",
+    f"LEFT JOIN address ad ON {key_match('ad.street_address', 's.street_address')} AND ad.city_id = ci.city_id AND ad.zip = s.zip",
+    f"LEFT JOIN leads le ON {key_match('le.property_title', 's.property_title')}",
+] + [
+    f"LEFT JOIN {table} ON {key_match(f'{table}.{LOOKUP_TABLES[table][1][0]}', f's.{LOOKUP_TABLES[table][1][0]}')}"
+    for table, _ in SIMPLE_LOOKUPS.values()
+]
+PROPERTY_MERGE_EXPRESSIONS = {
+    'Property_Title': 's.property_title',
+    'address_id': 'ad.address_id',
+    'lead_id': 'le.lead_id',
+    **{id_col: f'{table}.{id_col}' for id_col, (table, _) in SIMPLE_LOOKUPS.items()},
+    **{column: f's.{column.lower()}' for column in PROPERTY_VALUE_COLUMNS},
+}
+
+def property_staging_frame(chunk):
+    """
+    Returns a chunk's property_staging frame: the same cleaned keys and values the row
+    builder resolves, before any id is looked up. Serialize it with
+    frame_rows(frame, 'property_staging', keys=PROPERTY_STAGING_KEYS), so a literal 'Null'
+    key still matches its lookup row.
+    """
+    df = chunk.table_frame('property')
+    keys = property_keys(df)
+    columns = {'property_title': df['Property_Title'].str.strip()}
+    columns.update({staged: keys[column] for column, staged in ADDRESS_STAGING_COLUMNS.items()})
+    columns.update({LOOKUP_TABLES[table][1][0]: keys[column] for table, column in SIMPLE_LOOKUPS.values()})
+    columns.update({column.lower(): df[column] for column in PROPERTY_VALUE_COLUMNS})
+    return pd.DataFrame(columns, index=df.index)[PROPERTY_STAGING_COLUMNS]
+
+def property_staged_writer(cursor, load_mode=DEFAULT_LOAD_MODE, batch_size=DEFAULT_BATCH_SIZE, update=False):
+    """
+    Returns a function loading one dataset chunk through property_staging: the cleaned rows
+    are staged with the selected load mode, then one INSERT ... SELECT resolves the address
+    chain, lead and lookup ids server-side. Inserts the same rows as property_row_builder
+    without holding lookup indexes in memory. The function returns
+    (WriteCounts, staged titles).
+    """
+    merge = StagedMerge('property', PROPERTY_COLUMNS, PROPERTY_MERGE_EXPRESSIONS, PROPERTY_MERGE_JOINS,
+                        required=('ad.address_id', 'le.lead_id'), update=update, staged_columns=PROPERTY_STAGING_COLUMNS)
+    reset_staging(cursor, 'property')
+
+    def write_chunk(chunk):
+        with metrics.stage('property', 'extract') as stage:
+            frame = property_staging_frame(chunk)
+            stage.rows = len(frame)
+        with metrics.stage('property', 'serialize') as stage:
+            rows = frame_rows(frame, 'property_staging', keys=PROPERTY_STAGING_KEYS)
+            stage.rows = len(rows)
+        with metrics.stage('property', 'stage') as stage:
+            staged = stage_rows(cursor, 'property', PROPERTY_STAGING_COLUMNS, rows, load_mode, batch_size)
+            stage.rows = staged.inserted
+        with metrics.stage('property', 'write') as stage:
+            counts = merge.run(cursor, staged.inserted)
+            stage.rows = counts.written
+        counts.rejected += staged.rejected
+        return counts, [row[0] for row in rows]
+    return write_chunk
+
+# Lookup indexes of a shard worker process, set once when the worker starts
+_shard_indexes = None
+
+def _init_shard_worker(lookup_indexes):
+    global _shard_indexes
+    _shard_indexes = lookup_indexes
+
+def _transform_shard(df):
+    # Runs in a shard worker: lead ids are already resolved by the loader
+    resolve_lookup_ids(df, _shard_indexes)
+    return frame_rows(df[PROPERTY_COLUMNS], 'property')
+
+def property_row_builder(cursor, shard_pool=None):
+    """
+    Returns a function turning one dataset chunk into property row tuples, with the
+    address chain, lead and lookup ids resolved, and the Property_Title of every row.
+    Shared by the synchronous loader and the async pipeline. With a sharding.ShardPool the lookup resolution and serialization
+    of every chunk are split across its worker processes.
+    """
+    with metrics.stage('property', 'lookup'):
+        lookup_indexes = property_lookup_indexes(cursor)
+    if shard_pool is not None:
+        shard_pool.start(_init_shard_worker, (lookup_indexes,))
+
+    def build_rows(chunk):
+        with metrics.stage('property', 'extract') as stage:
+            df = chunk.table_frame('property')
+            stage.rows = len(df)
+
+        if shard_pool is not None:
+            # Lead ids need the title index (and its connection), so they are resolved here
+            with metrics.stage('property', 'resolve') as stage:
+                resolve_lead_ids(df, cursor)
+                stage.rows = len(df)
+            with metrics.stage('property', 'transform') as stage:
+                rows = shard_pool.map(_transform_shard, df, 'Property_Title')
+                stage.rows = len(rows)
+            return rows, [row[0] for row in rows]
+
+        # Step 4: Resolve the address chain, lead and lookup ids in place
+        try:
+            with metrics.stage('property', 'resolve') as stage:
+                resolve_property_ids(df, lookup_indexes, cursor)
+                stage.rows = len(df)
+            logging.info("Successfully resolved address, lead, and lookup ids.")
+        except Exception as e:
+            logging.error(f"Error resolving property ids: {e}")
+            print("Error: Could not resolve property lookup ids.")
+            raise
+
+        # Step 5: Coerce to the table's DDL column types and convert to row tuples (empty, 'Null' and NaN become None)
+        with metrics.stage('property', 'serialize') as stage:
+            rows = frame_rows(df[PROPERTY_COLUMNS], 'property')
+            stage.rows = len(rows)
+        return rows, [row[0] for row in rows]
+    return build_rows
+
+@instrumented('property')
+def load_property_data(source, batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE, update=False, resume=False,
+                       shard_workers=DEFAULT_SHARD_WORKERS, shard_mode=DEFAULT_SHARD_MODE, staged=False):
+    # Staged loads resolve ids server-side, so there is no client-side transform to shard
+    shard_pool = ShardPool(shard_workers, shard_mode) if shard_workers > 1 and not staged else None
+    conn = cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        # Step 1: Open the shared dataset
+        try:
+            dataset = open_dataset(source)
+            logging.info(f"Opened dataset from {dataset.source}")
+        except Exception as e:
+            logging.error(f"Error loading JSON data: {e}")
+            print("Error: Could not load JSON data.")
+            raise
+
+        # Resume after the last chunk an interrupted load of the same file committed
+        checkpoint = open_checkpoint(cursor, 'property', dataset, resume, parent='leads')
+
+        # Step 3: Prebuild id indexes from the shared lookup cache (in the row builder), or ready the staging table
+        try:
+            if staged:
+                write_chunk = property_staged_writer(cursor, load_mode, batch_size, update)
+            else:
+                build_rows = property_row_builder(cursor, shard_pool)
+            logging.info("Lookup tables loaded successfully.")
+        except Exception as e:
+            logging.error(f"Error loading lookup tables: {e}")
+            print("Error: Could not load lookup tables.")
+            raise
+
+        # Process the feed chunk by chunk; an in-memory dataset is a single chunk
+        try:
+            counts = WriteCounts()
+            for chunk_index, chunk in checkpoint.chunks(dataset):
+                if staged:
+                    chunk_counts, titles = write_chunk(chunk)
+                else:
+                    rows, titles = build_rows(chunk)
+
+                    # Write with the selected load mode (batched INSERT or LOAD DATA LOCAL INFILE)
+                    with metrics.stage('property', 'write') as stage:
+                        chunk_counts = write_rows(cursor, 'property', PROPERTY_COLUMNS, rows, load_mode, batch_size, update)
+                        stage.rows = chunk_counts.written
+
+                # Record the new property ids so the child loaders skip re-reading the property table
+                with metrics.stage('property', 'index'):
+                    title_index.record(cursor, 'property', titles)
+                counts += chunk_counts
+
+                # Commit every chunk together with its checkpoint, so a rerun resumes after it
+                with metrics.stage('property', 'commit'):
+                    checkpoint.save(cursor, chunk_index, chunk_counts.written)
+                    conn.commit()
+
+            logging.info(f"Wrote rows into property table: {counts}.")
+            with metrics.stage('property', 'commit'):
+                checkpoint.finish(cursor)
+                conn.commit()
+            logging.info("Database commit successful for property inserts.")  # Log DB commit
+        except Exception as e:
+            logging.error(f"Error during property insert: {e}")
+            print("Error: Could not insert property data.")
+            raise
+    except Exception as e:
+        logging.error(f"Failed to load property data: {e}")
+        print("Error: Could not load property data.")
+        raise
+    finally:
+        # Closed here so a failure opening the dataset or checkpoint does not leak the pooled connection
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception as e:
+                logging.warning(f"Error closing cursor: {e}")
+        if conn is not None:
+            try:
+                conn.close()
+                logging.info("Database connection closed successfully.")
+            except Exception as e:
+                logging.warning(f"Error closing connection: {e}")
+        if shard_pool is not None:
+            shard_pool.close()
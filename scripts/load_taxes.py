@@ -1,96 +1,143 @@
-import pandas as pd
-from db import get_connection
-from extraction import extract_json
-import logging
-import numpy as np
-
-def get_lookup_df(cursor, table, id_col, value_col):
-    """
-    Helper function to fetch lookup tables from the database and return as DataFrame.
-    """
-    try:
-        cursor.execute(f"SELECT {id_col}, {value_col} FROM {table}")
-        rows = cursor.fetchall()
-        logging.info(f"Loaded {len(rows)} rows from {table}")
-        return pd.DataFrame(rows, columns=[id_col, value_col])
-    except Exception as e:
-        logging.error(f"Error loading lookup table {table}: {e}")
-        return pd.DataFrame(columns=[id_col, value_col])
-    
-def load_taxes_data(file_path):
-    """
-    Loads taxes data from a JSON file, merges with property data, and inserts records into the taxes table.
-    """
-    try:
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-        logging.info("Database connection established.")
-
-        # Step 1: Load raw JSON into DataFrame
-        try:
-            records = extract_json(file_path)
-            df = pd.DataFrame(records)
-            logging.info(f"Loaded {len(df)} records from {file_path}")
-        except Exception as e:
-            logging.error(f"Error loading JSON data: {e}")
-            print("Error: Could not load JSON data.")
-            return
-        
-        # Step 2: Fetch property table data for mapping
-        try:
-            cursor.execute("SELECT property_id, property_title FROM property")
-            property_rows = cursor.fetchall()
-            property_df = pd.DataFrame(property_rows, columns= ['property_id', 'property_title'])
-            logging.info(f"Fetched {len(property_df)} property records from database.")
-        except Exception as e:
-            logging.error(f"Error fetching property data: {e}")
-            print("Error: Could not fetch property data.")
-            cursor.close()
-            conn.close()
-            return
-           
-        # Step 3: Merge property data with taxes data
-        df = df.merge(property_df, left_on='Property_Title', right_on='property_title', how='left', suffixes=('', '_property'))
-        logging.info("Successfully merged property data with taxes DataFrame.")
-
-        # Step 4: Prepare and insert data into taxes table
-        values = df[['property_id', 'Taxes']]
-        values = values.replace('', None).replace('Null', None)
-            
-        insert_count = 0
-        for value in values.iterrows():
-            # Replace NaN, np.nan, or blank with None for SQL compatibility
-            row = [val if not (pd.isna(val) or val is np.nan or val==' ') else None for val in value[1]]
-            try:
-                cursor.execute(
-                    f"INSERT IGNORE INTO taxes (property_id, tax_value) VALUES ('%s','%s')", row
-                )
-                insert_count += 1
-                logging.debug(f"Inserted row into taxes: {row}")  # Log each successful insert at debug level
-            except Exception as e:
-                logging.error(f"Error inserting row into taxes: {e}")
-                print(f"Error inserting into taxes: {e}")
-
-        logging.info(f"Inserted {insert_count} rows into taxes table.")  # Log total successful inserts
-        conn.commit()
-        logging.info("Database commit successful for taxes inserts.")  # Log DB commit
-    except Exception as e:
-        logging.error(f"Error in load_taxes_data: {e}")
-        print("Error: Could not load taxes data. Check logs for details.")
-    finally:
-        try:
-            cursor.close()
-            logging.info("Database cursor closed.")
-        except Exception as e:
-            logging.warning(f"Error closing cursor: {e}")
-        try:
-            conn.close()
-            logging.info("Database connection closed.")
-        except Exception as e:
-            logging.warning(f"Error closing connection: {e}")
-
+from db import get_connection
+from bulk_writer import DEFAULT_BATCH_SIZE, WriteCounts, frame_rows, insert_rows
+from dataset import open_dataset
+from title_index import title_index
+from checkpoint import open_checkpoint
+from staging import StagedMerge, key_match, reset_staging, stage_rows
+from metrics import metrics, instrumented
+import logging
+
+# Columns inserted into the taxes table
+TAXES_COLUMNS = ['property_id', 'tax_value']
+
+def taxes_row_builder(cursor):
+    """
+    Returns a function turning one dataset chunk into taxes row tuples, merged with the
+    chunk's property ids, and the Property_Title of every row. Shared by the synchronous
+    loader and the async pipeline.
+    """
+    def build_rows(chunk):
+        with metrics.stage('taxes', 'extract') as stage:
+            df = chunk.table_frame('taxes')
+            stage.rows = len(df)
+
+        # Step 3: Merge property data with taxes data
+        # Property ids of the chunk's titles come from the shared title index
+        with metrics.stage('taxes', 'lookup') as stage:
+            property_df = title_index.frame(cursor, 'property', chunk.titles())
+            stage.rows = len(property_df)
+        with metrics.stage('taxes', 'resolve') as stage:
+            df = df.merge(property_df, left_on='Property_Title', right_on='property_title', how='left', suffixes=('', '_property'))
+            stage.rows = len(df)
+        logging.info("Successfully merged property data with taxes DataFrame.")
+
+        # Step 4: Coerce to the table's DDL column types and convert to row tuples (empty, 'Null' and NaN become None)
+        with metrics.stage('taxes', 'serialize') as stage:
+            rows = frame_rows(df[['property_id', 'Taxes']], 'taxes', TAXES_COLUMNS)
+            stage.rows = len(rows)
+        return rows, df['Property_Title'].tolist()
+    return build_rows
+
+# Columns of taxes_staging rows
+TAXES_STAGING_COLUMNS = ['property_title', 'tax_value']
+
+def taxes_staged_writer(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Returns a function loading one dataset chunk through taxes_staging: the feed's titles and
+    tax values are staged, then one INSERT ... SELECT joins them to the property table
+    server-side. Inserts the same rows as taxes_row_builder + insert_rows.
+    The function returns WriteCounts.
+    """
+    merge = StagedMerge(
+        'taxes', TAXES_COLUMNS, {'property_id': 'p.property_id', 'tax_value': 's.tax_value'},
+        [f"LEFT JOIN property p ON {key_match('p.property_title', 's.property_title')}"],
+        required=('p.property_id',), staged_columns=TAXES_STAGING_COLUMNS
+    )
+    reset_staging(cursor, 'taxes')
+
+    def write_chunk(chunk):
+        with metrics.stage('taxes', 'extract') as stage:
+            df = chunk.table_frame('taxes')
+            stage.rows = len(df)
+        with metrics.stage('taxes', 'serialize') as stage:
+            rows = frame_rows(df[['Property_Title', 'Taxes']], 'taxes_staging', TAXES_STAGING_COLUMNS)
+            stage.rows = len(rows)
+        with metrics.stage('taxes', 'stage') as stage:
+            staged = stage_rows(cursor, 'taxes', TAXES_STAGING_COLUMNS, rows, batch_size=batch_size)
+            stage.rows = staged.inserted
+        with metrics.stage('taxes', 'write') as stage:
+            counts = merge.run(cursor, staged.inserted)
+            stage.rows = counts.written
+        counts.rejected += staged.rejected
+        return counts
+    return write_chunk
+
+@instrumented('taxes')
+def load_taxes_data(source, batch_size=DEFAULT_BATCH_SIZE, resume=False, staged=False):
+    """
+    Loads taxes data from a JSON file or shared PropertyDataset, merges with property data, and inserts records into the taxes table.
+    """
+    try:
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        logging.info("Database connection established.")
+
+        # Step 1: Open the shared dataset
+        try:
+            dataset = open_dataset(source)
+            logging.info(f"Opened dataset from {dataset.source}")
+        except Exception as e:
+            logging.error(f"Error loading JSON data: {e}")
+            print("Error: Could not load JSON data.")
+            raise
+
+        # Resume after the last chunk an interrupted load of the same file committed
+        checkpoint = open_checkpoint(cursor, 'taxes', dataset, resume, parent='property')
+
+        # Steps 3-4 (extract, merge with property ids, serialize) run per chunk in the row builder
+        # A staged load joins the staged rows to the property table server-side instead
+        if staged:
+            write_chunk = taxes_staged_writer(cursor, batch_size)
+        else:
+            build_rows = taxes_row_builder(cursor)
+
+        # Process the feed chunk by chunk; an in-memory dataset is a single chunk
+        counts = WriteCounts()
+        for chunk_index, chunk in checkpoint.chunks(dataset):
+            if staged:
+                chunk_counts = write_chunk(chunk)
+            else:
+                rows, titles = build_rows(chunk)
+
+                # Insert in batches; failed batches are retried row by row
+                with metrics.stage('taxes', 'write') as stage:
+                    chunk_counts = insert_rows(cursor, 'taxes', TAXES_COLUMNS, rows, batch_size, sources=titles)
+                    stage.rows = chunk_counts.written
+            counts += chunk_counts
+
+            # Commit every chunk together with its checkpoint, so a rerun resumes after it
+            with metrics.stage('taxes', 'commit'):
+                checkpoint.save(cursor, chunk_index, chunk_counts.written)
+                conn.commit()
+        logging.info(f"Wrote rows into taxes table: {counts}.")
+        with metrics.stage('taxes', 'commit'):
+            checkpoint.finish(cursor)
+            conn.commit()
+        logging.info("Database commit successful for taxes inserts.")  # Log DB commit
+    except Exception as e:
+        logging.error(f"Error in load_taxes_data: {e}")
+        print("Error: Could not load taxes data. Check logs for details.")
+        raise
+    finally:
+        try:
+            cursor.close()
+            logging.info("Database cursor closed.")
+        except Exception as e:
+            logging.warning(f"Error closing cursor: {e}")
+        try:
+            conn.close()
+            logging.info("Database connection closed.")
+        except Exception as e:
+            logging.warning(f"Error closing connection: {e}")
+
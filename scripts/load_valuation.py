@@ -1,137 +1,113 @@
-import pandas as pd
-from db import get_connection
-from extraction import extract_json
-import logging
-import numpy as np
-
-def load_valuation_data(file_path):
-    """
-    Loads valuation data from a JSON file, merges with property data, and inserts records into the valuation table.
-    """
-    try:
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-
-        # Step 1: Load raw JSON into DataFrame
-        try:
-            records = extract_json(file_path)
-            logging.info(f"Loaded {len(records)} records from {file_path}")
-        except Exception as e:
-            logging.error(f"Error loading JSON data: {e}")
-            print("Error: Could not load JSON data.")
-            return
-        
-        # Step 2: Fetch property table data
-        try:
-            cursor.execute("SELECT property_id, property_title FROM property")
-            property_rows = cursor.fetchall()
-            property_df = pd.DataFrame(property_rows, columns= ['property_id', 'property_title'])
-            logging.info(f"Loaded {len(property_df)} rows from property table")
-        except Exception as e:
-            logging.error(f"Error fetching property data: {e}")
-            print("Error: Could not fetch property data.")
-            cursor.close()
-            conn.close()
-            return
-    
-        # Step 3: Prepare valuation DataFrame from JSON records
-        columns = [
-            "Property_Title",
-            "Previous_Rent",
-            "List_Price",
-            "Zestimate",
-            "ARV",
-            "Expected_Rent",
-            "Rent_Zestimate",
-            "Low_FMR",
-            "High_FMR",
-            "Redfin_Value"
-        ]
-        rows= []
-        for record in records:
-            property_title = record.get("Property_Title")
-            valuation_details = record.get("Valuation", [])
-            for detail in valuation_details:
-                Previous_Rent = detail.get("Previous_Rent")
-                List_Price = detail.get("List_Price")   
-                Zestimate = detail.get("Zestimate")
-                ARV = detail.get("ARV")
-                Expected_Rent = detail.get("Expected_Rent")
-                Rent_Zestimate = detail.get("Rent_Zestimate")   
-                Low_FMR = detail.get("Low_FMR")
-                High_FMR = detail.get("High_FMR")
-                Redfin_Value = detail.get("Redfin_Value")
-                rows.append([
-                    property_title,
-                    Previous_Rent,
-                    List_Price,
-                    Zestimate,
-                    ARV,
-                    Expected_Rent,
-                    Rent_Zestimate, 
-                    Low_FMR,
-                    High_FMR,   
-                    Redfin_Value
-                ])
-        valuation_df = pd.DataFrame(rows, columns=columns)
-        logging.info(f"Valuation data extracted with {len(valuation_df)} records.")
-
-        # Step 4: Merge property data with valuation data
-        property_df = property_df.merge(valuation_df, left_on='property_title', right_on='Property_Title', how='left', suffixes=('', '_valuation'))
-        logging.info("Successfully merged property data with valuation DataFrame.")
-
-        # Step 5: Prepare and insert data into valuation table
-        insert_cols = [
-            "property_id",
-            "Previous_Rent",
-            "List_Price",
-            "Zestimate",
-            "ARV",
-            "Expected_Rent",
-            "Rent_Zestimate",
-            "Low_FMR",
-            "High_FMR",
-            "Redfin_Value"
-        ]
-
-        values = property_df[insert_cols]
-        columns = ', '.join(insert_cols)
-        values = values.replace('', None).replace('Null', None)
-            
-        insert_count = 0
-        for value in values.iterrows():
-            # Replace NaN, np.nan, or blank with None for SQL compatibility
-            row = [val if not (pd.isna(val) or val is np.nan or val==' ') else None for val in value[1]]
-            try:
-                cursor.execute(
-                    f"INSERT IGNORE INTO valuation ({columns}) VALUES ({', '.join(['%s'] * len(insert_cols))})", row
-                )
-                insert_count += 1
-                logging.debug(f"Inserted row into valuation: {row}")  # Log each successful insert at debug level
-            except Exception as e:
-                logging.error(f"Error inserting row into valuation: {e}")
-                print(f"Error inserting into valuation: {e}")
-
-        logging.info(f"Inserted {insert_count} rows into valuation table.")
-        conn.commit()
-        logging.info("Database commit successful for valuation inserts.")
-    except Exception as e:
-        logging.error(f"Failed to load valuation data: {e}")
-        print("Error: Could not load valuation data.")
-    finally:
-        try:
-            cursor.close()
-            logging.info("Database cursor closed.")
-        except Exception as e:
-            logging.warning(f"Error closing cursor: {e}")
-        try:
-            conn.close()
-            logging.info("Database connection closed.")
-        except Exception as e:
-            logging.warning(f"Error closing connection: {e}")
-
+from db import get_connection
+from bulk_writer import DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE, WriteCounts, frame_rows, write_rows
+from dataset import open_dataset
+from title_index import title_index
+from checkpoint import open_checkpoint
+from metrics import metrics, instrumented
+import logging
+
+# Columns inserted into the valuation table
+VALUATION_COLUMNS = [
+    "property_id",
+    "Previous_Rent",
+    "List_Price",
+    "Zestimate",
+    "ARV",
+    "Expected_Rent",
+    "Rent_Zestimate",
+    "Low_FMR",
+    "High_FMR",
+    "Redfin_Value"
+]
+
+def valuation_row_builder(cursor):
+    """
+    Returns a function turning one dataset chunk into valuation row tuples, merged with the
+    chunk's property ids, and the Property_Title of every row. Shared by the synchronous
+    loader and the async pipeline.
+    """
+    def build_rows(chunk):
+        # Step 3: Get the exploded valuation DataFrame for this chunk
+        with metrics.stage('valuation', 'extract') as stage:
+            valuation_df = chunk.table_frame('valuation')
+            stage.rows = len(valuation_df)
+        logging.info(f"Valuation data extracted with {len(valuation_df)} records.")
+
+        # Step 4: Merge the chunk's properties with valuation data
+        # Property ids of the chunk's titles come from the shared title index
+        with metrics.stage('valuation', 'lookup') as stage:
+            chunk_property_df = title_index.frame(cursor, 'property', chunk.titles())
+            stage.rows = len(chunk_property_df)
+        with metrics.stage('valuation', 'resolve') as stage:
+            chunk_property_df = chunk_property_df.merge(valuation_df, left_on='property_title', right_on='Property_Title', how='left', suffixes=('', '_valuation'))
+            stage.rows = len(chunk_property_df)
+        logging.info("Successfully merged property data with valuation DataFrame.")
+
+        # Step 5: Coerce to the table's DDL column types and convert to row tuples (empty, 'Null' and NaN become None)
+        with metrics.stage('valuation', 'serialize') as stage:
+            rows = frame_rows(chunk_property_df[VALUATION_COLUMNS], 'valuation')
+            stage.rows = len(rows)
+        return rows, chunk_property_df['property_title'].tolist()
+    return build_rows
+
+@instrumented('valuation')
+def load_valuation_data(source, batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE, resume=False):
+    """
+    Loads valuation data from a JSON file or shared PropertyDataset, merges with property data, and inserts records into the valuation table.
+    """
+    try:
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        # Step 1: Open the shared dataset
+        try:
+            dataset = open_dataset(source)
+            logging.info(f"Opened dataset from {dataset.source}")
+        except Exception as e:
+            logging.error(f"Error loading JSON data: {e}")
+            print("Error: Could not load JSON data.")
+            raise
+
+        # Resume after the last chunk an interrupted load of the same file committed
+        checkpoint = open_checkpoint(cursor, 'valuation', dataset, resume, parent='property')
+
+        # Steps 3-5 (extract, merge with property ids, serialize) run per chunk in the row builder
+        build_rows = valuation_row_builder(cursor)
+
+        # Process the feed chunk by chunk; an in-memory dataset is a single chunk
+        counts = WriteCounts()
+        for chunk_index, chunk in checkpoint.chunks(dataset):
+            rows, titles = build_rows(chunk)
+
+            # Write with the selected load mode (batched INSERT or LOAD DATA LOCAL INFILE)
+            with metrics.stage('valuation', 'write') as stage:
+                chunk_counts = write_rows(cursor, 'valuation', VALUATION_COLUMNS, rows, load_mode, batch_size, sources=titles)
+                stage.rows = chunk_counts.written
+            counts += chunk_counts
+
+            # Commit every chunk together with its checkpoint, so a rerun resumes after it
+            with metrics.stage('valuation', 'commit'):
+                checkpoint.save(cursor, chunk_index, chunk_counts.written)
+                conn.commit()
+        logging.info(f"Wrote rows into valuation table: {counts}.")
+        with metrics.stage('valuation', 'commit'):
+            checkpoint.finish(cursor)
+            conn.commit()
+        logging.info("Database commit successful for valuation inserts.")
+    except Exception as e:
+        logging.error(f"Failed to load valuation data: {e}")
+        print("Error: Could not load valuation data.")
+        raise
+    finally:
+        try:
+            cursor.close()
+            logging.info("Database cursor closed.")
+        except Exception as e:
+            logging.warning(f"Error closing cursor: {e}")
+        try:
+            conn.close()
+            logging.info("Database connection closed.")
+        except Exception as e:
+            logging.warning(f"Error closing connection: {e}")
+
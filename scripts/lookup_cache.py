@@ -0,0 +1,300 @@
+# Import necessary libraries
+import os
+import pickle
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+# Lookup tables resolved by value: table → (id column, key columns)
+LOOKUP_TABLES = {
+    "source_lookup": ("source_id", ("source_name",)),
+    "selling_reason_lookup": ("selling_reason_id", ("selling_reason",)),
+    "final_reviewer_lookup": ("reviewer_id", ("reviewer_name",)),
+    "market_lookup": ("market_id", ("market_name",)),
+    "flood_lookup": ("flood_id", ("flood_zone",)),
+    "property_type_lookup": ("type_id", ("type_name",)),
+    "parking_type_lookup": ("parking_id", ("parking_desc",)),
+    "layout_type_lookup": ("layout_id", ("layout_desc",)),
+    "subdivision_lookup": ("subdivision_id", ("subdivision_name",)),
+    "state_lookup": ("state_id", ("state_code",)),
+    "city_lookup": ("city_id", ("city_name", "state_id")),
+    "address": ("address_id", ("street_address", "city_id", "zip")),
+    "hoa_lookup": ("hoa_lookup_id", ("hoa_value", "hoa_flag")),
+}
+
+# Where the cache is persisted between runs; set PIPELINE_LOOKUP_CACHE to '' to disable
+DEFAULT_CACHE_PATH = os.environ.get("PIPELINE_LOOKUP_CACHE", "lookup_cache.pkl")
+
+# Keys per query when fetching ids for values missing from the cache
+MISS_QUERY_SIZE = 1000
+
+def normalize_value(value):
+    """
+    Normalizes one key part so feed values and database values compare equal.
+    """
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float):
+        if value != value:
+            return None  # NaN
+        if value.is_integer():
+            return int(value)
+    return value
+
+def make_key(parts):
+    """
+    Builds a cache key from key parts: a scalar for one-column keys, a tuple otherwise.
+    """
+    if len(parts) == 1:
+        return normalize_value(parts[0])
+    return tuple(normalize_value(part) for part in parts)
+
+def build_index(mapping, width=1):
+    """
+    Turns a key → id dictionary into (pandas Index, id array) for vectorized resolution.
+    Multi-column keys become a MultiIndex with one level per key column.
+    """
+    keys = list(mapping)
+    ids = np.fromiter(mapping.values(), dtype=np.int64, count=len(keys))
+    if width == 1:
+        index = pd.Index(keys, dtype=object)
+    elif keys:
+        index = pd.MultiIndex.from_tuples(keys)
+    else:
+        index = pd.MultiIndex.from_arrays([[]] * width)
+    return index, ids
+
+def resolve_ids(index, ids, *columns):
+    """
+    Maps one or more key columns to ids with a single Index.get_indexer call.
+    Returns int64 ids when every key matched, otherwise float64 with NaN for misses
+    (the same dtypes a left merge would produce).
+    """
+    keys = pd.Index(columns[0]) if len(columns) == 1 else pd.MultiIndex.from_arrays(columns)
+    positions = index.get_indexer(keys)
+    found = positions >= 0
+    if found.all():
+        return ids[positions]
+    if not len(ids):
+        return np.full(len(positions), np.nan)
+    return np.where(found, ids[positions], np.nan)
+
+
+class LookupCache:
+    """
+    In-process value → id cache for the lookup tables, shared by every loader.
+    Tables are read from the database (or from the on-disk copy) once, and values
+    inserted later are pulled in with targeted queries instead of full rescans.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._maps = {}
+        self._max_ids = {}
+        self._synced = set()
+        self._versions = {}
+        self._indexes = {}
+        self._lock = threading.RLock()
+        self._disk_loaded = False
+
+    def warm(self, cursor, tables=None):
+        """
+        Makes sure the given lookup tables (all by default) are cached.
+        A persisted cache is reused: only rows added since it was saved are fetched,
+        and a table whose ids went backwards (truncated/rebuilt) is reloaded in full.
+        """
+        tables = list(tables or LOOKUP_TABLES)
+        with self._lock:
+            if not self._disk_loaded:
+                self._load_from_disk()
+            for table in tables:
+                if table not in self._maps:
+                    self._load_table(cursor, table)
+                elif table not in self._synced:
+                    self._sync_table(cursor, table)
+
+    def mapping(self, cursor, table):
+        """
+        Returns the key → id dictionary for a table, warming it first if needed.
+        """
+        if table not in self._synced:
+            self.warm(cursor, [table])
+        return self._maps[table]
+
+    def frame(self, cursor, table):
+        """
+        Returns a table's cached rows as a DataFrame with the id column and key columns.
+        """
+        id_col, key_cols = LOOKUP_TABLES[table]
+        mapping = self.mapping(cursor, table)
+        if len(key_cols) == 1:
+            rows = [(lookup_id, key) for key, lookup_id in mapping.items()]
+        else:
+            rows = [(lookup_id,) + key for key, lookup_id in mapping.items()]
+        return pd.DataFrame(rows, columns=[id_col, *key_cols])
+
+    def index(self, cursor, table):
+        """
+        Returns (Index, id array) for a table, rebuilt only when its cached values changed.
+        """
+        _, key_cols = LOOKUP_TABLES[table]
+        mapping = self.mapping(cursor, table)
+        with self._lock:
+            version = self._versions.get(table, 0)
+            cached = self._indexes.get(table)
+            if cached is None or cached[0] != version:
+                cached = (version, build_index(mapping, len(key_cols)))
+                self._indexes[table] = cached
+            return cached[1]
+
+    def resolve(self, cursor, table, *columns):
+        """
+        Resolves key columns (one Series per key column) to the table's ids.
+        """
+        return resolve_ids(*self.index(cursor, table), *columns)
+
+    def ids(self, cursor, table, keys):
+        """
+        Returns ids for the given keys (scalars, or tuples for multi-column keys).
+        Keys not cached yet are fetched from the database in bulk; keys that do not
+        exist there either map to None.
+        """
+        mapping = self.mapping(cursor, table)
+        normalized = [make_key(key if isinstance(key, tuple) else (key,)) for key in keys]
+        missing = list({
+            key for key in normalized
+            if key not in mapping and key is not None and not (isinstance(key, tuple) and None in key)
+        })
+        if missing:
+            self._fetch_keys(cursor, table, missing)
+        return [mapping.get(key) for key in normalized]
+
+    def add(self, table, key, lookup_id):
+        """
+        Records a newly inserted lookup value.
+        """
+        with self._lock:
+            # Tables not cached yet will pick the value up when they are first loaded
+            if table not in self._maps:
+                return
+            self._maps[table][make_key(key if isinstance(key, tuple) else (key,))] = lookup_id
+            self._max_ids[table] = max(self._max_ids.get(table, 0), lookup_id)
+            self._changed(table)
+
+    def save(self, path=None):
+        """
+        Persists the cache so the next run can skip full lookup table scans.
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            snapshot = {"maps": self._maps, "max_ids": self._max_ids}
+            with open(path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        logging.info(f"Saved lookup cache with {len(snapshot['maps'])} tables to {path}.")
+
+    def clear(self):
+        """
+        Drops everything cached in memory (the on-disk copy is left alone).
+        """
+        with self._lock:
+            self._maps = {}
+            self._max_ids = {}
+            self._synced = set()
+            self._versions = {}
+            self._indexes = {}
+
+    def _changed(self, table):
+        # Invalidates the prebuilt index of a table whose cached values changed
+        self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _load_from_disk(self):
+        self._disk_loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+            self._maps = snapshot["maps"]
+            self._max_ids = snapshot["max_ids"]
+            logging.info(f"Loaded lookup cache for {len(self._maps)} tables from {self.path}.")
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable lookup cache {self.path}: {e}")
+            self._maps = {}
+            self._max_ids = {}
+
+    def _load_table(self, cursor, table):
+        id_col, key_cols = LOOKUP_TABLES[table]
+        cursor.execute(f"SELECT {id_col}, {', '.join(key_cols)} FROM {table}")
+        mapping = {}
+        max_id = 0
+        for row in cursor.fetchall():
+            mapping[make_key(row[1:])] = row[0]
+            max_id = max(max_id, row[0])
+        self._maps[table] = mapping
+        self._max_ids[table] = max_id
+        self._synced.add(table)
+        self._changed(table)
+        logging.info(f"Loaded {len(mapping)} rows from {table} into the lookup cache.")
+
+    def _sync_table(self, cursor, table):
+        # Bring a persisted table up to date using its auto-increment high-water mark
+        id_col, key_cols = LOOKUP_TABLES[table]
+        cursor.execute(f"SELECT MAX({id_col}) FROM {table}")
+        server_max = cursor.fetchone()[0] or 0
+        cached_max = self._max_ids.get(table, 0)
+        if server_max < cached_max or not self._same_row(cursor, table, cached_max):
+            logging.info(f"{table} was truncated or rebuilt since the lookup cache was saved; reloading it.")
+            self._load_table(cursor, table)
+            return
+        if server_max > cached_max:
+            cursor.execute(
+                f"SELECT {id_col}, {', '.join(key_cols)} FROM {table} WHERE {id_col} > %s", (cached_max,)
+            )
+            new_rows = cursor.fetchall()
+            for row in new_rows:
+                self._maps[table][make_key(row[1:])] = row[0]
+            self._max_ids[table] = server_max
+            self._changed(table)
+            logging.info(f"Added {len(new_rows)} new {table} rows to the lookup cache.")
+        self._synced.add(table)
+
+    def _same_row(self, cursor, table, lookup_id):
+        # Spot-check that the cached row at the high-water mark still has the same key
+        if not lookup_id:
+            return True
+        cached_key = next((key for key, cached_id in self._maps[table].items() if cached_id == lookup_id), None)
+        id_col, key_cols = LOOKUP_TABLES[table]
+        cursor.execute(f"SELECT {', '.join(key_cols)} FROM {table} WHERE {id_col} = %s", (lookup_id,))
+        row = cursor.fetchone()
+        return row is not None and make_key(row) == cached_key
+
+    def _fetch_keys(self, cursor, table, keys):
+        id_col, key_cols = LOOKUP_TABLES[table]
+        found = 0
+        for start in range(0, len(keys), MISS_QUERY_SIZE):
+            batch = keys[start:start + MISS_QUERY_SIZE]
+            if len(key_cols) == 1:
+                placeholders = ", ".join(["%s"] * len(batch))
+                params = batch
+                condition = f"{key_cols[0]} IN ({placeholders})"
+            else:
+                row_placeholder = f"({', '.join(['%s'] * len(key_cols))})"
+                placeholders = ", ".join([row_placeholder] * len(batch))
+                params = [part for key in batch for part in key]
+                condition = f"({', '.join(key_cols)}) IN ({placeholders})"
+            cursor.execute(f"SELECT {id_col}, {', '.join(key_cols)} FROM {table} WHERE {condition}", params)
+            with self._lock:
+                for row in cursor.fetchall():
+                    self._maps[table][make_key(row[1:])] = row[0]
+                    self._max_ids[table] = max(self._max_ids.get(table, 0), row[0])
+                    found += 1
+                if found:
+                    self._changed(table)
+        logging.debug(f"Fetched {found} of {len(keys)} uncached keys from {table}.")
+
+
+# Shared cache used by every loader in the process
+lookup_cache = LookupCache()
@@ -0,0 +1,73 @@
+# Import necessary libraries
+import logging
+from dataset import open_dataset
+
+# Leads lookups: JSON field → (lookup table, column)
+LEADS_LOOKUPS = {
+    "Source": ("source_lookup", "source_name"),
+    "Selling_Reason": ("selling_reason_lookup", "selling_reason"),
+    "Final_Reviewer": ("final_reviewer_lookup", "reviewer_name"),
+}
+
+# Property lookups without dependencies: JSON field → (lookup table, column)
+PROPERTY_LOOKUPS = {
+    "Market": ("market_lookup", "market_name"),
+    "Flood": ("flood_lookup", "flood_zone"),
+    "Property_Type": ("property_type_lookup", "type_name"),
+    "Parking": ("parking_type_lookup", "parking_desc"),
+    "Layout": ("layout_type_lookup", "layout_desc"),
+    "Subdivision": ("subdivision_lookup", "subdivision_name"),
+    "State": ("state_lookup", "state_code"),
+}
+
+def harvest_lookups(source):
+    """
+    Collects the distinct values of every lookup table in a single pass over the feed.
+    Returns a dict of table → set of values. City and address entries still carry the
+    state code and city name, since their ids only exist once the parent rows are inserted:
+    city_lookup holds (city, state_code) and address holds (street, city, state_code, zip).
+    """
+    dataset = open_dataset(source)
+    values = {table: set() for table, _ in list(LEADS_LOOKUPS.values()) + list(PROPERTY_LOOKUPS.values())}
+    values["hoa_lookup"] = set()
+    values["city_lookup"] = set()
+    values["address"] = set()
+
+    record_count = 0
+    for record in dataset.iter_records():
+        record_count += 1
+
+        # Leads lookups keep any non-empty value
+        for field, (table, _) in LEADS_LOOKUPS.items():
+            value = record.get(field.capitalize()) or record.get(field)
+            if value:
+                values[table].add(value.strip())
+
+        # Property lookups skip blank values
+        for field, (table, _) in PROPERTY_LOOKUPS.items():
+            value = record.get(field.capitalize()) or record.get(field)
+            if value and value.strip():
+                values[table].add(value.strip())
+
+        # HOA (value, flag) pairs from the nested array
+        for hoa_entry in record.get("HOA") or []:
+            hoa_value = hoa_entry.get("HOA")
+            hoa_flag = hoa_entry.get("HOA_Flag")
+            if hoa_value is not None and hoa_flag is not None:
+                values["hoa_lookup"].add((hoa_value, hoa_flag))
+
+        # City and address chains, resolved to ids at insert time
+        street = record.get("street_address") or record.get("Street_Address")
+        city = record.get("city") or record.get("City")
+        state = record.get("state") or record.get("State")
+        zip_code = record.get("zip") or record.get("Zip")
+        if city and state:
+            values["city_lookup"].add((city.strip(), state.strip()))
+            if street and zip_code:
+                values["address"].add((street.strip(), city.strip(), state.strip(), str(zip_code).strip()))
+
+    logging.info(
+        f"Harvested lookup values from {record_count} records: "
+        + ", ".join(f"{table}={len(table_values)}" for table, table_values in values.items())
+    )
+    return values
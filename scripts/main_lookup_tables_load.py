@@ -1,35 +1,69 @@
-import logging
-from hoa_load_lookups import load_hoa_lookup
-from leads_load_lookups import load_leads_lookups
-from property_load_lookups import load_property_lookups
-
-# Configure logging for the script
-logging.basicConfig(
-    filename='main_lookup_tables_load.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s:%(message)s'
-)
-
-if __name__ == "__main__":
-    try:
-        # Load HOA lookup values from JSON into the database
-        logging.info("Starting HOA lookup table load...")
-        load_hoa_lookup('fake_property_data.json')
-        print("HOA lookups loaded successfully.")
-        logging.info("HOA lookups loaded successfully.")
-
-        # Load leads lookup values (source, selling reason, reviewer) from JSON into the database
-        logging.info("Starting leads lookup tables load...")
-        load_leads_lookups('fake_property_data.json')
-        print("Leads lookups loaded successfully.")
-        logging.info("Leads lookups loaded successfully.")
-
-        # Load property lookup values (market, flood, property type, etc.) from JSON into the database
-        logging.info("Starting property lookup tables load...")
-        load_property_lookups('fake_property_data.json')
-        print("Property lookups loaded successfully.")
-        logging.info("Property lookups loaded successfully.")
-    except Exception as e:
-        # Log any exception that occurs during the lookup table loading process
-        logging.error(f"Error in main lookup tables load: {e}")
+import logging
+import argparse
+from dataset import open_dataset
+from hoa_load_lookups import load_hoa_lookup
+from leads_load_lookups import load_leads_lookups
+from property_load_lookups import load_property_lookups
+from lookup_cache import lookup_cache
+from lookup_harvest import harvest_lookups
+from scheduler import DEFAULT_WORKERS, run_stages
+from profiling import add_profile_arguments, profiler_from_args
+from columnar_store import DEFAULT_COLUMNAR_DIR, open_store
+
+def load_lookup_tables(dataset, max_workers=DEFAULT_WORKERS, profiler=None):
+    """
+    Loads all lookup tables from one shared PropertyDataset.
+    Distinct values for every lookup table are harvested in a single pass, then each
+    table is bulk inserted in dependency order (state before city before address).
+    The HOA, leads and property lookup loaders touch disjoint tables, so they run concurrently.
+    With a profiling.StageProfiler the harvest and every loader are profiled one at a time.
+    """
+    # Collect every lookup value in one pass over the feed
+    harvest = (profiler.wrap("lookup_harvest", harvest_lookups) if profiler else harvest_lookups)(dataset)
+
+    stages = {
+        "hoa_lookups": (lambda: load_hoa_lookup(dataset, harvest), []),
+        "leads_lookups": (lambda: load_leads_lookups(dataset, harvest), []),
+        "property_lookups": (lambda: load_property_lookups(dataset, harvest), []),
+    }
+    if profiler is not None:
+        # Profiled stages run one at a time so each profile only contains its own loader
+        stages = profiler.wrap_stages(stages)
+        max_workers = 1
+    report = run_stages(stages, max_workers, label="lookup tables")
+    print("HOA, leads and property lookups loaded successfully.")
+    logging.info("Lookup tables loaded successfully.")
+
+    # Persist the lookup ids so the main loaders and the next run skip full table scans
+    try:
+        lookup_cache.save()
+    except Exception as e:
+        logging.warning(f"Could not save lookup cache: {e}")
+    return report
+
+if __name__ == "__main__":
+    # Configure logging for the script
+    logging.basicConfig(
+        filename='main_lookup_tables_load.log',
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s:%(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Load the lookup tables from the property feed.")
+    parser.add_argument("file_name", nargs="?", default='fake_property_data.json')
+    parser.add_argument("--columnar-dir", default=DEFAULT_COLUMNAR_DIR,
+                        help="read the feed through the Arrow store in this directory, building it if needed")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        # Parse the input file once and share it across all lookup loaders
+        dataset = open_store(args.file_name, args.columnar_dir) if args.columnar_dir else open_dataset(args.file_name)
+        profiler = profiler_from_args(args)
+        load_lookup_tables(dataset, profiler=profiler)
+        if profiler is not None:
+            print(f"Profiles written; hot functions in {profiler.write_report()}.")
+    except Exception as e:
+        # Log any exception that occurs during the lookup table loading process
+        logging.error(f"Error in main lookup tables load: {e}")
         print("Error: Could not load lookup tables. Check logs for details.")
\ No newline at end of file
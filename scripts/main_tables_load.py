@@ -1,58 +1,131 @@
-from load_leads import load_lead_data
-from load_property import load_property_data
-from load_taxes import load_taxes_data
-from load_rehab import load_rehab_data
-from load_valuation import load_valuation_data
-from load_hoa import load_hoa_data
-import logging 
-
-# Configure logging for the script
-logging.basicConfig(
-    filename='main_tables_load.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s:%(message)s'
-)
-
-if __name__ == "__main__":
-    try:
-        # Set the input file name
-        file_name = 'fake_property_data.json'
-        logging.info(f"Starting main tables load with file: {file_name}")
-
-        # Load lead data into the leads table
-        load_lead_data(file_name)
-        print("Lead data loaded successfully.")
-        logging.info("Lead data loaded successfully.")
-
-        # Load property data into the property table
-        load_property_data(file_name)
-        print("Property data loaded successfully.")
-        logging.info("Property data loaded successfully.")
-        
-        # Load taxes data into the taxes table
-        load_taxes_data(file_name)
-        print("Taxes data loaded successfully.")
-        logging.info("Taxes data loaded successfully.")
-
-        # Load rehab data into the rehab table
-        load_rehab_data(file_name)
-        print("Rehab data loaded successfully.")
-        logging.info("Rehab data loaded successfully.")
-        
-        # Load valuation data into the valuation table
-        load_valuation_data(file_name)
-        print("Valuation data loaded successfully.")
-        logging.info("Valuation data loaded successfully.")
-        
-        # Load HOA data into the hoa table
-        load_hoa_data(file_name)
-        print("HOA data loaded successfully.")
-        logging.info("HOA data loaded successfully.")
-
-        # Log completion of all table loads
-        logging.info("Main tables load completed successfully.")
-
-    except Exception as e:
-        # Log any exception that occurs during the main tables loading process
-        logging.error(f"Error in main tables load: {e}")
+from dataset import open_dataset
+from bulk_writer import DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE
+from load_leads import load_lead_data
+from load_property import load_property_data
+from load_taxes import load_taxes_data
+from load_rehab import load_rehab_data
+from load_valuation import load_valuation_data
+from load_hoa import load_hoa_data
+from scheduler import DEFAULT_WORKERS, run_stages
+from title_index import title_index
+from checkpoint import DEFAULT_RESUME, prepare_checkpoints
+from staging import DEFAULT_STAGING_TABLES, STAGING_TABLES
+from bulk_session import DEFAULT_BULK_SESSION, bulk_session, validate_constraints
+from profiling import add_profile_arguments, profiler_from_args
+from columnar_store import DEFAULT_COLUMNAR_DIR, open_store
+from async_loader import DEFAULT_ASYNC, run_main_tables_async
+import logging 
+import argparse
+
+# Main tables in load order, each with its own resume checkpoint
+MAIN_TABLES = ["leads", "property", "taxes", "rehab", "valuation", "hoa"]
+
+def _stage(loader, message, *args, **kwargs):
+    # Wraps a loader so the scheduler can run it and report it the way the sequential script did
+    # Loaders log and re-raise their errors, so run_stages skips the stages that depend on a failed one
+    def run():
+        loader(*args, **kwargs)
+        print(f"{message} loaded successfully.")
+        logging.info(f"{message} loaded successfully.")
+    return run
+
+def load_main_tables(dataset, batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE, max_workers=DEFAULT_WORKERS,
+                     update=False, profiler=None, resume=DEFAULT_RESUME, bulk=DEFAULT_BULK_SESSION,
+                     staging_tables=DEFAULT_STAGING_TABLES):
+    """
+    Loads all main tables from one shared PropertyDataset.
+    batch_size sets how many rows each multi-row INSERT carries; load_mode selects
+    batched INSERTs or LOAD DATA LOCAL INFILE for the property, rehab, valuation and hoa tables.
+    Tables are loaded as a dependency graph: property waits for leads, and taxes, rehab,
+    valuation and hoa (which only need property_id) run concurrently once property is committed.
+    The leads and property loaders share the ids they write through title_index.
+    With update=True existing leads and property rows are updated in place instead of skipped.
+    With a profiling.StageProfiler every loader is profiled, one table at a time.
+    Every loader commits chunk by chunk; with resume=True (not used for update loads) each
+    commit also records a checkpoint, and a rerun on the same feed file after a failure
+    skips the chunks and tables that were already committed.
+    With bulk=True and all main tables empty, foreign key and unique checks are deferred
+    for the loads and validated with set-based queries afterwards (see bulk_session.py).
+    Tables listed in staging_tables (property, taxes) are loaded through staging tables, with
+    their ids resolved server-side by set-based INSERT ... SELECT (see staging.py).
+    Returns the scheduler report with stage durations, the critical path and, after a bulk
+    session, the constraint violations found.
+    """
+    unknown = set(staging_tables) - set(STAGING_TABLES)
+    if unknown:
+        raise ValueError(f"Cannot stage {', '.join(sorted(unknown))}; staged loads support {STAGING_TABLES}")
+
+    # Ids recorded by an earlier run may belong to rows that were since deleted
+    title_index.clear()
+    resume = resume and not update and prepare_checkpoints(dataset, MAIN_TABLES)
+
+    # Table → (loader stage, tables it depends on)
+    stages = {
+        "leads": (_stage(load_lead_data, "Lead data", dataset, batch_size, update, resume), []),
+        "property": (_stage(load_property_data, "Property data", dataset, batch_size, load_mode, update, resume,
+                            staged="property" in staging_tables), ["leads"]),
+        "taxes": (_stage(load_taxes_data, "Taxes data", dataset, batch_size, resume, staged="taxes" in staging_tables), ["property"]),
+        "rehab": (_stage(load_rehab_data, "Rehab data", dataset, batch_size, load_mode, resume), ["property"]),
+        "valuation": (_stage(load_valuation_data, "Valuation data", dataset, batch_size, load_mode, resume), ["property"]),
+        "hoa": (_stage(load_hoa_data, "HOA data", dataset, batch_size, load_mode, resume), ["property"]),
+    }
+    if profiler is not None:
+        # Profiled stages run one at a time so each profile only contains its own loader
+        stages = profiler.wrap_stages(stages)
+        max_workers = 1
+    violations = {}
+    with bulk_session(MAIN_TABLES, bulk and not update) as deferred:
+        try:
+            report = run_stages(stages, max_workers, label="main tables")
+        finally:
+            # Rows of a failed load were not checked either, so they are validated too
+            if deferred:
+                violations = validate_constraints(MAIN_TABLES)
+    report["constraint_violations"] = violations
+
+    # Log completion of all table loads
+    logging.info("Main tables load completed successfully.")
+    return report
+
+if __name__ == "__main__":
+    # Configure logging for the script
+    logging.basicConfig(
+        filename='main_tables_load.log',
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s:%(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Load the main tables from the property feed.")
+    parser.add_argument("file_name", nargs="?", default='fake_property_data.json')
+    parser.add_argument("--columnar-dir", default=DEFAULT_COLUMNAR_DIR,
+                        help="read the feed through the Arrow store in this directory, building it if needed")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="load every chunk again instead of resuming after the last checkpoint")
+    parser.add_argument("--bulk-session", action="store_true", default=DEFAULT_BULK_SESSION,
+                        help="defer foreign key and unique checks while loading empty tables, then validate them")
+    parser.add_argument("--staging", default=",".join(DEFAULT_STAGING_TABLES),
+                        help="comma-separated tables (property, taxes) to load through staging tables")
+    parser.add_argument("--async", dest="async_mode", action="store_true", default=DEFAULT_ASYNC,
+                        help="load through the asyncio pipeline (needs aiomysql and the MySQL backend)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        # Set the input file name
+        file_name = args.file_name
+        logging.info(f"Starting main tables load with file: {file_name}")
+
+        # Parse the input file once and share it across all table loaders
+        dataset = open_store(file_name, args.columnar_dir) if args.columnar_dir else open_dataset(file_name)
+        if args.async_mode:
+            run_main_tables_async(dataset)
+        else:
+            profiler = profiler_from_args(args)
+            load_main_tables(dataset, profiler=profiler, resume=not args.no_resume, bulk=args.bulk_session,
+                             staging_tables=[table.strip() for table in args.staging.split(",") if table.strip()])
+            if profiler is not None:
+                print(f"Profiles written; hot functions in {profiler.write_report()}.")
+    except Exception as e:
+        # Log any exception that occurs during the main tables loading process
+        logging.error(f"Error in main tables load: {e}")
         print("Error: Could not load main tables. Check logs for details.")
\ No newline at end of file
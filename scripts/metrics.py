@@ -0,0 +1,339 @@
+# Import necessary libraries
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Where the run summary is written; PIPELINE_METRICS_FILE='' disables it
+DEFAULT_SUMMARY_PATH = os.environ.get("PIPELINE_METRICS_FILE", "pipeline_metrics.json")
+
+# Optional Prometheus/OpenMetrics textfile (e.g. for node_exporter's textfile collector)
+DEFAULT_PROMETHEUS_PATH = os.environ.get("PIPELINE_PROMETHEUS_FILE", "")
+
+# How often the memory sampler reads the process RSS, in seconds
+RSS_SAMPLE_INTERVAL = 0.01
+
+def current_rss():
+    """
+    Returns the resident set size of this process in bytes (Linux), or None elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def max_rss():
+    """
+    Returns the process-wide RSS high-water mark in bytes.
+    """
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+class PeakRSSSampler:
+    """
+    Context manager sampling RSS on a background thread to find the peak during a block.
+    Falls back to the process-wide ru_maxrss where /proc is not available.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if current_rss() is None:
+            return self
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is None:
+            self.peak = max_rss()
+            return False
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss() or 0)
+        return False
+
+
+class StageMetrics:
+    """
+    Totals for one (loader, stage) pair, accumulated over every time the stage ran
+    (e.g. once per chunk).
+    """
+
+    def __init__(self, loader, stage):
+        self.loader = loader
+        self.stage = stage
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.round_trips = 0
+        self.peak_rss = 0
+
+    def as_dict(self):
+        return {
+            "loader": self.loader,
+            "stage": self.stage,
+            "calls": self.calls,
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows / self.seconds, 1) if self.rows and self.seconds > 0 else None,
+            "round_trips": self.round_trips,
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+        }
+
+
+class StageTimer:
+    """
+    Handle yielded by RunMetrics.stage; set .rows to the number of rows the stage handled.
+    """
+
+    def __init__(self, rows=0):
+        self.rows = rows
+        self.round_trips = 0
+        self.peak_rss = current_rss() or 0
+
+
+class RunMetrics:
+    """
+    Collects wall time, rows, rows/sec, round trips and memory high-water marks per loader
+    stage for one pipeline run. Safe to use from the scheduler's worker threads: each
+    thread has its own stack of active stages, and database calls made on a thread are
+    counted against every stage active on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = set()
+        self._sampler = None
+        self.reset()
+
+    def reset(self):
+        """
+        Starts a new run, dropping the stages recorded so far.
+        """
+        with self._lock:
+            self.stages = {}
+            self.started_at = datetime.now(timezone.utc)
+            self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, loader, name, rows=0):
+        """
+        Times a block of loader work: with metrics.stage('property', 'write') as stage: ...
+        """
+        timer = StageTimer(rows)
+        stack = self._stack()
+        stack.append(timer)
+        with self._lock:
+            self._active.add(timer)
+            self._ensure_sampler()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self._active.discard(timer)
+            self.record(loader, name, seconds, timer.rows, timer.round_trips, timer.peak_rss)
+
+    def record(self, loader, name, seconds, rows=0, round_trips=0, peak_rss=0):
+        """
+        Adds one timed call to a stage; used directly by code that cannot hold a stage open
+        on one thread, like coroutines awaiting database calls.
+        """
+        with self._lock:
+            record = self.stages.get((loader, name))
+            if record is None:
+                record = self.stages[(loader, name)] = StageMetrics(loader, name)
+            record.calls += 1
+            record.seconds += seconds
+            record.rows += rows or 0
+            record.round_trips += round_trips
+            record.peak_rss = max(record.peak_rss, peak_rss, current_rss() or 0)
+
+    def count_round_trip(self, count=1):
+        """
+        Records database round trips against the stages active on the calling thread.
+        """
+        for timer in self._stack():
+            timer.round_trips += count
+
+    def summary(self):
+        """
+        Returns the structured run summary: per-stage metrics plus run totals.
+        """
+        with self._lock:
+            stages = [record.as_dict() for record in self.stages.values()]
+        # A loader's total throughput is measured by the rows its write stage stored
+        written = {stage["loader"]: stage["rows"] for stage in stages if stage["stage"] == "write"}
+        for stage in stages:
+            if stage["stage"] == "total" and not stage["rows"] and written.get(stage["loader"]):
+                stage["rows"] = written[stage["loader"]]
+                stage["rows_per_sec"] = round(stage["rows"] / stage["seconds"], 1) if stage["seconds"] > 0 else None
+        wall_seconds = time.perf_counter() - self._start
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall_seconds, 4),
+            "max_rss_mb": round(max_rss() / 2**20, 1),
+            "round_trips": sum(stage["round_trips"] for stage in stages if stage["stage"] == "total"),
+            "stages": stages,
+        }
+
+    def write_summary(self, path=DEFAULT_SUMMARY_PATH):
+        """
+        Writes the run summary as JSON. Returns the summary.
+        """
+        summary = self.summary()
+        if path:
+            _write_atomic(path, json.dumps(summary, indent=2))
+            logging.info(f"Wrote run metrics for {len(summary['stages'])} stages to {path}.")
+        return summary
+
+    def write_prometheus(self, path=DEFAULT_PROMETHEUS_PATH, job="property_pipeline"):
+        """
+        Writes the run summary in the Prometheus text exposition format (also valid OpenMetrics
+        gauges), ready for a textfile collector.
+        """
+        if not path:
+            return
+        summary = self.summary()
+        lines = []
+
+        def gauge(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        base = {"job": job}
+        stage_labels = [({**base, "loader": s["loader"], "stage": s["stage"]}, s) for s in summary["stages"]]
+        gauge("pipeline_stage_seconds", "Wall time spent in a loader stage during the last run.",
+              [(labels, s["seconds"]) for labels, s in stage_labels])
+        gauge("pipeline_stage_rows", "Rows handled by a loader stage during the last run.",
+              [(labels, s["rows"]) for labels, s in stage_labels])
+        gauge("pipeline_stage_rows_per_second", "Throughput of a loader stage during the last run.",
+              [(labels, s["rows_per_sec"] or 0) for labels, s in stage_labels])
+        gauge("pipeline_stage_round_trips", "Database round trips made by a loader stage during the last run.",
+              [(labels, s["round_trips"]) for labels, s in stage_labels])
+        gauge("pipeline_stage_peak_rss_bytes", "Process RSS high-water mark while a loader stage ran.",
+              [(labels, int(s["peak_rss_mb"] * 2**20)) for labels, s in stage_labels])
+        gauge("pipeline_run_seconds", "Wall time of the last pipeline run.", [(base, summary["wall_seconds"])])
+        gauge("pipeline_run_max_rss_bytes", "Process RSS high-water mark of the last pipeline run.",
+              [(base, int(summary["max_rss_mb"] * 2**20))])
+        gauge("pipeline_run_timestamp_seconds", "Unix time the last pipeline run finished.", [(base, int(time.time()))])
+        _write_atomic(path, "\n".join(lines) + "\n")
+        logging.info(f"Wrote Prometheus metrics to {path}.")
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _ensure_sampler(self):
+        # One background thread keeps the peak RSS of every active stage up to date
+        if self._sampler is None and current_rss() is not None:
+            self._sampler = threading.Thread(target=self._sample, name="metrics-rss", daemon=True)
+            self._sampler.start()
+
+    def _sample(self):
+        while True:
+            rss = current_rss() or 0
+            with self._lock:
+                for timer in self._active:
+                    timer.peak_rss = max(timer.peak_rss, rss)
+            time.sleep(RSS_SAMPLE_INTERVAL)
+
+
+class InstrumentedCursor:
+    """
+    Cursor wrapper counting every execute/executemany call as a database round trip.
+    """
+
+    def __init__(self, cursor, run_metrics):
+        self._cursor = cursor
+        self._metrics = run_metrics
+
+    def execute(self, *args, **kwargs):
+        self._metrics.count_round_trip()
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        # mysql-connector sends a batched INSERT as one multi-row statement
+        self._metrics.count_round_trip()
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """
+    Connection wrapper whose cursors and commits are counted as round trips.
+    """
+
+    def __init__(self, connection, run_metrics):
+        self._connection = connection
+        self._metrics = run_metrics
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._metrics)
+
+    def commit(self):
+        self._metrics.count_round_trip()
+        return self._connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def _write_atomic(path, text):
+    # Write to a temporary file first so collectors never read a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Shared metrics for the current run, used by every loader in the process
+metrics = RunMetrics()
+
+def instrument_connection(connection):
+    """
+    Wraps a database connection so its round trips are counted in the shared metrics.
+    """
+    return InstrumentedConnection(connection, metrics) if connection is not None else None
+
+def instrumented(loader):
+    """
+    Decorator recording a loader function's whole run as its 'total' stage.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(loader, "total"):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,123 @@
+import logging
+import sys
+from dataset import DEFAULT_CHUNK_SIZE, open_dataset
+from bulk_writer import DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE
+from main_lookup_tables_load import load_lookup_tables
+from main_tables_load import load_main_tables
+from scheduler import DEFAULT_WORKERS
+from delta import DEFAULT_INCREMENTAL, plan_delta, remove_changed_children, save_fingerprints
+from metrics import metrics
+from quarantine import quarantine
+from columnar_store import DEFAULT_COLUMNAR_DIR, open_store
+from checkpoint import DEFAULT_RESUME
+from async_loader import DEFAULT_ASYNC, run_main_tables_async
+
+def run_pipeline(file_path, batch_size=DEFAULT_BATCH_SIZE, load_mode=DEFAULT_LOAD_MODE, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_workers=DEFAULT_WORKERS, incremental=DEFAULT_INCREMENTAL, profiler=None,
+                 columnar_dir=DEFAULT_COLUMNAR_DIR, resume=DEFAULT_RESUME, async_mode=DEFAULT_ASYNC):
+    """
+    Runs both pipeline phases (lookup tables, then main tables) against a single parsed copy of the feed.
+    With a chunk_size the feed is streamed in chunks instead, keeping memory bounded.
+    max_workers caps how many independent table loads run at the same time.
+    With incremental=True only records whose content hash changed since the last run are loaded:
+    new properties are inserted, changed ones are updated and their child rows replaced.
+    A profiling.StageProfiler profiles every stage of both phases.
+    With a columnar_dir the feed is normalized into Arrow files there once and every loader
+    reads from them; a later run on the same file reuses them instead of parsing the JSON.
+    With resume=True a rerun after a failed main tables load continues from the last
+    committed chunk of every table (incremental runs always reload their whole delta).
+    With async_mode=True the main tables are loaded by the asyncio pipeline (aiomysql), which
+    overlaps chunk preparation with in-flight inserts; it does not use checkpoints or profiling.
+    Rows the database rejects are quarantined (see quarantine.py) and summarized once per run.
+    """
+    logging.info(f"Starting full pipeline run with file: {file_path}")
+    metrics.reset()
+    quarantine.clear()
+    try:
+        _run(file_path, batch_size, load_mode, chunk_size, max_workers, incremental, profiler, columnar_dir, resume, async_mode)
+    finally:
+        # Written even when a phase fails, so the stages that did run can be inspected
+        quarantine.flush()
+        write_run_metrics()
+        report_rejects()
+
+def _run(file_path, batch_size, load_mode, chunk_size, max_workers, incremental, profiler, columnar_dir, resume,
+         async_mode):
+    if columnar_dir and not incremental:
+        dataset = open_store(file_path, columnar_dir, chunk_size)
+    else:
+        # Incremental runs hash the raw feed records, so they always read the JSON
+        dataset = open_dataset(file_path, chunk_size)
+
+    plan = None
+    if incremental:
+        plan = plan_delta(dataset, chunk_size)
+        if not len(plan):
+            logging.info("No new or changed records; nothing to load.")
+            return
+        remove_changed_children(plan)
+        dataset = plan.dataset
+
+    # Phase 1: Reference data
+    logging.info("Starting lookup tables load...")
+    load_lookup_tables(dataset, max_workers, profiler)
+    logging.info("Lookup tables load completed.")
+
+    # Phase 2: Transactional data
+    logging.info("Starting main tables load...")
+    if async_mode:
+        run_main_tables_async(dataset, batch_size, update=incremental)
+    else:
+        load_main_tables(dataset, batch_size, load_mode, max_workers, update=incremental, profiler=profiler, resume=resume)
+
+    # Reached only if every stage loaded: the loaders raise on failure, and a failed child load
+    # after remove_changed_children must leave its records unfingerprinted so the next run redoes them
+    if plan is not None:
+        save_fingerprints(plan, skip=quarantine.rejected_titles())
+    logging.info("Full pipeline run completed successfully.")
+
+def write_run_metrics():
+    """
+    Writes the run summary (JSON and, if configured, Prometheus textfile) and logs each loader's totals.
+    """
+    try:
+        summary = metrics.write_summary()
+        metrics.write_prometheus()
+    except OSError as e:
+        logging.error(f"Could not write run metrics: {e}")
+        return
+    for stage in summary["stages"]:
+        if stage["stage"] == "total":
+            logging.info(
+                f"{stage['loader']}: {stage['rows']} rows in {stage['seconds']:.2f}s "
+                f"({stage['rows_per_sec'] or 0} rows/sec, {stage['round_trips']} round trips, "
+                f"peak {stage['peak_rss_mb']} MB)"
+            )
+    logging.info(f"Pipeline run took {summary['wall_seconds']:.2f}s, max RSS {summary['max_rss_mb']} MB.")
+
+def report_rejects():
+    """
+    Logs how many rows the run rejected per table, stage and error code.
+    """
+    rejected = quarantine.totals()
+    if not rejected:
+        return
+    total = sum(rejected.values())
+    logging.warning(f"{total} rows rejected this run: " + ", ".join(f"{key}={count}" for key, count in rejected.items()))
+    print(f"Warning: {total} rows were rejected and quarantined. Check logs for details.")
+
+if __name__ == "__main__":
+    # Configure logging for the script
+    logging.basicConfig(
+        filename='pipeline.log',
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s:%(message)s'
+    )
+
+    try:
+        file_name = sys.argv[1] if len(sys.argv) > 1 else 'fake_property_data.json'
+        run_pipeline(file_name)
+        print("Pipeline completed successfully.")
+    except Exception as e:
+        logging.error(f"Error in pipeline run: {e}")
+        print("Error: Pipeline run failed. Check logs for details.")
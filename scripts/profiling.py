@@ -0,0 +1,173 @@
+# Import necessary libraries
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter
+
+# Where profiles are written when a run is started with --profile
+DEFAULT_PROFILE_DIR = os.environ.get("PIPELINE_PROFILE_DIR", "profiles")
+
+# 'pstats' (deterministic cProfile) or 'collapsed' (sampled stacks for flamegraph.pl / speedscope)
+PROFILE_MODES = ("pstats", "collapsed")
+
+# Hot functions listed per stage in the report
+DEFAULT_TOP_N = 20
+
+# How often the sampling profiler captures the stage's stack, in seconds
+SAMPLE_INTERVAL = 0.005
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval and counts each distinct
+    stack, giving the collapsed-stack format used by flamegraph tools.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, top_n):
+        """
+        Returns [(function, self samples, total samples)] for the hottest functions.
+        """
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [(function, samples, total[function]) for function, samples in own.most_common(top_n)]
+
+
+class StageProfiler:
+    """
+    Profiles each pipeline stage on its own: one .pstats file (mode 'pstats') or one
+    collapsed-stack file (mode 'collapsed') per stage, plus a top-N hot function report.
+    Stages are wrapped with wrap_stages() before they are handed to the scheduler.
+    """
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, mode="pstats", top_n=DEFAULT_TOP_N):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {', '.join(PROFILE_MODES)}.")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.top_n = top_n
+        self.sections = []
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def wrap(self, name, func):
+        """
+        Returns func wrapped so each call is profiled and saved under the stage name.
+        """
+        def run(*args, **kwargs):
+            start = time.perf_counter()
+            if self.mode == "pstats":
+                profile = cProfile.Profile()
+                try:
+                    return profile.runcall(func, *args, **kwargs)
+                finally:
+                    self._save_pstats(name, profile, time.perf_counter() - start)
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sampler.stop()
+                self._save_collapsed(name, sampler, time.perf_counter() - start)
+        return run
+
+    def wrap_stages(self, stages):
+        """
+        Wraps every callable of a scheduler stage dict (name → (callable, deps)).
+        """
+        return {name: (self.wrap(name, func), deps) for name, (func, deps) in stages.items()}
+
+    def _save_pstats(self, name, profile, seconds):
+        path = os.path.join(self.output_dir, f"{name}.pstats")
+        profile.dump_stats(path)
+        text = io.StringIO()
+        stats = pstats.Stats(profile, stream=text)
+        stats.strip_dirs().sort_stats("tottime").print_stats(self.top_n)
+        self._add_section(name, seconds, path, text.getvalue().strip())
+
+    def _save_collapsed(self, name, sampler, seconds):
+        path = os.path.join(self.output_dir, f"{name}.collapsed")
+        sampler.write(path)
+        sample_count = sum(sampler.stacks.values())
+        lines = [f"{sample_count} samples every {sampler.interval * 1000:.0f} ms",
+                 f"{'self':>8}{'total':>8}  function"]
+        for function, own, total in sampler.top_functions(self.top_n):
+            lines.append(f"{own:>8}{total:>8}  {function}")
+        self._add_section(name, seconds, path, "\n".join(lines))
+
+    def _add_section(self, name, seconds, path, text):
+        with self._lock:
+            self.sections.append(f"== {name} ({seconds:.2f}s) -> {path}\n{text}\n")
+        logging.info(f"Saved {self.mode} profile of stage {name} to {path}.")
+
+    def write_report(self, file_name="top_functions.txt"):
+        """
+        Writes the top-N hot functions of every profiled stage to one report file.
+        Returns the report path.
+        """
+        path = os.path.join(self.output_dir, file_name)
+        with self._lock:
+            report = "\n".join(self.sections)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(report)
+        logging.info(f"Wrote profile report for {len(self.sections)} stages to {path}.")
+        return path
+
+def add_profile_arguments(parser):
+    """
+    Adds the --profile, --profile-dir and --profile-top options to an orchestrator's argument parser.
+    """
+    parser.add_argument("--profile", nargs="?", const="pstats", choices=PROFILE_MODES, default=None,
+                        help="profile every stage: 'pstats' (default) or 'collapsed' stacks for flamegraphs")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR, help="where profiles and the report are written")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP_N, help="hot functions listed per stage")
+
+def profiler_from_args(args):
+    """
+    Returns a StageProfiler for the parsed --profile options, or None when profiling is off.
+    """
+    if not args.profile:
+        return None
+    return StageProfiler(args.profile_dir, args.profile, args.profile_top)
@@ -1,132 +1,106 @@
-import logging
-from db import get_connection
-from extraction import extract_json
-
-# Define the mapping of field → (table, column)
-LOOKUPS = {
-    "Market": ("market_lookup", "market_name"),
-    "Flood": ("flood_lookup", "flood_zone"),
-    "Property_Type": ("property_type_lookup", "type_name"),
-    "Parking": ("parking_type_lookup", "parking_desc"),
-    "Layout": ("layout_type_lookup", "layout_desc"),
-    "Subdivision": ("subdivision_lookup", "subdivision_name"),
-    "State": ("state_lookup", "state_code"),
-}
-
-def load_property_lookups(file_path):
-    """
-    Loads unique lookup values for property-related tables (market, flood, type, etc.)
-    from a JSON file and inserts them into their respective lookup tables.
-    Handles dependencies for state, city, and address tables.
-    """
-    try:
-        # Extract data from JSON file
-        data = extract_json(file_path)
-        logging.info(f"Loaded data from {file_path} for property lookup extraction.")
-
-        # Establish database connection
-        conn = get_connection()
-        if conn is None:
-            logging.error("Database connection is None.")
-            print("Error: Could not connect to the database.")
-            return
-        cursor = conn.cursor()
-        logging.info("Database connection established.")
-
-        # 1. Simple lookups (no dependencies)
-        for field, (table, column) in LOOKUPS.items():
-            unique_values = set()
-            for record in data:
-                value = record.get(field.capitalize()) or record.get(field)
-                if value and value.strip():
-                    unique_values.add(value.strip())
-
-            for value in unique_values:
-                try:
-                    cursor.execute(f"INSERT IGNORE INTO {table} ({column}) VALUES (%s)", (value,))
-                except Exception as e:
-                    logging.error(f"Error inserting into {table} ({value}): {e}")
-                    print(f"Error inserting into {table}: {e}")
-            logging.info(f"Inserted {len(unique_values)} unique values into {table}.")
-            conn.commit()
-
-        # 2. State lookup must be preloaded before city
-        state_map = {}
-        try:
-            cursor.execute("SELECT state_id, state_code FROM state_lookup")
-            for sid, code in cursor.fetchall():
-                state_map[code] = sid
-            logging.info("Fetched state_lookup mapping for city dependency.")
-        except Exception as e:
-            logging.error(f"Error fetching state_lookup: {e}")
-            print(f"Error fetching state_lookup: {e}")
-
-        # 3. City lookup depends on state_id
-        city_set = set()
-        for record in data:
-            state = record.get("state") or record.get("State")
-            city = record.get("city") or record.get("City")
-            if city and state:
-                state = state.strip()
-                city = city.strip()
-                if state in state_map:
-                    city_set.add((city, state_map[state]))
-
-        for city_name, state_id in city_set:
-            try:
-                cursor.execute(
-                    "INSERT IGNORE INTO city_lookup (city_name, state_id) VALUES (%s, %s)",
-                    (city_name, state_id)
-                )
-            except Exception as e:
-                logging.error(f"Error inserting city ({city_name}, {state_id}): {e}")
-                print(f"Error inserting city: {e}")
-        logging.info(f"Inserted {len(city_set)} unique cities.")
-        conn.commit()
-
-        # 4. Address table (depends on city)
-        city_map = {}
-        try:
-            cursor.execute("SELECT city_id, city_name, state_id FROM city_lookup")
-            for cid, cname, sid in cursor.fetchall():
-                city_map[(cname, sid)] = cid
-            logging.info("Fetched city_lookup mapping for address dependency.")
-        except Exception as e:
-            logging.error(f"Error fetching city_lookup: {e}")
-            print(f"Error fetching city_lookup: {e}")
-
-        address_set = set()
-        for record in data:
-            street = record.get("street_address") or record.get("Street_Address")
-            city = record.get("city") or record.get("City")
-            state = record.get("state") or record.get("State")
-            zip_code = record.get("zip") or record.get("Zip")
-            if all([street, city, state, zip_code]):
-                state = state.strip()
-                city = city.strip()
-                street = street.strip()
-                zip_code = zip_code.strip()
-                state_id = state_map.get(state)
-                city_id = city_map.get((city, state_id))
-                if city_id:
-                    address_set.add((street, city_id, zip_code))
-
-        for street_address, city_id, zip_code in address_set:
-            try:
-                cursor.execute(
-                    "INSERT IGNORE INTO address (street_address, city_id, zip) VALUES (%s, %s, %s)",
-                    (street_address, city_id, zip_code)
-                )
-            except Exception as e:
-                logging.error(f"Error inserting address ({street_address}, {city_id}, {zip_code}): {e}")
-                print(f"Error inserting address: {e}")
-        logging.info(f"Inserted {len(address_set)} unique addresses.")
-        conn.commit()
-
-        # Close database resources
-        cursor.close()
-        conn.close()
-        logging.info("Database connection closed after property lookup load.")
-    except Exception as e:
-        logging.error(f"Failed to load property lookups: {e}")
-        print("Error: Could not load property lookups. Check logs for details.")
+import logging
+from db import get_connection
+from dataset import open_dataset
+from lookup_cache import lookup_cache
+from bulk_writer import insert_rows
+from lookup_harvest import PROPERTY_LOOKUPS, harvest_lookups
+from metrics import metrics, instrumented
+
+@instrumented('property_lookups')
+def load_property_lookups(source, harvest=None):
+    """
+    Loads unique lookup values for property-related tables (market, flood, type, etc.)
+    from a JSON file or shared PropertyDataset and inserts them into their respective lookup tables.
+    Handles dependencies for state, city, and address tables by inserting in that order.
+    A harvest from harvest_lookups can be passed in so the feed is only scanned once.
+    """
+    try:
+        # Collect distinct values in one pass unless the caller already did
+        dataset = open_dataset(source)
+        with metrics.stage('property_lookups', 'harvest'):
+            lookup_values = harvest if harvest is not None else harvest_lookups(dataset)
+        logging.info(f"Loaded data from {dataset.source} for property lookup extraction.")
+
+        # Establish database connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        logging.info("Database connection established.")
+
+        # 1. Simple lookups (no dependencies), including state
+        for table, column in PROPERTY_LOOKUPS.values():
+            unique_values = lookup_values[table]
+            with metrics.stage('property_lookups', 'write') as stage:
+                counts = insert_rows(cursor, table, [column], [(value,) for value in unique_values])
+                stage.rows = counts.inserted
+            if counts.rejected:
+                print(f"Error inserting into {table}: {counts.rejected} values failed. Check logs for details.")
+            logging.info(f"Loaded {len(unique_values)} unique values into {table}: {counts}.")
+            conn.commit()
+
+            # Pull the ids of the values just inserted into the shared lookup cache
+            lookup_cache.ids(cursor, table, list(unique_values))
+
+        # 2. State lookup must be preloaded before city
+        state_map = {}
+        try:
+            state_map = lookup_cache.mapping(cursor, "state_lookup")
+            logging.info("Fetched state_lookup mapping for city dependency.")
+        except Exception as e:
+            logging.error(f"Error fetching state_lookup: {e}")
+            print(f"Error fetching state_lookup: {e}")
+
+        # 3. City lookup depends on state_id
+        city_set = {
+            (city, state_map[state])
+            for city, state in lookup_values["city_lookup"]
+            if state in state_map
+        }
+        # city_lookup has no unique key, so only cities missing from the database are inserted
+        city_ids = lookup_cache.ids(cursor, "city_lookup", list(city_set))
+        new_cities = [city for city, city_id in zip(city_set, city_ids) if city_id is None]
+        with metrics.stage('property_lookups', 'write') as stage:
+            counts = insert_rows(cursor, "city_lookup", ["city_name", "state_id"], new_cities)
+            stage.rows = counts.inserted
+        if counts.rejected:
+            print(f"Error inserting {counts.rejected} cities. Check logs for details.")
+        logging.info(f"Loaded {len(new_cities)} new of {len(city_set)} unique cities: {counts}.")
+        conn.commit()
+
+        # 4. Address table (depends on city)
+        city_map = {}
+        try:
+            lookup_cache.ids(cursor, "city_lookup", list(city_set))
+            city_map = lookup_cache.mapping(cursor, "city_lookup")
+            logging.info("Fetched city_lookup mapping for address dependency.")
+        except Exception as e:
+            logging.error(f"Error fetching city_lookup: {e}")
+            print(f"Error fetching city_lookup: {e}")
+
+        address_set = set()
+        for street_address, city, state, zip_code in lookup_values["address"]:
+            city_id = city_map.get((city, state_map.get(state)))
+            if city_id:
+                address_set.add((street_address, city_id, zip_code))
+
+        with metrics.stage('property_lookups', 'write') as stage:
+            counts = insert_rows(cursor, "address", ["street_address", "city_id", "zip"], list(address_set))
+            stage.rows = counts.inserted
+        if counts.rejected:
+            print(f"Error inserting {counts.rejected} addresses. Check logs for details.")
+        logging.info(f"Loaded {len(address_set)} unique addresses: {counts}.")
+        conn.commit()
+
+        # address.zip is an INT column, so cache keys carry numeric zips
+        lookup_cache.ids(cursor, "address", [
+            (street_address, city_id, int(zip_code) if zip_code.isdigit() else zip_code)
+            for street_address, city_id, zip_code in address_set
+        ])
+
+        # Close database resources
+        cursor.close()
+        conn.close()
+        logging.info("Database connection closed after property lookup load.")
+    except Exception as e:
+        logging.error(f"Failed to load property lookups: {e}")
+        print("Error: Could not load property lookups. Check logs for details.")
+        raise
@@ -0,0 +1,208 @@
+# Import necessary libraries
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from db import get_connection, get_db_config
+
+# Where rejected rows go: 'file' (JSON lines), 'table' (load_rejects) or 'off'; PIPELINE_QUARANTINE overrides
+QUARANTINE_SINKS = ("file", "table", "off")
+DEFAULT_QUARANTINE_SINK = os.environ.get("PIPELINE_QUARANTINE", "file")
+DEFAULT_QUARANTINE_PATH = os.environ.get("PIPELINE_QUARANTINE_PATH", "rejects.jsonl")
+
+# Rejected rows held in memory before they are written out
+DEFAULT_QUARANTINE_BUFFER = int(os.environ.get("PIPELINE_QUARANTINE_BUFFER", 1000))
+
+# Table of the 'table' sink (see the QUARANTINE section of the DDL)
+REJECTS_TABLE = "load_rejects"
+REJECTS_COLUMNS = ["target_table", "stage", "error_code", "error_message", "property_title", "source_record"]
+
+# Feed key stored with every rejected row, so its feed record can be found and replayed
+SOURCE_KEY = "property_title"
+
+# Longest error message kept per rejected row
+MAX_MESSAGE_LENGTH = 512
+
+def error_code(error):
+    """
+    Returns the server error number of an exception (mysql-connector errno), or None.
+    """
+    code = getattr(error, "errno", None)
+    return code if isinstance(code, int) and code >= 0 else None
+
+def _json_value(value):
+    # numpy scalars, Decimals and timestamps are not JSON types
+    if hasattr(value, "item"):
+        return value.item()
+    if value is not None and not isinstance(value, (int, float, str, bool)):
+        return str(value)
+    return value
+
+
+class Quarantine:
+    """
+    Collects the rows the loaders reject, with their target table, load stage, error code and
+    values, and writes them out in bulk once max_buffer rows are held or on flush(). Instead
+    of one log line per row, flush() logs one line per table, stage and error code with the
+    count and an example message. Shared by every loader thread; adding a row only appends
+    to the buffer, so loads without rejects pay nothing. Full buffers are swapped out under
+    the lock and written after it is released, so other loaders never wait on a sink write.
+    """
+
+    def __init__(self, sink=DEFAULT_QUARANTINE_SINK, path=DEFAULT_QUARANTINE_PATH, max_buffer=DEFAULT_QUARANTINE_BUFFER):
+        self.configure(sink, path, max_buffer)
+        self._lock = threading.Lock()
+        # Serializes appends to the file sink, so batches written by different threads do not interleave
+        self._file_lock = threading.Lock()
+        self._buffer = []
+        self._pending = {}
+        self._totals = {}
+        self._titles = set()
+
+    def configure(self, sink=None, path=None, max_buffer=None):
+        """
+        Changes where rejected rows are written from the next flush on.
+        """
+        if sink is not None:
+            if sink not in QUARANTINE_SINKS:
+                raise ValueError(f"Unknown quarantine sink '{sink}'; expected one of {QUARANTINE_SINKS}")
+            self.sink = sink
+        if path is not None:
+            self.path = path
+        if max_buffer is not None:
+            self.max_buffer = max(1, max_buffer)
+
+    def add(self, table, stage, columns, row, error, source=None):
+        """
+        Quarantines one rejected row of table: columns names its values, error is the
+        exception (or message) it was rejected with and source the Property_Title of the
+        feed record the row came from.
+        """
+        self.add_many(table, stage, columns, [row], error, None if source is None else [source])
+
+    def add_many(self, table, stage, columns, rows, error, sources=None):
+        """
+        Quarantines rows of table rejected at stage with the same error. sources gives the
+        Property_Title of each row's feed record; without it the title is taken from the
+        rows' own title column (leads, property and the staging tables have one).
+        """
+        if not rows:
+            return
+        if sources is None:
+            position = next((i for i, column in enumerate(columns) if column.lower() == SOURCE_KEY), None)
+            sources = [None if position is None else row[position] for row in rows]
+        code = error_code(error)
+        message = str(error)[:MAX_MESSAGE_LENGTH]
+        rejected_at = datetime.now(timezone.utc).isoformat()
+        records = [{
+            "target_table": table,
+            "stage": stage,
+            "error_code": code,
+            "error_message": message,
+            SOURCE_KEY: _json_value(source),
+            "source_record": {column: _json_value(value) for column, value in zip(columns, row)},
+            "rejected_at": rejected_at,
+        } for row, source in zip(rows, sources)]
+        full = []
+        with self._lock:
+            key = (table, stage, code)
+            count, example = self._pending.get(key, (0, message))
+            self._pending[key] = (count + len(rows), example)
+            self._totals[key] = self._totals.get(key, 0) + len(rows)
+            self._titles.update(source for source in sources if source is not None)
+            if self.sink != "off":
+                self._buffer.extend(records)
+            if len(self._buffer) >= self.max_buffer:
+                full, self._buffer = self._buffer, []
+        self._write(full)
+
+    def flush(self):
+        """
+        Writes the buffered rows to the sink and logs the rejects counted since the last flush.
+        """
+        with self._lock:
+            if not self._pending and not self._buffer:
+                return
+            records, self._buffer = self._buffer, []
+            pending, self._pending = self._pending, {}
+        self._write(records)
+        for (table, stage, code), (count, example) in sorted(pending.items(), key=lambda item: str(item[0])):
+            logging.error(
+                f"{count} {table} rows rejected at {stage} (error {code if code is not None else 'n/a'}, "
+                f"e.g. {example}){'' if self.sink == 'off' else f'; quarantined to {self._target()}'}."
+            )
+
+    def totals(self):
+        """
+        Returns {"table/stage/error code": rows rejected} for the whole run.
+        """
+        with self._lock:
+            return {f"{table}/{stage}/{code}": count for (table, stage, code), count in sorted(self._totals.items(), key=str)}
+
+    def rejected_titles(self):
+        """
+        Returns the Property_Titles of the feed records that had rows rejected this run.
+        """
+        with self._lock:
+            return set(self._titles)
+
+    def clear(self):
+        """
+        Drops buffered rows and counts, e.g. between benchmark runs.
+        """
+        with self._lock:
+            self._buffer = []
+            self._pending = {}
+            self._totals = {}
+            self._titles = set()
+
+    def _target(self):
+        return REJECTS_TABLE if self.sink == "table" else self.path
+
+    def _write(self, records):
+        # Runs without the lock held; records were already taken out of the buffer
+        if not records:
+            return
+        if self.sink == "table" and self._write_table(records):
+            return
+        self._write_file(records)
+
+    def _write_table(self, records):
+        # The SQLite stand-in allows one writer at a time, and the loader's chunk holds it
+        if get_db_config()["backend"] != "mysql":
+            logging.warning(f"The {REJECTS_TABLE} sink needs the MySQL backend; writing rejected rows to {self.path}.")
+            return False
+        # Rejects get their own connection, so they are kept when the loader's chunk rolls back
+        try:
+            conn = get_connection()
+        except ConnectionError:
+            logging.warning(f"Could not connect to the database to quarantine rows; writing them to {self.path}.")
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {REJECTS_TABLE} ({', '.join(REJECTS_COLUMNS)}) VALUES ({', '.join(['%s'] * len(REJECTS_COLUMNS))})",
+                [(record["target_table"], record["stage"], record["error_code"], record["error_message"],
+                  record[SOURCE_KEY], json.dumps(record["source_record"], default=str)) for record in records]
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logging.warning(f"Could not write {len(records)} rows to {REJECTS_TABLE} ({e}); writing them to {self.path}.")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _write_file(self, records):
+        lines = [json.dumps(record, default=str) + "\n" for record in records]
+        try:
+            with self._file_lock, open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError as e:
+            logging.error(f"Could not quarantine {len(records)} rejected rows to {self.path}: {e}")
+
+
+# Shared quarantine used by every loader in the process
+quarantine = Quarantine()
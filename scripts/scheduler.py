@@ -0,0 +1,127 @@
+# Import necessary libraries
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Stages run at the same time; override with the PIPELINE_WORKERS environment variable (1 = sequential)
+DEFAULT_WORKERS = int(os.environ.get("PIPELINE_WORKERS", 4))
+
+def topological_order(stages):
+    """
+    Returns stage names ordered so every stage comes after its dependencies.
+    stages maps name → (callable, [dependency names]). Raises ValueError on unknown
+    dependencies or cycles.
+    """
+    order = []
+    state = {}
+
+    def visit(name, chain):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(chain + [name])}")
+        state[name] = "visiting"
+        for dependency in stages[name][1]:
+            if dependency not in stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+            visit(dependency, chain + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in stages:
+        visit(name, [])
+    return order
+
+def critical_path(stages, durations):
+    """
+    Finds the chain of dependent stages with the largest total duration.
+    Returns (list of stage names, total seconds).
+    """
+    finish = {}
+    previous = {}
+    for name in topological_order(stages):
+        dependencies = stages[name][1]
+        slowest = max(dependencies, key=lambda dep: finish[dep], default=None)
+        finish[name] = durations.get(name, 0.0) + (finish[slowest] if slowest else 0.0)
+        previous[name] = slowest
+    if not finish:
+        return [], 0.0
+
+    name = max(finish, key=finish.get)
+    total = finish[name]
+    path = []
+    while name:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], total
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def run_stages(stages, max_workers=DEFAULT_WORKERS, label="pipeline"):
+    """
+    Runs a DAG of stages on a thread pool, starting each stage as soon as all of its
+    dependencies have finished. Stages open their own database connections.
+    stages maps name → (callable, [dependency names]); callables take no arguments.
+    Stages whose dependencies failed are skipped. Returns a report with per-stage durations,
+    the critical path and wall time, and raises RuntimeError if any stage failed.
+    """
+    topological_order(stages)  # validate before starting anything
+    max_workers = max(1, max_workers)
+    logging.info(f"Running {len(stages)} {label} stages with up to {max_workers} workers.")
+
+    durations = {}
+    failed = {}
+    skipped = []
+    pending = dict(stages)
+    running = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=label) as pool:
+        while pending or running:
+            # Start (or skip) every stage whose dependencies are settled, in declaration order
+            changed = True
+            while changed:
+                changed = False
+                for name, (func, dependencies) in list(pending.items()):
+                    if any(dep in failed or dep in skipped for dep in dependencies):
+                        logging.warning(f"Skipping {label} stage '{name}' because a dependency failed.")
+                        skipped.append(name)
+                        del pending[name]
+                        changed = True
+                    elif all(dep in durations for dep in dependencies):
+                        logging.info(f"Starting {label} stage '{name}'.")
+                        running[pool.submit(_timed, func)] = name
+                        del pending[name]
+                        changed = True
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    durations[name] = future.result()
+                    logging.info(f"Finished {label} stage '{name}' in {durations[name]:.2f}s.")
+                except Exception as e:
+                    failed[name] = e
+                    logging.error(f"{label} stage '{name}' failed: {e}")
+
+    wall_seconds = time.perf_counter() - start
+    path, path_seconds = critical_path(stages, durations)
+    logging.info(
+        f"{label} stages finished in {wall_seconds:.2f}s; critical path "
+        f"{' -> '.join(path)} ({path_seconds:.2f}s)."
+    )
+
+    if failed:
+        raise RuntimeError(f"{label} stages failed: {', '.join(failed)}" + (f"; skipped: {', '.join(skipped)}" if skipped else ""))
+    return {
+        "durations": durations,
+        "critical_path": path,
+        "critical_path_seconds": path_seconds,
+        "wall_seconds": wall_seconds,
+    }
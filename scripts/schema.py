@@ -0,0 +1,281 @@
+# Import necessary libraries
+import os
+import re
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+# Column types of every table are read from the DDL the database was created with
+DDL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "DDL_statements.sql")
+
+# Source values stored as SQL NULL, alongside NaN/None
+NULL_TOKENS = ['', ' ', 'Null']
+
+# MySQL integer types → (compact nullable pandas dtype, min, max)
+INTEGER_TYPES = {
+    "TINYINT": ("Int8", -2**7, 2**7 - 1),
+    "SMALLINT": ("Int16", -2**15, 2**15 - 1),
+    "MEDIUMINT": ("Int32", -2**23, 2**23 - 1),
+    "INT": ("Int32", -2**31, 2**31 - 1),
+    "INTEGER": ("Int32", -2**31, 2**31 - 1),
+    "BIGINT": ("Int64", -2**63, 2**63 - 1),
+}
+
+# Values quoted per column in an out-of-range report
+REPORT_EXAMPLES = 5
+
+_COLUMN_PATTERN = re.compile(r"^\s*(\w+)\s+([A-Z]+)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?(.*)$", re.IGNORECASE)
+_CONSTRAINT_WORDS = ("CONSTRAINT", "PRIMARY", "UNIQUE", "FOREIGN", "KEY", "INDEX", "CHECK")
+
+
+class Column:
+    """
+    One DDL column: its SQL type and the in-memory dtype and value range it maps to.
+    kind is 'int', 'decimal', 'text' or 'other' (left untouched by coercion).
+    """
+
+    def __init__(self, name, sql_type, precision=None, scale=None, nullable=True):
+        self.name = name
+        self.sql_type = sql_type
+        self.nullable = nullable
+        self.length = None
+        self.scale = None
+        self.minimum = None
+        self.maximum = None
+        if sql_type in INTEGER_TYPES:
+            self.kind = "int"
+            self.dtype, self.minimum, self.maximum = INTEGER_TYPES[sql_type]
+        elif sql_type in ("DECIMAL", "NUMERIC"):
+            # DECIMAL(p,s) holds p digits, s of them after the point
+            self.kind = "decimal"
+            self.dtype = "float64"
+            precision = precision or 10
+            self.scale = scale or 0
+            self.maximum = 10 ** (precision - self.scale) - 10 ** -self.scale
+            self.minimum = -self.maximum
+        elif sql_type in ("VARCHAR", "CHAR"):
+            self.kind = "text"
+            self.dtype = "object"
+            self.length = precision
+        else:
+            self.kind = "other"
+            self.dtype = None
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.sql_type!r}, dtype={self.dtype!r})"
+
+
+def parse_ddl(ddl):
+    """
+    Parses CREATE TABLE statements into {table: {column name (lower case): Column}}.
+    """
+    tables = {}
+    for match in re.finditer(r"CREATE TABLE\s+(\w+)\s*\((.*?)\)\s*ENGINE", ddl, re.IGNORECASE | re.DOTALL):
+        columns = {}
+        for line in match.group(2).splitlines():
+            line = line.split("--")[0].strip().rstrip(",")
+            if not line or line.upper().startswith(_CONSTRAINT_WORDS):
+                continue
+            column = _COLUMN_PATTERN.match(line)
+            if column is None:
+                continue
+            name, sql_type, precision, scale, rest = column.groups()
+            columns[name.lower()] = Column(
+                name, sql_type.upper(),
+                int(precision) if precision else None,
+                int(scale) if scale else None,
+                nullable="NOT NULL" not in rest.upper() and "PRIMARY KEY" not in rest.upper()
+            )
+        tables[match.group(1).lower()] = columns
+    return tables
+
+_FOREIGN_KEY_PATTERN = re.compile(
+    r"CONSTRAINT\s+(\w+)\s+FOREIGN KEY\s*\(\s*(\w+)\s*\)\s*REFERENCES\s+(\w+)\s*\(\s*(\w+)\s*\)", re.IGNORECASE
+)
+
+
+class ForeignKey:
+    """
+    One DDL foreign key: table.column references parent.parent_column.
+    """
+
+    def __init__(self, name, table, column, parent, parent_column):
+        self.name = name
+        self.table = table
+        self.column = column
+        self.parent = parent
+        self.parent_column = parent_column
+
+    def __repr__(self):
+        return f"ForeignKey({self.name!r}, {self.table}.{self.column} -> {self.parent}.{self.parent_column})"
+
+
+def _table_bodies(ddl):
+    for match in re.finditer(r"CREATE TABLE\s+(\w+)\s*\((.*?)\)\s*ENGINE", ddl, re.IGNORECASE | re.DOTALL):
+        yield match.group(1).lower(), match.group(2)
+
+def parse_constraints(ddl):
+    """
+    Parses the named foreign keys and the unique keys of CREATE TABLE statements. Unique keys
+    include primary keys the loaders write themselves (not AUTO_INCREMENT ones), listed first.
+    Returns ([ForeignKey], {table: [tuple of unique key columns]}).
+    """
+    foreign_keys = []
+    unique_keys = {}
+    for table, body in _table_bodies(ddl):
+        for match in _FOREIGN_KEY_PATTERN.finditer(body):
+            name, column, parent, parent_column = match.groups()
+            foreign_keys.append(ForeignKey(name, table, column.lower(), parent.lower(), parent_column.lower()))
+        primary = []
+        keys = []
+        for line in body.splitlines():
+            line = line.split("--")[0].strip().rstrip(",")
+            key = re.match(r"(PRIMARY KEY|UNIQUE(?:\s+KEY)?(?:\s+\w+)?)\s*\(([^)]*)\)", line, re.IGNORECASE)
+            if key:
+                columns = tuple(column.strip().lower() for column in key.group(2).split(","))
+                (primary if key.group(1).upper() == "PRIMARY KEY" else keys).append(columns)
+            elif line and not line.upper().startswith(_CONSTRAINT_WORDS):
+                if re.search(r"\bPRIMARY KEY\b", line, re.IGNORECASE) and "AUTO_INCREMENT" not in line.upper():
+                    primary.append((line.split()[0].lower(),))
+                elif re.search(r"\bUNIQUE\b", line, re.IGNORECASE):
+                    keys.append((line.split()[0].lower(),))
+        keys = primary + keys
+        if keys:
+            unique_keys[table] = keys
+    return foreign_keys, unique_keys
+
+def _examples(values):
+    return [value.item() if hasattr(value, "item") else value for value in values[:REPORT_EXAMPLES]]
+
+
+class SchemaRegistry:
+    """
+    Column types of every pipeline table, derived from the DDL. coerce() converts a frame
+    bound for a table to the table's column types before it is serialized, so the server
+    receives typed values instead of converting strings and floats row by row.
+    """
+
+    def __init__(self, ddl_path=DDL_PATH):
+        self.ddl_path = ddl_path
+        self._tables = None
+        self._foreign_keys = None
+        self._unique_keys = None
+        self._lock = threading.Lock()
+
+    def tables(self):
+        """
+        Returns {table: {column: Column}}, parsing the DDL on first use.
+        """
+        self._load()
+        return self._tables
+
+    def foreign_keys(self, tables=None):
+        """
+        Returns the DDL's foreign keys, optionally only those of the given (child) tables.
+        """
+        self._load()
+        return [fk for fk in self._foreign_keys if tables is None or fk.table in tables]
+
+    def unique_keys(self, table):
+        """
+        Returns the unique keys of a table as tuples of column names, starting with its primary
+        key unless that is an AUTO_INCREMENT id.
+        """
+        self._load()
+        return self._unique_keys.get(table.lower(), [])
+
+    def _load(self):
+        with self._lock:
+            if self._tables is None:
+                with open(self.ddl_path, encoding="utf-8") as f:
+                    ddl = f.read()
+                self._foreign_keys, self._unique_keys = parse_constraints(ddl)
+                self._tables = parse_ddl(ddl)
+                logging.info(f"Loaded column types for {len(self._tables)} tables from {self.ddl_path}.")
+
+    def column(self, table, name):
+        """
+        Returns the Column for table.name (case-insensitive), or None if the DDL has no such column.
+        """
+        return self.tables().get(table.lower(), {}).get(name.lower())
+
+    def coerce(self, frame, table, columns=None):
+        """
+        Returns a copy of frame with every column converted to its table column's compact
+        dtype: nullable Int8/Int16/Int32 for integer columns and float64 rounded to the scale
+        for DECIMAL columns. columns gives the table column name of each frame column when
+        they differ (e.g. Taxes → tax_value). Values that cannot be parsed or fall outside
+        the column's range are reported in bulk, one entry per column, and sent as they came
+        (the column stays object dtype), so the server rejects their rows and the writers
+        quarantine them. Returns (frame, report).
+        """
+        names = list(columns) if columns is not None else list(frame.columns)
+        coerced = {}
+        report = []
+        for (label, values), name in zip(frame.items(), names):
+            column = self.column(table, name)
+            if column is None or column.kind == "other":
+                coerced[label] = values
+            elif column.kind == "text":
+                coerced[label] = values
+                self._check_length(table, column, values, report)
+            else:
+                coerced[label] = self._coerce_number(table, column, values, report)
+        for entry in report:
+            logging.warning(
+                f"{entry['table']}.{entry['column']}: {entry['count']} {entry['issue']} values "
+                f"sent as is (e.g. {entry['examples']})."
+            )
+        return pd.DataFrame(coerced, index=frame.index, copy=False), report
+
+    def _coerce_number(self, table, column, values, report):
+        invalid = None
+        if values.dtype == object:
+            missing = values.isna() | values.isin(NULL_TOKENS)
+            numbers = pd.to_numeric(values.where(~missing), errors="coerce")
+            invalid = numbers.isna() & ~missing
+            if invalid.any():
+                report.append(self._entry(table, column, "unparseable", values[invalid]))
+        else:
+            numbers = pd.to_numeric(values, errors="coerce")
+        numbers = numbers.astype("float64")
+
+        # Round half away from zero, the way the server does, before checking the range
+        scale = 10.0 ** (column.scale or 0)
+        numbers = np.sign(numbers) * np.floor(np.abs(numbers) * scale + 0.5) / scale
+        out_of_range = (numbers < column.minimum) | (numbers > column.maximum)
+        if out_of_range.any():
+            report.append(self._entry(table, column, f"out-of-range [{column.minimum}, {column.maximum}]",
+                                      values[out_of_range]))
+        rejected = out_of_range if invalid is None else out_of_range | invalid
+        if not rejected.any():
+            return numbers.astype(column.dtype)
+        # Keep the bad values as they came, so their rows fail at the server instead of storing NULL
+        typed = numbers.mask(rejected).astype(column.dtype).astype(object)
+        typed[rejected] = values[rejected]
+        return typed
+
+    def _check_length(self, table, column, values, report):
+        if not column.length or values.dtype != object:
+            return
+        # Lengths are checked once per distinct value; flag columns only hold a handful
+        too_long = [
+            value for value in values.dropna().unique()
+            if isinstance(value, str) and len(value) > column.length
+        ]
+        if too_long:
+            report.append(self._entry(table, column, "too long", values[values.isin(too_long)]))
+
+    def _entry(self, table, column, issue, values):
+        return {
+            "table": table,
+            "column": column.name,
+            "issue": issue,
+            "count": int(len(values)),
+            "examples": _examples(values.to_numpy()),
+        }
+
+
+# Shared registry used by every loader in the process
+schema_registry = SchemaRegistry()
@@ -0,0 +1,88 @@
+# Import necessary libraries
+import os
+import logging
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes for sharded transforms; 0 or 1 transforms on the loader's own thread
+DEFAULT_SHARD_WORKERS = int(os.environ.get("PIPELINE_SHARD_WORKERS", 0))
+
+# How a chunk is split across workers: 'range' (contiguous row ranges) or 'hash' (hash of the key column)
+SHARD_MODES = ("range", "hash")
+DEFAULT_SHARD_MODE = os.environ.get("PIPELINE_SHARD_MODE", "range")
+
+# Smallest shard worth sending to another process; smaller chunks use fewer shards
+MIN_SHARD_ROWS = 2000
+
+def shard_positions(frame, shards, mode="range", key=None):
+    """
+    Splits a frame's row positions into at most `shards` groups: contiguous ranges, or
+    groups by hash of the key column so equal keys always land in the same shard.
+    Returns a list of non-empty position arrays.
+    """
+    if mode not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode '{mode}'; expected one of {SHARD_MODES}")
+    if shards <= 1 or len(frame) == 0:
+        return [np.arange(len(frame))]
+    if mode == "range":
+        return np.array_split(np.arange(len(frame)), shards)
+    buckets = (pd.util.hash_pandas_object(frame[key], index=False).to_numpy() % shards).astype(np.int64)
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.searchsorted(buckets[order], np.arange(1, shards))
+    return [positions for positions in np.split(order, bounds) if len(positions)]
+
+
+class ShardPool:
+    """
+    Process pool running a row transform over shards of a chunk. Every worker gets a
+    read-only copy of the shared state (e.g. lookup indexes) once, when the pool starts;
+    map() then only ships the shard frames and returns rows in the chunk's original order,
+    so a single writer can insert them exactly as the unsharded loader would.
+    """
+
+    def __init__(self, workers=DEFAULT_SHARD_WORKERS, mode=DEFAULT_SHARD_MODE):
+        if mode not in SHARD_MODES:
+            raise ValueError(f"Unknown shard mode '{mode}'; expected one of {SHARD_MODES}")
+        self.workers = workers
+        self.mode = mode
+        self._executor = None
+
+    def start(self, initializer, initargs=()):
+        """
+        Starts the worker processes, each running initializer(*initargs) once.
+        """
+        # 'spawn' keeps workers clear of locks held by the scheduler's threads at fork time
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+        logging.info(f"Started {self.workers} shard workers ({self.mode} sharding).")
+
+    def map(self, func, frame, key=None):
+        """
+        Runs func(shard_frame) → list of rows on every shard of a frame and returns all rows
+        in the frame's row order.
+        """
+        shards = min(self.workers, max(1, len(frame) // MIN_SHARD_ROWS))
+        groups = shard_positions(frame, shards, self.mode, key)
+        results = self._executor.map(func, [frame.iloc[positions] for positions in groups])
+        if self.mode == "range" or len(groups) == 1:
+            # Contiguous shards come back in order, so they only need joining
+            return [row for rows in results for row in rows]
+        ordered = [None] * len(frame)
+        for positions, rows in zip(groups, results):
+            for position, row in zip(positions, rows):
+                ordered[position] = row
+        return ordered
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,169 @@
+# Import necessary libraries
+import os
+import re
+import sqlite3
+import logging
+import threading
+from mysql.connector import errors as mysql_errors
+
+# Stand-in backend for benchmarks and dry runs without a MySQL server.
+# It creates the schema from sql/DDL_statements.sql in a SQLite file and accepts the
+# MySQL statements the loaders send, translated to SQLite where the syntax differs.
+
+DDL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "DDL_statements.sql")
+
+_schema_lock = threading.Lock()
+
+def translate_ddl(ddl):
+    """
+    Rewrites the MySQL DDL into SQLite syntax.
+    """
+    ddl = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT", ddl)
+    ddl = ddl.replace("ENGINE=InnoDB", "").replace(" ON UPDATE CURRENT_TIMESTAMP", "")
+    return ddl
+
+def translate_sql(statement):
+    """
+    Rewrites one loader statement into SQLite syntax. Returns None for MySQL session
+    statements (SET ...) that have no SQLite equivalent.
+    """
+    stripped = statement.strip()
+    if re.match(r"SET\s", stripped, re.IGNORECASE):
+        return None
+    if re.match(r"LOAD DATA", stripped, re.IGNORECASE):
+        # Same error a server with local_infile disabled returns, so writers fall back to INSERT
+        raise mysql_errors.DatabaseError(msg="LOAD DATA is not supported by the SQLite backend", errno=1148)
+    stripped = re.sub(r"^TRUNCATE TABLE", "DELETE FROM", stripped, flags=re.IGNORECASE)
+    stripped = stripped.replace("INSERT IGNORE", "INSERT OR IGNORE")
+    stripped = re.sub(r"COLLATE utf8mb4\w*_bin", "COLLATE BINARY", stripped)
+    # The row alias of INSERT ... VALUES (...) AS new is SQLite's excluded row
+    stripped = re.sub(r"\s+AS new(?= ON DUPLICATE KEY UPDATE )", "", stripped)
+    duplicate = re.search(r" ON DUPLICATE KEY UPDATE (.*)$", stripped, re.DOTALL)
+    if duplicate:
+        assignments = re.sub(r"\bnew\.(\w+)", r"excluded.\1", duplicate.group(1))
+        # Like MySQL, rows the assignments would not change are left untouched
+        pairs = [[part.strip() for part in assignment.split("=", 1)] for assignment in assignments.split(",")]
+        changed = " OR ".join(f"{column} IS NOT {value}" for column, value in pairs)
+        # SQLite takes unqualified column names on the left of SET
+        assignments = ", ".join(f"{column.split('.')[-1]} = {value}" for column, value in pairs)
+        stripped = stripped[:duplicate.start()] + f" ON CONFLICT DO UPDATE SET {assignments} WHERE {changed}"
+    return stripped.replace("%s", "?")
+
+def _upsert_table(sql):
+    # Table of a translated upsert, whose affected-row count is made to match MySQL's
+    match = re.match(r"INSERT INTO (\w+)", sql)
+    return match.group(1) if match and " ON CONFLICT DO UPDATE " in sql else None
+
+def _param(value):
+    # numpy scalars and Decimals are not SQLite types
+    if hasattr(value, "item"):
+        return value.item()
+    if value is not None and not isinstance(value, (int, float, str, bytes)):
+        return str(value)
+    return value
+
+
+class SQLiteCursor:
+    """
+    Cursor exposing the subset of the mysql-connector cursor API the loaders use.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.cursor()
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, statement, params=()):
+        sql = translate_sql(statement)
+        if sql is None:
+            return
+        self._counted(sql, self._cursor.execute, sql, [_param(value) for value in (params or ())])
+        self.lastrowid = self._cursor.lastrowid
+
+    def executemany(self, statement, seq_params):
+        sql = translate_sql(statement)
+        if sql is None:
+            return
+        params = [[_param(value) for value in row] for row in seq_params]
+        # A multi-row INSERT either lands whole or not at all on MySQL, so a failed batch can be retried row by row
+        if not self._connection.in_transaction:
+            self._cursor.execute("BEGIN IMMEDIATE")
+        self._cursor.execute("SAVEPOINT batch")
+        try:
+            self._counted(sql, self._cursor.executemany, sql, params)
+        except Exception:
+            self._cursor.execute("ROLLBACK TO batch")
+            raise
+        finally:
+            self._cursor.execute("RELEASE batch")
+
+    def _counted(self, sql, run, *args):
+        table = _upsert_table(sql)
+        if table is None:
+            run(*args)
+            self.rowcount = self._cursor.rowcount
+            return
+        # SQLite counts inserted and updated rows alike; MySQL counts an update twice
+        last_row = self._cursor.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+        run(*args)
+        changed = self._cursor.rowcount
+        inserted = self._cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid > ?", [last_row]).fetchone()[0]
+        self.rowcount = 2 * changed - inserted
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Connection exposing the subset of the mysql-connector connection API the loaders use.
+    """
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self._connection)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+def create_schema(path, ddl_path=DDL_PATH):
+    """
+    Creates the pipeline schema in a SQLite file unless it already exists.
+    """
+    with _schema_lock:
+        connection = sqlite3.connect(path)
+        try:
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'property'"
+            ).fetchone()
+            if not exists:
+                with open(ddl_path, encoding="utf-8") as f:
+                    connection.executescript(translate_ddl(f.read()))
+                connection.commit()
+                logging.info(f"Created SQLite stand-in schema in {path}.")
+        finally:
+            connection.close()
+
+def connect(path):
+    """
+    Opens a connection to the SQLite stand-in database, creating the schema on first use.
+    """
+    create_schema(path)
+    return SQLiteConnection(path)
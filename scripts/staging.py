@@ -0,0 +1,104 @@
+# Import necessary libraries
+import os
+import logging
+from bulk_writer import (DEFAULT_BATCH_SIZE, DEFAULT_LOAD_MODE, ROW_ALIAS, batch_counts, conflict_clause, conflict_key,
+                         warning_count, write_rows)
+from quarantine import quarantine
+
+# Tables loaded through staging tables and set-based INSERT ... SELECT, e.g. PIPELINE_STAGING_TABLES=property,taxes
+STAGING_TABLES = ("property", "taxes")
+DEFAULT_STAGING_TABLES = [
+    table.strip() for table in os.environ.get("PIPELINE_STAGING_TABLES", "").split(",") if table.strip()
+]
+
+# Keys are compared byte for byte (no case folding or trailing-space padding), like the pandas resolution
+KEY_COLLATION = "utf8mb4_0900_bin"
+
+def staging_table(table):
+    """
+    Returns the name of a table's staging table (see the STAGING LOADS section of the DDL).
+    """
+    if table not in STAGING_TABLES:
+        raise ValueError(f"No staging table for '{table}'; expected one of {STAGING_TABLES}")
+    return f"{table}_staging"
+
+def key_match(left, right):
+    """
+    Returns a join condition matching two key columns exactly.
+    """
+    return f"{left} = {right} COLLATE {KEY_COLLATION}"
+
+class StagedMerge:
+    """
+    The set-based INSERT ... SELECT moving a table's staged rows (alias s) into the table in
+    feed order. expressions gives the SELECT expression of every column, joins the JOIN
+    clauses resolving their ids, and rows whose required expressions are NULL are left out
+    as rejected and quarantined with their staged_columns values.
+    Existing rows are left unchanged, or updated in place with update=True.
+    """
+
+    def __init__(self, table, columns, expressions, joins, required=(), update=False, staged_columns=()):
+        self.table = table
+        self.required = required
+        self.staged_columns = list(staged_columns)
+        source = f"FROM {staging_table(table)} s {' '.join(joins)}"
+        resolved = " AND ".join(f"{expression} IS NOT NULL" for expression in required) or "1 = 1"
+        # The resolved rows are a derived table named ROW_ALIAS, so updates can assign new.column
+        self.statement = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(f'{ROW_ALIAS}.{column}' for column in columns)} "
+            f"FROM (SELECT {', '.join(f'{expressions[column]} AS {column}' for column in columns)}, s.staging_row "
+            f"{source} WHERE {resolved}) AS {ROW_ALIAS} ORDER BY {ROW_ALIAS}.staging_row"
+            f"{conflict_clause(table, columns, update, qualified=True)}"
+        )
+        # Staged rows the merge leaves out, and resolved rows whose key is already stored
+        key = conflict_key(table, columns)
+        existing = "0"
+        if key is not None:
+            match = " AND ".join(f"t.{columns[i]} = {expressions[columns[i]]}" for i in key)
+            existing = f"SUM(CASE WHEN {resolved} AND EXISTS (SELECT 1 FROM {table} t WHERE {match}) THEN 1 ELSE 0 END)"
+        self.outcome_statement = (
+            f"SELECT COALESCE(SUM(CASE WHEN {resolved} THEN 0 ELSE 1 END), 0), COALESCE({existing}, 0) {source}"
+        )
+        self.unresolved_statement = (
+            f"SELECT {', '.join(f's.{column}' for column in self.staged_columns) or 's.staging_row'} "
+            f"{source} WHERE NOT ({resolved}) ORDER BY s.staging_row"
+        )
+
+    def run(self, cursor, staged_count):
+        """
+        Merges the staged rows. One set-based query first counts the rows with unresolved
+        keys and those matching a stored row, so the merge's affected-row count can be split
+        into inserts and updates. Returns WriteCounts.
+        """
+        cursor.execute(self.outcome_statement)
+        unresolved, existing = (int(value) for value in cursor.fetchone())
+        cursor.execute(self.statement)
+        resolved = staged_count - unresolved
+        counts = batch_counts(resolved, cursor.rowcount, resolved - existing)
+        counts.rejected = unresolved
+        counts.warnings = warning_count(cursor, self.table)
+        if unresolved:
+            logging.warning(f"{unresolved} of {staged_count} staged {self.table} rows were not merged (unresolved keys).")
+            # Only read back on chunks with rejects, so clean chunks pay nothing
+            cursor.execute(self.unresolved_statement)
+            quarantine.add_many(self.table, "merge", self.staged_columns or ["staging_row"], cursor.fetchall(),
+                                f"unresolved {' or '.join(self.required)}")
+            quarantine.flush()
+        return counts
+
+def reset_staging(cursor, table):
+    """
+    Empties a table's staging table before a load, restarting its row counter.
+    """
+    cursor.execute(f"TRUNCATE TABLE {staging_table(table)}")
+
+def stage_rows(cursor, table, columns, rows, load_mode=DEFAULT_LOAD_MODE, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Replaces the contents of a table's staging table with rows, using the given load mode
+    (batched INSERT or LOAD DATA LOCAL INFILE). Runs inside the chunk's transaction.
+    Returns WriteCounts.
+    """
+    name = staging_table(table)
+    cursor.execute(f"DELETE FROM {name}")
+    return write_rows(cursor, name, columns, rows, load_mode, batch_size, stage="stage")
@@ -0,0 +1,125 @@
+# Import necessary libraries
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from lookup_cache import build_index, resolve_ids
+
+# Tables keyed by property title: table → id column
+TITLE_TABLES = {
+    "leads": "lead_id",
+    "property": "property_id",
+}
+
+# Titles per IN (...) list when fetching ids
+TITLE_QUERY_SIZE = 1000
+
+def _clean_titles(titles):
+    # Distinct string titles, in first-seen order
+    return list(dict.fromkeys(title for title in titles if isinstance(title, str)))
+
+def title_queries(table, titles):
+    """
+    Yields the (statement, params) queries that fetch the (id, property_title) rows of the
+    given titles from leads or property, TITLE_QUERY_SIZE titles at a time.
+    """
+    id_col = TITLE_TABLES[table]
+    titles = _clean_titles(titles)
+    for start in range(0, len(titles), TITLE_QUERY_SIZE):
+        batch = titles[start:start + TITLE_QUERY_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch))
+        yield f"SELECT {id_col}, property_title FROM {table} WHERE property_title IN ({placeholders})", batch
+
+
+class TitleIndex:
+    """
+    In-memory property title → (lead_id, property_id) index shared by the main table loaders.
+    The leads and property loaders record the ids of every chunk they write, so later stages
+    resolve titles here instead of re-reading the whole table and merging on VARCHAR titles.
+    Titles that were not recorded in this run (e.g. a stage re-run on its own) are fetched
+    by title on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets every recorded id, e.g. before a new run or after the tables were reset.
+        """
+        with self._lock:
+            self._ids = {table: {} for table in TITLE_TABLES}
+            self._missing = {table: set() for table in TITLE_TABLES}
+            self._indexes = {}
+
+    def record(self, cursor, table, titles):
+        """
+        Stores the ids of rows just written to leads or property, looked up by the titles
+        exactly as they were inserted. Keys are the stripped titles.
+        """
+        self._fetch(cursor, table, _clean_titles(titles))
+
+    def store(self, table, titles, rows):
+        """
+        Stores the (id, property_title) rows fetched for titles (see title_queries) when the
+        caller ran the queries itself, e.g. on the async pipeline's connection.
+        """
+        titles = _clean_titles(titles)
+        found = {title.strip(): row_id for row_id, title in rows}
+        with self._lock:
+            self._ids[table].update(found)
+            self._missing[table].update(title.strip() for title in titles if title.strip() not in found)
+            self._missing[table].difference_update(found)
+            self._indexes.pop(table, None)
+        logging.debug(f"Recorded {len(found)} of {len(titles)} titles from {table} in the title index.")
+
+    def ids(self, cursor, table, titles):
+        """
+        Resolves a column of stripped titles to ids: int64 when every title is known,
+        otherwise float64 with NaN for unknown titles (like a left merge).
+        """
+        titles = pd.Series(titles, dtype=object)
+        with self._lock:
+            known = self._ids[table]
+            missing = self._missing[table]
+            unknown = [title for title in _clean_titles(titles) if title not in known and title not in missing]
+        if unknown:
+            self._fetch(cursor, table, unknown)
+        index, ids = self._index(table)
+        return resolve_ids(index, ids, titles)
+
+    def frame(self, cursor, table, titles):
+        """
+        Returns the (id, property_title) rows of the given stripped titles as a DataFrame
+        ordered by id, like SELECT id, property_title FROM table restricted to those titles.
+        """
+        id_col = TITLE_TABLES[table]
+        titles = pd.Series(_clean_titles(titles), dtype=object)
+        ids = pd.Series(self.ids(cursor, table, titles))
+        found = ids.notna().to_numpy()
+        frame = pd.DataFrame({id_col: ids[found].astype(np.int64).to_numpy(), "property_title": titles[found].to_numpy()})
+        return frame.sort_values(id_col, ignore_index=True)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(ids) for ids in self._ids.values())
+
+    def _index(self, table):
+        # Rebuilt only after new ids were recorded for the table
+        with self._lock:
+            cached = self._indexes.get(table)
+            if cached is None:
+                cached = self._indexes[table] = build_index(self._ids[table])
+            return cached
+
+    def _fetch(self, cursor, table, titles):
+        rows = []
+        for statement, params in title_queries(table, titles):
+            cursor.execute(statement, params)
+            rows.extend(cursor.fetchall())
+        self.store(table, titles, rows)
+
+
+# Shared index used by every main table loader in the process
+title_index = TitleIndex()
@@ -0,0 +1,5 @@
+# The pipeline modules live side by side in scripts/ and import each other by name
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
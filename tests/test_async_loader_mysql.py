@@ -0,0 +1,82 @@
+# Integration tests of the async pipeline against a real MySQL server. They truncate every
+# pipeline table, so they only run when PIPELINE_TEST_MYSQL=1 points them at a scratch
+# database (configured like the pipeline, with db.ini or PIPELINE_DB_* variables).
+import os
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("PIPELINE_TEST_MYSQL", "0").strip().lower() not in ("1", "true", "yes", "on"),
+    reason="set PIPELINE_TEST_MYSQL=1 to run against a scratch MySQL database",
+)
+pytest.importorskip("aiomysql")
+
+import db
+from async_loader import run_main_tables_async
+from benchmark_suite import reset_database
+from dataset import open_dataset
+from feed_generator import generate_feed
+from lookup_cache import lookup_cache
+from main_lookup_tables_load import load_lookup_tables
+from main_tables_load import load_main_tables
+from title_index import TitleIndex, title_index
+
+RECORD_COUNT = 200
+MAIN_TABLES = ["leads", "property", "taxes", "rehab", "valuation", "hoa"]
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = str(tmp_path / "feed.json")
+    generate_feed(path, RECORD_COUNT)
+    return path
+
+
+def _reset(feed):
+    reset_database()
+    lookup_cache.clear()
+    title_index.clear()
+    load_lookup_tables(open_dataset(feed))
+
+
+def _snapshot():
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        snapshot = {}
+        for table in MAIN_TABLES:
+            cursor.execute(f"SELECT * FROM {table} ORDER BY 1")
+            snapshot[table] = cursor.fetchall()
+        return snapshot
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def test_async_load_matches_sync_load(feed):
+    _reset(feed)
+    load_main_tables(open_dataset(feed))
+    expected = _snapshot()
+
+    _reset(feed)
+    results = run_main_tables_async(feed, batch_size=50)
+
+    assert set(results) == set(MAIN_TABLES)
+    assert _snapshot() == expected
+
+
+def test_async_load_records_titles(feed, monkeypatch):
+    _reset(feed)
+    fetches = []
+    fetch = TitleIndex._fetch
+
+    def counted_fetch(self, cursor, table, titles):
+        fetches.append(table)
+        return fetch(self, cursor, table, titles)
+
+    monkeypatch.setattr(TitleIndex, "_fetch", counted_fetch)
+
+    run_main_tables_async(feed, batch_size=50)
+
+    # The writer recorded every lead and property id, so no child table went back to the database
+    assert fetches == []
+    assert len(title_index) == 2 * RECORD_COUNT
@@ -0,0 +1,56 @@
+# The columnar store must give the loaders the same rows as the JSON dataset it was built from
+import json
+import math
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from columnar_store import build_store
+from dataset import NESTED_SECTIONS, TABLE_COLUMNS, open_dataset
+from feed_generator import generate_feed
+
+CHUNK_SIZE = 40
+
+
+def _rows(frame):
+    # Row tuples with every missing value (None or NaN) as None
+    return [
+        tuple(None if value is None or (isinstance(value, float) and math.isnan(value)) else value for value in row)
+        for row in frame.itertuples(index=False)
+    ]
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = tmp_path / "feed.json"
+    generate_feed(str(path), 100)
+    records = json.loads(path.read_text(encoding="utf-8"))
+    # Columns mixing types: a 'Null' HOA next to numeric ones, and Taxes holding '' and numbers
+    records[0]["HOA"] = [{"HOA": "Null", "HOA_Flag": "No"}]
+    records[1]["Taxes"] = ""
+    records[2]["Taxes"] = "Null"
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("table", list(TABLE_COLUMNS) + list(NESTED_SECTIONS))
+def test_store_matches_dataset(feed, tmp_path, table):
+    expected = open_dataset(feed).table_frame(table)
+    store = build_store(feed, str(tmp_path / "store"), CHUNK_SIZE)
+
+    actual = [row for chunk in store.iter_chunks() for row in _rows(chunk.table_frame(table))]
+
+    assert list(store.iter_chunks())[0].table_frame(table).columns.tolist() == expected.columns.tolist()
+    assert actual == _rows(expected)
+
+
+def test_store_keeps_value_types(feed, tmp_path):
+    store = build_store(feed, str(tmp_path / "store"), CHUNK_SIZE)
+    chunk = next(store.iter_chunks())
+
+    hoa = chunk.table_frame("hoa")["HOA"].tolist()
+    taxes = chunk.table_frame("taxes")["Taxes"].tolist()
+
+    assert hoa[0] == "Null" and all(isinstance(value, (int, float)) for value in hoa[1:])
+    assert taxes[1:3] == ["", "Null"] and isinstance(taxes[0], (int, float))
+    assert next(chunk.iter_records())["HOA"] == [{"HOA": "Null", "HOA_Flag": "No"}]